@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the benchmarks run on the modules of the working tree
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import dill
+import crystal_plasticity_module as cp
+import datasource
+from .common import grain_counts, load, quiet, skip
+
+
+class Datasource:
+    '''
+    Runs the datasource functions of the app in a temporary directory, which holds the pickled
+    initial polycrystal and (for loaded=1) the polycrystal after two steps of plane strain compression.
+    '''
+    timeout = 1200
+    tmpdir = None
+
+    def setup(self, N, loaded):
+        # the loaded polycrystals are only generated for the sizes the python solver handles in time
+        skip(loaded == 1 and N > 10000)
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.mkdtemp()
+        os.chdir(self.tmpdir)
+        with quiet():
+            datasource.create_initial_polycrystal('Random', N, None, None, None, None, None)
+        if loaded == 1:
+            with open('polycrystal_initial.pkl', 'rb') as f:
+                pc = dill.load(f)
+            load(pc, engine='batched')
+            with open('polycrystal_loaded.pkl', 'wb') as f:
+                dill.dump(pc, f)
+
+    def teardown(self, N, loaded):
+        if self.tmpdir is not None:
+            os.chdir(self.cwd)
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+class TimeDatasourceTexture(Datasource):
+    '''Pole figures, inverse pole figures and ODF sections of the app.'''
+    params = (grain_counts, [None, 1])
+    param_names = ['grains', 'loaded']
+
+    def time_generate_pf(self, N, loaded):
+        datasource.generate_pf(loaded, [1, 2], 'FCC_111', 'ND', 'Random', 'points')
+    
+    def time_generate_pf_density(self, N, loaded):
+        datasource.generate_pf(loaded, [1, 2], 'FCC_111', 'ND', 'Random', 'density')
+
+    def time_generate_ipf(self, N, loaded):
+        datasource.generate_ipf('Random', loaded)
+
+    def time_generate_odf(self, N, loaded):
+        datasource.generate_odf([2, 4, 8, 12, 16, 20, 25, 30, 35], loaded)
+
+
+class TimeDatasourceYieldSurface(Datasource):
+    '''Yield surface section of the app.'''
+    params = (grain_counts, [None, 1])
+    param_names = ['grains', 'loaded']
+
+    def setup(self, N, loaded):
+        skip(cp.ImportErrCpfort)
+        super().setup(N, loaded)
+
+    def time_generate_ys(self, N, loaded):
+        with quiet():
+            datasource.generate_ys(('11', '22'), loaded)
@@ -0,0 +1,133 @@
+import numpy as np
+import crystal_plasticity_module as cp
+from .common import grain_counts, polycrystal, load, skip
+
+
+class TimeCrystallography:
+    '''Slip systems and lookup tables of FCC_111, built from scratch or read from the cache.'''
+    params = [False, True]
+    param_names = ['use_cache']
+
+    def setup(self, use_cache):
+        # make sure the cache exists before reading from it
+        cp.Crystallography(cp.crystal_structure_dict['FCC_111'])
+
+    def time_crystallography(self, use_cache):
+        cp.Crystallography(cp.crystal_structure_dict['FCC_111'], use_cache=use_cache)
+
+
+class TimePolycrystalInit:
+    '''Construction of the grains (and clusters) of a polycrystal.'''
+    params = (grain_counts, ['FCTAYLOR', 'ALAMEL'])
+    param_names = ['grains', 'grain_interaction']
+    timeout = 600
+
+    def setup(self, N, grain_interaction):
+        self.orientations = cp.generate_random_orientations(N)
+
+    def time_init(self, N, grain_interaction):
+        cp.Polycrystal('FCC_111', self.orientations, None, None, grain_interaction)
+
+
+class TimeTaylorFC:
+    '''Two steps of the python full constraints Taylor model, rate-independent (SVD) or rate-dependent (RD).'''
+    params = (grain_counts, ['grainwise', 'batched'], ['SVD', 'RD'])
+    param_names = ['grains', 'engine', 'solve_Tayloramb']
+    # every sample deforms a fresh polycrystal
+    number = 1
+    repeat = (1, 3, 60.)
+    warmup_time = 0
+    timeout = 1200
+
+    def setup(self, N, engine, solve_Tayloramb):
+        skip(N > 10000)
+        self.pc = polycrystal(N)
+
+    def time_load(self, N, engine, solve_Tayloramb):
+        load(self.pc, engine=engine, solve_Tayloramb=solve_Tayloramb)
+
+
+class TimeAlamel:
+    '''Two steps of the python Alamel model.'''
+    params = grain_counts
+    param_names = ['grains']
+    number = 1
+    repeat = (1, 3, 60.)
+    warmup_time = 0
+    timeout = 1200
+
+    def setup(self, N):
+        skip(N > 10000)
+        self.pc = polycrystal(N, 'ALAMEL')
+
+    def time_load(self, N):
+        load(self.pc)
+
+
+class TimeCpfort:
+    '''Ten steps of the fortran accelerated Taylor and Alamel models.'''
+    params = (grain_counts, ['FCTAYLOR', 'ALAMEL'])
+    param_names = ['grains', 'grain_interaction']
+    number = 1
+    repeat = (1, 3, 60.)
+    warmup_time = 0
+    timeout = 1200
+
+    def setup(self, N, grain_interaction):
+        skip(cp.ImportErrCpfort)
+        self.pc = polycrystal(N, grain_interaction)
+
+    def time_load(self, N, grain_interaction):
+        load(self.pc, Nsteps=10, dofortran=True)
+
+
+class TrackEngineAgreement:
+    '''
+    Agreement of the python engines on the same polycrystal, tracked as the largest deviation of the grain 
+    stresses relative to the largest stress (the tolerance is checked by tests/test_engines.py).
+    '''
+    timeout = 1200
+    
+    def track_RD_grainwise_batched(self):
+        # both engines warm start the Newton iterations from the stresses of the previous step
+        grainwise = load(polycrystal(100), Nsteps=5, engine='grainwise', solve_Tayloramb='RD').grain_array.stress_loc
+        batched   = load(polycrystal(100), Nsteps=5, engine='batched', solve_Tayloramb='RD').grain_array.stress_loc
+        return np.max(np.abs(grainwise - batched))/np.max(np.abs(batched))
+    track_RD_grainwise_batched.unit = 'relative stress'
+
+
+def cayley_inverse(W):
+    '''Second-order orientation update of Alamel with the explicit inverse, the reference for spin_cayley.'''
+    return np.linalg.inv(np.eye(3) - 0.5*W) @ (np.eye(3) + 0.5*W)
+
+
+class TrackAlamelRotationUpdate:
+    '''
+    Alamel with the closed-form orientation update (spin_cayley) against the explicit inverse after ten steps. 
+    Round-off differences are amplified by the degenerate relaxed slip solutions, single grains may end up 
+    several degrees apart, so the deviations of the averaged stress (relative to its largest component) and of the 
+    {111} pole figure densities (in multiples of random) are tracked (the tolerances are checked by tests/test_alamel.py).
+    '''
+    timeout = 1200
+    
+    def setup_cache(self):
+        results = []
+        for update in (cp.spin_cayley, cayley_inverse):
+            spin_cayley, cp.spin_cayley = cp.spin_cayley, update
+            try:
+                pc = load(polycrystal(500, 'ALAMEL'), Nsteps=10)
+            finally:
+                cp.spin_cayley = spin_cayley
+            density = cp.pole_figure_density(pc.grain_array.Q, (1,1,1), bins=32, sigma=2.)[0]
+            results.append((pc.average_stress[:,:,-1].copy(), density))
+        return results
+    
+    def track_average_stress(self, results):
+        (closed, _), (inverse, _) = results
+        return np.max(np.abs(closed - inverse))/np.max(np.abs(inverse))
+    track_average_stress.unit = 'relative stress'
+    
+    def track_texture(self, results):
+        (_, closed), (_, inverse) = results
+        return np.nanmax(np.abs(closed - inverse))
+    track_texture.unit = 'mrd'
@@ -0,0 +1,32 @@
+import odflib
+from .common import grain_counts, polycrystal, load, skip
+
+
+class TimePlotOrientations:
+    '''Plotting data of the pole figures and inverse pole figures, before and after deformation.'''
+    params = (grain_counts, ['PF', 'IPF'], ['initial', 'loaded'])
+    param_names = ['grains', 'plot_type', 'state']
+    timeout = 600
+
+    def setup(self, N, plot_type, state):
+        # the loaded trajectories are only generated for the sizes the python solver handles in time
+        skip(state == 'loaded' and N > 10000)
+        self.pc = polycrystal(N)
+        if state == 'loaded':
+            load(self.pc, engine='batched')
+
+    def time_plot_orientations(self, N, plot_type, state):
+        self.pc.plot_orientations_plotly(plot_type=plot_type, crystal_structure='FCC_111')
+
+
+class TimeODF:
+    '''Orientation distribution function from the grain orientations.'''
+    params = grain_counts
+    param_names = ['grains']
+    timeout = 600
+
+    def setup(self, N):
+        self.angles = polycrystal(N).plot_orientations_plotly(plot_type='ODF')
+
+    def time_odf(self, N):
+        odflib.ODF(orientations=odflib.Orientations(angles=self.angles))
@@ -0,0 +1,37 @@
+import crystal_plasticity_module as cp
+from .common import grain_counts, options, polycrystal, quiet, skip
+
+
+class TimeYieldLocus2D:
+    '''Section of the yield locus in the (sigma_11, sigma_22) plane.'''
+    params = (grain_counts, [20, 50])
+    param_names = ['grains', 'number_of_points']
+    timeout = 1200
+
+    def setup(self, N, number_of_points):
+        skip(cp.ImportErrCpfort)
+        self.pc = polycrystal(N)
+
+    def time_yield_locus(self, N, number_of_points):
+        with quiet():
+            self.pc.yield_locus(locus_type='2D', number_of_points=number_of_points, plot_axes=['11', '22'], cache=False)
+
+
+class TimeRvalues:
+    '''R-values and uniaxial yield stresses along the rolling direction and at angles to it.'''
+    params = grain_counts
+    param_names = ['grains']
+    timeout = 600
+
+    def setup(self, N):
+        skip(cp.ImportErrCpfort)
+        self.pc = polycrystal(N)
+
+    def time_getRvalues(self, N):
+        with quiet():
+            self.pc.getRvalues(options=options, cache=False)
+
+    def time_getRvalue_profile(self, N):
+        # 0 to 90 degrees in steps of 5 degrees
+        with quiet():
+            self.pc.getRvalue_profile(options=options, cache=False)
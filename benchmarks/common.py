@@ -0,0 +1,56 @@
+import io
+import contextlib
+import numpy as np
+import crystal_plasticity_module as cp
+
+# number of grains of the benchmarked polycrystals
+grain_counts = [100, 1000, 10000, 100000]
+
+hardening_law = {'model'                : 'RIGID_PLASTIC',
+                 'hardening_parameters' : [10.],
+                 'relax_penalties'      : [0., 0., 0.]}
+
+# plane strain compression with some shear
+L = np.array([[1.0, 0.3,  0.0],
+              [0.0, 0.0,  0.0],
+              [0.0, 0.0, -1.0]])
+
+options = {'increment_jacobian' : 1.e-3,
+           'rotate_boundary'    : True,
+           'use_SCYL'           : False,
+           'SCYL_exponent'      : 100,
+           'solve_Tayloramb'    : 'SVD',
+           'gmdot0'             : 1.,
+           'SRS'                : 0.01,
+           'engine'             : 'grainwise',
+           'solve_slips'        : 'simplex'}
+
+
+def quiet():
+    '''Suppresses the progress prints of the toolbox.'''
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def skip(condition=True):
+    '''Skips the benchmark (asv skips a benchmark whose setup raises NotImplementedError).'''
+    if condition:
+        raise NotImplementedError
+
+
+def polycrystal(N, grain_interaction='FCTAYLOR', crystal_structure='FCC_111', seed=0):
+    '''Polycrystal of N random grains, always the same for a given seed.'''
+    np.random.seed(seed)
+    orientations = cp.generate_random_orientations(N)
+    with quiet():
+        return cp.Polycrystal(crystal_structure, orientations, None, dict(hardening_law), grain_interaction)
+
+
+def load(pc, Nsteps=2, dofortran=False, **opts):
+    '''Deforms the polycrystal by Nsteps steps of 0.01 von Mises strain.'''
+    result_vars = {'grain_results'       : ['euler_angles','sliprates','crss','relaxation','stress_loc'],
+                   'polycrystal_results' : ['average_stress','average_slip'],
+                   'number_of_outputs'   : Nsteps}
+    run_options = dict(options, **opts)
+    with quiet():
+        pc.load(L, None, None, True, False, False, Nsteps, 0.01, False, result_vars, dofortran, options=run_options)
+    return pc
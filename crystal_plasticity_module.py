@@ -1,13 +1,25 @@
 import sys
+import os
+import shutil
+import tempfile
+import copy
+import uuid
+import types
+import threading
+import functools
+import hashlib
+import collections
+import concurrent.futures
 import numpy as np
 import itertools
 import scipy.optimize
-import scipy.linalg
+import scipy.special
+import scipy.ndimage
 import time
 import quadprog
 import matplotlib.pyplot as plt
 import ipywidgets
-from multiprocessing import Pool
+from multiprocessing import Pool, shared_memory
 from IPython.display import display
 import odflib
 import plotly.express as px
@@ -40,6 +52,14 @@ grain_interaction_dict = {'FCTAYLOR':1,
                           'ALAMEL'  :2,
                           'ALAMEL3' :3}
 
+# cpfort.globals variables handed over to python after the fortran Taylor and Alamel runs
+cpfort_readback_taylor = ('crss_mean', 'qg1_list', 'hvarq1_list', 'out_average_stress', 'out_average_slip', 
+                          'out_stress_locg1', 'out_stress_globg1', 'out_euler_anglesg1', 'out_crssg1', 
+                          'out_slipratesg1', 'out_activesidg1', 'out_num_activesg1', 'out_statevarg1')
+cpfort_readback_alamel = cpfort_readback_taylor + ('qg2_list', 'qb_list', 'hvarq2_list', 'out_stress_locg2', 
+                          'out_stress_globg2', 'out_euler_anglesg2', 'out_crssg2', 'out_slipratesg2', 
+                          'out_activesidg2', 'out_num_activesg2', 'out_relaxsliprates')
+
 hardening_model_dict = {'RIGID_PLASTIC':1,
                         'BAUSCHINGER'  :2}
 
@@ -51,6 +71,196 @@ crystal_structure_dict = {'FCC_111':1,
                           'BCC_112':6,
                           'BCC_123':7}
 
+# version of the on-disk cache of the slip system lookup tables (increase it whenever the tables change)
+CRYSTALLOGRAPHY_CACHE_VERSION = 1
+# the cache directory can be redirected by the environment variable CP_CACHE_DIR
+CRYSTALLOGRAPHY_CACHE_DIR = os.environ.get('CP_CACHE_DIR', 
+                                           os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cpcache'))
+# directory of the on-disk tier of the cache of yield loci and r-values (ResultCache), off if not set
+RESULT_CACHE_DIR = os.environ.get('CP_RESULT_CACHE_DIR')
+
+
+# serialises the use of the cpfort module globals by the sessions of one process
+_cpfort_lock = threading.RLock()
+# token of the session state currently installed in the cpfort module of this process
+_cpfort_installed = [None]
+
+def _cpfort_install(token, state):
+    '''Install a session state into cpfort unless it is already installed.'''
+    if _cpfort_installed[0] != token:
+        for name, init_args in state:
+            getattr(cpfort.crystal_plasticity, name)(*init_args)
+        _cpfort_installed[0] = token
+
+def _cpfort_run(token, state, settings, routine, args, kwargs, readback, finalize):
+    '''Install a session state and settings into cpfort, run one routine and read back the requested globals.'''
+    _cpfort_install(token, state)
+    for (module, name), value in settings.items():
+        setattr(getattr(cpfort, module), name, value() if callable(value) else value)
+    kwargs = {key: value() if callable(value) else value for key, value in kwargs.items()}
+    out = getattr(cpfort.crystal_plasticity, routine)(*args, **kwargs)
+    if routine in ('taylor', 'alamel'):
+        # the installed state was evolved by the run
+        _cpfort_installed[0] = None
+    values = {}
+    for name in readback:
+        value = getattr(cpfort.globals, name)
+        values[name] = None if value is None else np.array(value)
+    if finalize is not None:
+        getattr(cpfort.crystal_plasticity, finalize)()
+    return out, values
+
+def _cpfort_prefix(name, values):
+    '''Zero array of the size of the fixed-size cpfort global "name" starting with "values".'''
+    array = np.zeros_like(getattr(cpfort.globals, name))
+    array[:len(values)] = values
+    return array
+
+def _cpfort_good_guess(Sabs, iSabs, Sdir, iSdir):
+    '''Initial guess of Dp (Voigt) scaled by the mean crss of the installed polycrystal.'''
+    return m2voigt_dev(make_good_guess(Sabs, iSabs, Sdir, iSdir, cpfort.globals.crss_mean))
+
+# definition of the CpfortSession class
+class CpfortSession:
+    '''
+    State of one polycrystal for the fortran implementation (cpfort). The cpfort module keeps the model 
+    in module globals shared by the whole process, so the session keeps its own packed copy of the 
+    polycrystal state and of the boundary conditions and installs them into cpfort only for the duration 
+    of a call. With mode='serial' the calls of all sessions in the process are serialised by a lock, with 
+    mode='process' the session runs cpfort in its own worker process, so that independent simulations 
+    can run concurrently. A Polycrystal creates a serial session on the first use of cpfort, assign 
+    "polycrystal.cpfort_session = CpfortSession('process')" to isolate it instead.
+    '''
+    def __init__(self, mode='serial'):
+        if mode not in ('serial', 'process'):
+            sys.exit('Mode of the cpfort session not recognized.')
+        self.mode     = mode
+        self.token    = None
+        self.state    = []
+        self.settings = {}
+        self.executor = None
+        
+    def pack(self, state):
+        '''Store the polycrystal state as a list of (cpfort.crystal_plasticity routine, arguments) installing it.'''
+        self.state = state
+        self.token = uuid.uuid4().hex
+        
+    def set(self, module='globals', **values):
+        '''Set variables of cpfort.globals (or of another cpfort module, e.g. scylglobals) used by the next calls.'''
+        for name, value in values.items():
+            self.settings[(module, name)] = value
+            
+    def call(self, routine, *args, readback=(), finalize=None, **kwargs):
+        '''
+        Run cpfort.crystal_plasticity.<routine>(*args, **kwargs) with the state and settings of this session. 
+        Returns the output of the routine and a namespace with copies of the cpfort.globals variables 
+        listed in "readback". Callable keyword arguments and settings are evaluated just before the call, with 
+        the session installed. "finalize" is a routine run after the read back (e.g. deallocating outputs).
+        '''
+        run = (self.token, self.state, self.settings, routine, args, kwargs, tuple(readback), finalize)
+        if self.mode == 'process':
+            if self.executor is None:
+                self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+            out, values = self.executor.submit(_cpfort_run, *run).result()
+        else:
+            with _cpfort_lock:
+                out, values = _cpfort_run(*run)
+        return out, types.SimpleNamespace(**values)
+    
+    def close(self):
+        '''Shut down the worker process of the session (mode='process').'''
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['executor'] = None
+        return state
+
+
+def content_hash(*parts):
+    '''Hash (hex digest) of the content of numbers, strings, arrays and nested lists, tuples and dicts of them.'''
+    h = hashlib.sha256()
+    def update(x):
+        if isinstance(x, np.ndarray):
+            h.update('array{}{}'.format(x.dtype.str, x.shape).encode())
+            h.update(np.ascontiguousarray(x).tobytes())
+        elif isinstance(x, (list, tuple)):
+            h.update('{}{}'.format(type(x).__name__, len(x)).encode())
+            for item in x:
+                update(item)
+        elif isinstance(x, dict):
+            h.update('dict{}'.format(len(x)).encode())
+            for k in sorted(x, key=repr):
+                update(k)
+                update(x[k])
+        else:
+            h.update(repr(x).encode())
+    for part in parts:
+        update(part)
+    return h.hexdigest()
+
+# definition of the ResultCache class
+class ResultCache:
+    '''
+    Cache of computed results (tuples of arrays and numbers) addressed by the content_hash of their inputs. The 
+    "maxsize" most recently used results are kept in memory, with a "directory" every result is also stored there 
+    as <key>.npz and shared by all processes and sessions using the same directory.
+    '''
+    def __init__(self, maxsize=64, directory=None):
+        self.maxsize   = maxsize
+        self.directory = directory
+        self.memory    = collections.OrderedDict()
+        
+    def get(self, key):
+        '''Copy of the result stored under key, None if there is none.'''
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return copy.deepcopy(self.memory[key])
+        if self.directory is not None:
+            try:
+                with np.load(os.path.join(self.directory, key+'.npz')) as data:
+                    value = tuple(data['arr_{}'.format(i)][()] for i in range(len(data.files)))
+            except (OSError, ValueError, KeyError):
+                return None
+            self.remember(key, value)
+            return copy.deepcopy(value)
+        return None
+    
+    def put(self, key, value):
+        '''Store the result (tuple) under key.'''
+        self.remember(key, copy.deepcopy(value))
+        if self.directory is not None:
+            tmp = None
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                # write into a temporary file first, so that concurrent processes never see partial results
+                fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.npz')
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, *value)
+                os.replace(tmp, os.path.join(self.directory, key+'.npz'))
+                tmp = None
+            except Exception:
+                print('Cannot write result cache to {}.'.format(self.directory))
+            finally:
+                # no partial results are left in the shared directory
+                if tmp is not None and os.path.exists(tmp):
+                    os.remove(tmp)
+                
+    def remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+            
+    def clear(self):
+        '''Empty the memory tier (the files on disk are kept).'''
+        self.memory.clear()
+
+# yield loci and r-values of the polycrystals, assign result_cache.directory to store them on disk
+result_cache = ResultCache(directory=RESULT_CACHE_DIR)
+
 
 # definition of the Cluster class
 class Cluster:
@@ -316,8 +526,8 @@ class Cluster:
         Dp2_vec = m2voigt_dev(Dg2_relaxed)
         Dp_vec = np.append(Dp1_vec, Dp2_vec)
         
-        rss_g1 = getRSS(self.g1.stress_loc, crystal_properties.P3d)
-        rss_g2 = getRSS(self.g2.stress_loc, crystal_properties.P3d)
+        rss_g1 = resolved_shear_stresses(m2voigt_dev(self.g1.stress_loc))
+        rss_g2 = resolved_shear_stresses(m2voigt_dev(self.g2.stress_loc))
         potentactivesID_g1 = np.where(rss_g1/self.g1.crss > (1.-Stol))[0]
         potentactivesID_g2 = np.where(rss_g2/self.g2.crss > (1.-Stol))[0]
         Nact_g1 = len(potentactivesID_g1)
@@ -604,15 +814,11 @@ class Grain:
 
 
 
-    def solveSingleCrystal(self, result_vars, solve_Tayloramb='SVD', SRS=0.01, gm0=1.):
+    def solveSingleCrystal(self, result_vars, solve_Tayloramb='SVD', SRS=0.01, gm0=1., solve_slips='simplex'):
         
-        def funcRD(x, m, gm0):
-            S = voigt2m_dev(x)
-            tau = getRSS(S, crystal_properties.P3d)  
-            tau[np.where(tau < 0)[0]] = 0.
-            gm = gm0*(tau/self.crss)**(1./m)
-            dvec = crystal_properties.P @ gm
-            return self.Dp_vec - dvec
+        # stress of the previous step, the rate-dependent solution starts from it (a copy, for a GrainView 
+        # the stress is a row of the GrainArray that is overwritten by the rate-independent stress below)
+        stress_prev = None if self.stress_loc is None else np.array(self.stress_loc)
 
         # **************** RATE INDEPENDENT FULL CONSTRAINED TAYLOR MODEL *********     
         # For stress determination, cases with unique stress solutions  
@@ -624,7 +830,8 @@ class Grain:
         # run simplex method (linear programming) in order to find one slip-rate solution that
         # minimizes the internal energy and fullfills the contraints given by the macroscopic
         # plastic strain rate tensor
-        self.findslips()
+        # (solve_slips='vertex' picks the maximum-work Bishop-Hill vertex instead, if it is unique)
+        S_vertex = self.findslips(method=solve_slips)
 
         # This is the main switch in the RI Taylor model in order to calculate stress. 
         # Solution gm found by simplex method with less then 5 active slip systems 
@@ -632,7 +839,13 @@ class Grain:
         # stress ambiguity and needs special treatment (function "stress_corners"). 
         # If simplex method found 5 non-zero slip rates, function "getstress" 
         # calculates stress tensor from CRSS on each active slip systems 
-        if len(self.activesID) == 5:                  
+        if S_vertex is not None:
+            # the stress is the vertex, a valid slip solution is found by SVD
+            self.stress_loc = S_vertex
+            self.S_corners = [self.stress_loc]
+            self.solveambSVD()
+            self.activesID = np.where(self.sliprates > Dtol)[0]
+        elif len(self.activesID) == 5:                  
             # calculate the stress in grain's local coord sys
             self.stress_loc = getstress(self.activesID, self.crss)
             self.S_corners = [self.stress_loc]
@@ -667,25 +880,31 @@ class Grain:
             self.w = np.full(self.slip_basis_solutions.shape[1], 1./self.slip_basis_solutions.shape[1])
         
         elif solve_Tayloramb == 'RD':            
+            # power law with the mean rate-independent slip rate as reference, solved by Newton iterations 
+            # (see solveambRD_batched) for this grain
             gm0 = np.mean(self.sliprates)
-            x0 = m2voigt_dev(self.stress_loc)
-#             sol = scipy.optimize.root(funcRD, x0=x0, args=(SRS, gm0), method='hybr', options={'xtol':1e-5, 'maxfev':1000, 'epsfcn':1e-3, 'factor':100.})
-            sol = scipy.optimize.root(funcRD, x0=x0, args=(SRS, gm0), method='krylov', options={'xtol':1e-5, 'ftol':1e-5, 'maxiter':1000,})
-            if not sol.success:
-                print('Residuals:')
-                print(sol.fun)
-                print(sol.message)         
-            self.stress_loc = voigt2m_dev(sol.x)   
-            tau = getRSS(self.stress_loc, crystal_properties.P3d)     
-            tau[np.where(tau < 0)[0]] = 0.
-            self.sliprates = gm0*(tau/self.crss)**(1./SRS)
+            sliprates, stress_loc = solveambRD_batched(self.stress_loc[None], self.Dp_vec[None], 
+                                                       np.asarray(self.crss, dtype=float)[None], SRS, gm0, 
+                                                       None if stress_prev is None else stress_prev[None])
+            self.sliprates  = sliprates[0]
+            self.stress_loc = stress_loc[0]
             
         # update the IDs of the active slip systems after solving the Taylor ambiguity 
         self.activesID = np.where(self.sliprates > Dtol)[0]
         # total slip rate in grain
         self.total_sliprate = np.sum(self.sliprates)
     
-    def findslips(self):
+    def findslips(self, method='simplex'):
+        '''
+        Find slip rates minimizing the internal energy by linear programming (method='simplex').
+        With method='vertex' the maximum-work stress vertex is picked from the precalculated Bishop-Hill 
+        vertices instead and returned; linear programming is used only as a fallback for non-uniform CRSS 
+        or if two vertices give the same work (no unique stress). Returns None if the simplex method was used.
+        '''
+        if method == 'vertex':
+            S_vertex, vertexID = find_stress_vertices(self.Dp_vec[None,:], self.crss[None,:])
+            if vertexID[0] >= 0:
+                return S_vertex[0]
         
         sol = scipy.optimize.linprog(self.crss, A_ub=None, b_ub=None, A_eq=crystal_properties.P, 
                                      b_eq=self.Dp_vec, bounds=None, method='revised simplex', callback=None,
@@ -719,7 +938,7 @@ class Grain:
             if set(self.activesID).issubset(set(ind)):
                 lind = list(ind)
                 S = getstress(lind, self.crss)
-                rss = getRSS(S, crystal_properties.P3d)
+                rss = resolved_shear_stresses(m2voigt_dev(S))
                 # check whether rss have the same signs for all ss
                 # and check whether the yield criterion is obeyed
                 if np.all(rss[lind] >= 0.0) and (np.all(np.abs(rss)/self.crss <= (1. + Stol))):
@@ -746,7 +965,7 @@ class Grain:
             S = self.S_corners[0]
         except:
             S = self.S_corners
-        rss = getRSS(S, crystal_properties.P3d)
+        rss = resolved_shear_stresses(m2voigt_dev(S))
         potentactivesID = np.where(rss/self.crss > (1.-Stol))[0]
         sliprates_list, actives_list = np.zeros((24,12)), np.zeros((24,12))
         sliprates_list[:,0] = self.sliprates
@@ -767,7 +986,7 @@ class Grain:
                 A = crystal_properties.Dcalc_lookup[row].reshape(5,5)
                 gm = np.linalg.solve(A, self.Dp_vec)
                 S = getstress(ind, self.crss)
-                tau = getRSS(S, crystal_properties.P3d)
+                tau = resolved_shear_stresses(m2voigt_dev(S))
 
                 # check whether tau and gm have the same signs
                 if np.all(gm >= -Dtol) and np.all(tau[ind] >= -Stol):
@@ -813,7 +1032,7 @@ class Grain:
     
     def solveambSVD(self):
 
-        rss = getRSS(self.stress_loc, crystal_properties.P3d)
+        rss = resolved_shear_stresses(m2voigt_dev(self.stress_loc))
         potentactivesID = np.where(rss/self.crss > (1.-Stol))[0]
 
         found_SVD_solution = False
@@ -887,10 +1106,7 @@ class Grain:
                     shp = self.results.euler_angles.shape
                     if shp[1] > 1:
                         noresults = False
-                        plot_data = np.zeros((2,shp[1]))
-                        for i in range(shp[1]):
-                            Q = ang2matrix(self.results.euler_angles[:,i])
-                            plot_data[:,i] = ori2IPF(Q, [0.,0.,1.], (x2, x3))
+                        plot_data = np.array(ori2IPF(ang2matrix(self.results.euler_angles.T)))
                         plt.plot(plot_data[0,:], plot_data[1,:], color=color, marker=marker, markersize=markersize, ls='-', alpha=0.5)
                     else:
                         print('No orientaion data available for plotting trajectories. Increase "number_of_outputs".')
@@ -902,8 +1118,8 @@ class Grain:
                 if noresults:
                     # plot at least start and end orientation
                     plot_data = np.zeros((2,2))
-                    plot_data[:,0] = ori2IPF(self.Q0, [0.,0.,1.], (x2, x3))
-                    plot_data[:,1] = ori2IPF(self.Q, [0.,0.,1.], (x2, x3))
+                    plot_data[:,0] = ori2IPF(self.Q0)
+                    plot_data[:,1] = ori2IPF(self.Q)
                     dx = plot_data[0,1] - plot_data[0,0]
                     dy = plot_data[1,1] - plot_data[1,0]
                     plt.arrow(plot_data[0,0], plot_data[1,0], dx, dy, width=arrow_width, length_includes_head=True)
@@ -911,14 +1127,14 @@ class Grain:
             elif plot_what == 'start_end':
                 # plot at least start and end orientation
                 plot_data = np.zeros((2,2))
-                plot_data[:,0] = ori2IPF(self.Q0, [0.,0.,1.], (x2, x3))
-                plot_data[:,1] = ori2IPF(self.Q, [0.,0.,1.], (x2, x3))
+                plot_data[:,0] = ori2IPF(self.Q0)
+                plot_data[:,1] = ori2IPF(self.Q)
                 dx = plot_data[0,1] - plot_data[0,0]
                 dy = plot_data[1,1] - plot_data[1,0]
                 plt.arrow(plot_data[0,0], plot_data[1,0], dx, dy, width=arrow_width, length_includes_head=True)
             elif plot_what == 'end':
                 # typical case when plotting whole polycrystal
-                xcoord, ycoord = ori2IPF(self.Q, [0.,0.,1.], (x2, x3))
+                xcoord, ycoord = ori2IPF(self.Q)
                 plt.plot(xcoord, ycoord, color=color, marker=marker, markersize=markersize, alpha=1)
         
         plt.gca().set_aspect('equal', adjustable='box')
@@ -926,186 +1142,13 @@ class Grain:
     
     
     def yield_locus(self, number_of_points=None, plot_axes=None, exponent=20.):
-
-        def funcYL(k, Sdir, Sabs, Ptmp, n, crss):
-            S = k*Sdir + Sabs
-            xi = np.ones(24)
-            tmp = np.zeros(24)
-            for i in range(24):
-                tmp[i] = max(0., np.tensordot(S, Ptmp[:,:,i], axes=2)/crss[i])
-            maxtmp = np.max(tmp)
-            tmp /= maxtmp
-            y = np.sum(xi*tmp**n)
-            y = maxtmp*y**(1./n) - 1.
-            return y
-
-        Pglob = np.zeros((3,3,24))
-        for i in range(24):
-            Pglob[:,:,i] = self.Q.T @ crystal_properties.P3d[:,:,i] @ self.Q
-
-        normal_components = [(0,0),(1,1),(2,2)]
-        shear_components  = [(1,2),(0,2),(0,1)]
-
-        xij = [int(x)-1 for x in plot_axes[0]]
-        xij.sort()
-        xij = tuple(xij)
-        yij = [int(x)-1 for x in plot_axes[1]]
-        yij.sort()
-        yij = tuple(yij)
-        xi, xj = xij
-        yi, yj = yij
-        if len(plot_axes) == 4:
-            zij = [int(x)-1 for x in plot_axes[2]]
-            zij.sort()
-            zij = tuple(zij)
-            zi, zj = zij
-            if zij in [xij, yij]:
-                sys.exit('Out-of-plane stress component must differ.')
-            elif zij not in normal_components + shear_components:
-                sys.exit('Out-of-plane stress component is NA.')
-            s0_list = plot_axes[3]
-        else:
-            zij = None
-            s0_list = [0.]
-
-        wProg = ipywidgets.IntProgress(min=0, max=number_of_points*len(s0_list), description='Running:',
-        bar_style='', # 'success', 'info', 'warning', 'danger' or ''
-        orientation='horizontal')
-        display(wProg)    
-
-        angles = np.linspace(0, 2.*np.pi, number_of_points)
-        YL = np.zeros((3,3,number_of_points*len(s0_list)))
-        non_converg_stress = 0
-
-        for s0i, s0 in enumerate(s0_list):
-            for ind, ang in enumerate(angles):
-                wProg.value += 1
-#                 print('')
-#                 print('{}: angle {}'.format(ind, np.rad2deg(ang)))
-#                 print('')
-                Sdir = np.zeros((3,3))
-                Sabs = np.zeros((3,3))
-                ind_Sdir = np.full((3, 3), False, dtype=bool)
-                ind_Sabs = np.full((3, 3), True, dtype=bool)
-
-                if xij in shear_components: # xij is a shear component
-                    if yij in shear_components: # both are shear stress components
-                        Sdir[xi, xj], Sdir[xj, xi] = np.cos(ang), np.cos(ang)
-                        Sdir[yi, yj], Sdir[yj, yi] = np.sin(ang), np.sin(ang)
-                        ind_Sdir[xi, xj], ind_Sdir[xj, xi] = True, True
-                        ind_Sdir[yi, yj], ind_Sdir[yj, yi] = True, True
-                        ind_Sabs[xi, xj], ind_Sabs[xj, xi] = False, False
-                        ind_Sabs[yi, yj], ind_Sabs[yj, yi] = False, False
-                        if zij in normal_components:
-                            Sabs[zi,zj] = 2./3.*s0
-                            rest_normal = [normal for normal in normal_components if normal != zij]
-                            for rn in rest_normal:
-                                Sabs[rn[0], rn[1]] = -1./3.*s0
-                        elif zij in shear_components:
-                            Sabs[zi,zj] = s0
-                            Sabs[zj,zi] = s0
-                        elif zij is not None:
-                            sys.exit('Yield surface plotting problem...')
-
-                    else: # yij is a normal component
-                        Sdir[xi, xj] = np.cos(ang)
-                        Sdir[xj, xi] = np.cos(ang)
-                        Sdir[yi, yj] = 2./3.*np.sin(ang)
-                        ind_Sdir[xi, xj], ind_Sdir[xj, xi] = True, True
-                        ind_Sdir[yi, yj] = True
-                        ind_Sabs[xi, xj], ind_Sabs[xj, xi] = False, False
-                        ind_Sdir[yi, yj] = False
-                        rest_normal = [normal for normal in normal_components if normal != yij]
-                        for rn in rest_normal:
-                            Sdir[rn[0], rn[1]] = -1./3.*np.sin(ang)
-                            ind_Sdir[rn[0], rn[1]] = True
-                            ind_Sabs[rn[0], rn[1]] = False
-                        if zij in normal_components:
-                            print('Out-of-plane stress component cannot be a normal component for this plot.')
-                        elif zij in shear_components:
-                            Sabs[zi, zj] = s0
-                            Sabs[zj, zi] = s0
-                        elif zij is not None:
-                            sys.exit('Yield surface plotting problem...')
-
-                else: # xij is a normal component
-                    if yij in shear_components: # yij is a shear component
-                        Sdir[yi, yj] = np.sin(ang)
-                        Sdir[yj, yi] = np.sin(ang)
-                        Sdir[xi, xj] = 2./3.*np.cos(ang)
-                        ind_Sdir[yi, yj], ind_Sdir[yj, yi] = True, True
-                        ind_Sdir[xi, xj] = True
-                        ind_Sabs[yi, yj], ind_Sabs[yj, yi] = False, False
-                        ind_Sabs[xi, xj] = False
-                        rest_normal = [normal for normal in normal_components if normal != xij]
-                        for rn in rest_normal:
-                            Sdir[rn[0], rn[1]] = -1./3.*np.cos(ang)
-                            ind_Sdir[rn[0], rn[1]] = True
-                            ind_Sabs[rn[0], rn[1]] = False
-                        if zij in normal_components:
-                            print('Out-of-plane stress component cannot be a normal component for this plot.')
-                        elif zij in shear_components:
-                            Sabs[zi, zj] = s0
-                            Sabs[zj, zi] = s0
-                        elif zij is not None:
-                            sys.exit('Yield surface plotting problem...')
-
-                    else: # both are normal stress components
-                        rest_normal = [normal for normal in normal_components if normal not in [xij, yij]]
-                        rest_normal = rest_normal[0] # extract the only tuple from the list
-                        Sdir[xi, xj] = 2./3.*np.cos(ang) - 1./3.*np.sin(ang)
-                        Sdir[yi, yj] = 2./3.*np.sin(ang) - 1./3.*np.cos(ang)
-                        Sdir[rest_normal[0], rest_normal[1]] = -1./3.*np.cos(ang) - 1./3.*np.sin(ang)
-                        ind_Sdir[0, 0], ind_Sdir[1, 1], ind_Sdir[2, 2] = True, True, True
-                        ind_Sabs[0, 0], ind_Sabs[1, 1], ind_Sabs[2, 2] = False, False, False
-                        if zij in normal_components:
-                            print('Out-of-plane stress component cannot be a normal component for this plot.')
-                        elif zij in shear_components:
-                            Sabs[zi, zj] = s0
-                            Sabs[zj, zi] = s0
-                        elif zij is not None:
-                            sys.exit('Yield surface plotting problem...')
-                            
-                # initial guess
-                if ind == 0:
-                    x0 = np.mean(self.crss)
-                elif ier == 1:
-                    x0 = x
-                else:
-                    x0 = np.mean(self.crss)
-                            
-                x, infodict, ier, mesg = scipy.optimize.fsolve(funcYL, x0=x0, args=(Sdir, Sabs, Pglob, exponent, self.crss), full_output=1, epsfcn=1e-5)
-                if ier == 1:
-                    YL[:,:,ind+number_of_points*s0i] = x*Sdir + Sabs
-                else:
-                    numiter = 0
-                    while ier != 1 and numiter < 20:
-                        x, infodict, ier, mesg = scipy.optimize.fsolve(funcYL, x0=np.mean(self.crss)*np.random.rand(), args=(Sdir, Sabs, Pglob, exponent, self.crss), full_output=1, epsfcn=1e-5)
-                        numiter += 1
-                    if ier == 1:
-                        YL[:,:,ind+number_of_points*s0i] = x*Sdir + Sabs
-                    else:
-                        print('The stress point is not well converged and will be omitted.')
-                        YL[:,:,ind+number_of_points*s0i] = np.full((3,3), np.nan)   
-                        non_converg_stress += 1
-
-                        
-        rij = normal_components.copy()
-        if xij in rij:
-            rij.remove(xij)
-        if yij in rij:
-            rij.remove(yij)
-        if len(rij) == 1:
-            rij = 2*rij
-        if len(rij) == 3:
-            rij = None
-        if rij is not None:
-            tmp = 0.5*(YL[rij[0][0],rij[0][1],:] + YL[rij[1][0],rij[1][1],:])
-            YL[0,0,:] -= tmp
-            YL[1,1,:] -= tmp
-            YL[2,2,:] -= tmp
-        
-        return YL, non_converg_stress
+        '''
+        2D yield locus of the grain for the regularised Schmid law (see schmid_yield_locus). 
+        Returns YL (3,3,number_of_points*len(s0_list)) and the number of points that did not converge.
+        '''
+        YL, non_converg_stress = schmid_yield_locus(self.Q[None], np.asarray(self.crss, dtype=float)[None], 
+                                                    number_of_points, plot_axes, exponent)
+        return YL[0], non_converg_stress[0]
 
     
     def plot_orientation_plotly(self, plot_type='IPF', crystal_structure = 'FCC_111', plot_what='trajectory'):
@@ -1115,262 +1158,18 @@ class Grain:
 
         # For Pole Figures
         if plot_type == 'PF':
-
-            if crystal_structure == 'FCC_111':
-            
-                planes111 = 1./np.sqrt(3.)*np.array([[ 1., 1., 1.],
-                                                    [-1., 1., 1.],
-                                                    [ 1.,-1., 1.],
-                                                    [-1.,-1., 1.],
-                                                    [-1.,-1.,-1.],
-                                                    [ 1.,-1.,-1.],
-                                                    [-1., 1.,-1.],
-                                                    [ 1., 1.,-1.],
-                                                    ])
-
-                planes111rot_ND = np.dot(self.Q.T, planes111.T)
-                planes111rot_RD = np.dot(self.Q.T, planes111.T)
-                planes111rot_TD = np.dot(self.Q.T, planes111.T)
-
-                proj_nr_111 = 8
-
-                # projection of axis vector to the circle plane to get stereographic projection
-                proj111_ND = np.zeros((2,proj_nr_111))
-                proj111_RD = np.zeros((2,proj_nr_111))
-                proj111_TD = np.zeros((2,proj_nr_111))
-
-                # for ND as normal in PF
-                for i in range(proj_nr_111):
-                    # flip direction if pointing south (negative z)
-                    planes111rot_ND[:,i] = np.sign(planes111rot_ND[2,i])*planes111rot_ND[:,i]
-                    proj111_ND[0,i] = planes111rot_ND[1,i]/(planes111rot_ND[2,i]+1)      
-                    proj111_ND[1,i] = -planes111rot_ND[0,i]/(planes111rot_ND[2,i]+1)
-                x_ND = proj111_ND[0,:]
-                y_ND = proj111_ND[1,:]
-
-
-                # for RD as normal in PF
-                for i in range(proj_nr_111):
-                    # flip direction if pointing south (negative y)
-                    planes111rot_RD[:,i] = np.sign(planes111rot_RD[0,i])*planes111rot_RD[:,i]
-                    proj111_RD[0,i] = planes111rot_RD[1,i]/(planes111rot_RD[0,i]+1)      
-                    proj111_RD[1,i] = planes111rot_RD[2,i]/(planes111rot_RD[0,i]+1)
-                x_RD = proj111_RD[0,:]
-                y_RD = proj111_RD[1,:]
-
-                # for TD as normal in PF
-                for i in range(proj_nr_111):
-                    # flip direction if pointing south (negative x)
-                    planes111rot_TD[:,i] = np.sign(planes111rot_TD[1,i])*planes111rot_TD[:,i]
-                    proj111_TD[0,i] = -planes111rot_TD[2,i]/(planes111rot_TD[1,i]+1)      
-                    proj111_TD[1,i] = -planes111rot_TD[0,i]/(planes111rot_TD[1,i]+1)
-                x_TD = proj111_TD[0,:]
-                y_TD = proj111_TD[1,:]
-
-                return x_ND, x_RD, x_TD, y_ND, y_RD, y_TD
-
-            elif crystal_structure == 'FCC_110':
-
-                planes110 = 1./np.sqrt(2.)*np.array([[ 1., -1., 0.],
-                                                     [ 1., 1., 0.],
-                                                     [ -1., 0., 1.],
-                                                     [ 1., 0., 1.],
-                                                     [ 0., 1., -1.],
-                                                     [ 0., 1., 1.],
-                                                     [ -1., 1., 0.],
-                                                     [ -1.,-1., 0.],
-                                                     [ 1., 0., -1.],
-                                                     [ -1., 0., -1.],
-                                                     [ 0., -1., 1.],
-                                                     [ 0., -1., -1.],
-                                                     ])
-
-                planes110rot_ND = np.dot(self.Q.T, planes110.T)
-                planes110rot_RD = np.dot(self.Q.T, planes110.T)
-                planes110rot_TD = np.dot(self.Q.T, planes110.T)
-
-                proj_nr_110 = 12
-
-                # projection of axis vector to the circle plane to get stereographic projection
-                proj110_ND = np.zeros((2,proj_nr_110))
-                proj110_RD = np.zeros((2,proj_nr_110))
-                proj110_TD = np.zeros((2,proj_nr_110))
-
-                # for ND as normal in PF
-
-                for i in range(proj_nr_110):
-                    # flip direction if pointing south (negative z)
-                    if np.sign(planes110rot_ND[2,i]) != 0:
-                        planes110rot_ND[:,i] = np.sign(planes110rot_ND[2,i])*planes110rot_ND[:,i]
-                    proj110_ND[0,i] = planes110rot_ND[1,i]/(planes110rot_ND[2,i]+1)      
-                    proj110_ND[1,i] = -planes110rot_ND[0,i]/(planes110rot_ND[2,i]+1)
-                x_ND = proj110_ND[0,:]
-                y_ND = proj110_ND[1,:]
-
-                # for RD as normal in PF
-                for i in range(proj_nr_110):
-                    # flip direction if pointing south (negative y)
-                    if np.sign(planes110rot_RD[0,i]) != 0:
-                        planes110rot_RD[:,i] = np.sign(planes110rot_RD[0,i])*planes110rot_RD[:,i]
-                    proj110_RD[0,i] = planes110rot_RD[1,i]/(planes110rot_RD[0,i]+1)      
-                    proj110_RD[1,i] = planes110rot_RD[2,i]/(planes110rot_RD[0,i]+1)
-                x_RD = proj110_RD[0,:]
-                y_RD = proj110_RD[1,:]
-
-                # for TD as normal in PF
-                for i in range(proj_nr_110):
-                    # flip direction if pointing south (negative x)
-                    if np.sign(planes110rot_TD[1,i]) != 0:
-                        planes110rot_TD[:,i] = np.sign(planes110rot_TD[1,i])*planes110rot_TD[:,i]
-                    proj110_TD[0,i] = -planes110rot_TD[2,i]/(planes110rot_TD[1,i]+1)      
-                    proj110_TD[1,i] = -planes110rot_TD[0,i]/(planes110rot_TD[1,i]+1)
-
-                x_TD = proj110_TD[0,:]
-                y_TD = proj110_TD[1,:]
-
-                return x_ND, x_RD, x_TD, y_ND, y_RD, y_TD
-
-            elif crystal_structure == 'FCC_100':
-
-                planes100 = 1./np.sqrt(1.)*np.array([[ 1., 0., 0.],
-                                                     [ 0., 1., 0.],
-                                                     [ 0., 0., 1.],
-                                                     [-1., 0., 0.],
-                                                     [ 0.,-1., 0.],
-                                                     [ 0., 0.,-1.],
-                                                     ])
-
-                planes100rot_ND = np.dot(self.Q.T, planes100.T)
-                planes100rot_RD = np.dot(self.Q.T, planes100.T)
-                planes100rot_TD = np.dot(self.Q.T, planes100.T)
-
-                proj_nr_100 = 6
-
-                # projection of axis vector to the circle plane to get stereographic projection
-                proj100_ND = np.zeros((2,proj_nr_100))
-                proj100_RD = np.zeros((2,proj_nr_100))
-                proj100_TD = np.zeros((2,proj_nr_100))
-
-                # for ND as normal in PF
-                for i in range(proj_nr_100):
-                    # flip direction if pointing south (negative z)
-                    if np.sign(planes100rot_ND[2,i]) != 0:
-                        planes100rot_ND[:,i] = np.sign(planes100rot_ND[2,i])*planes100rot_ND[:,i]
-                    proj100_ND[0,i] = planes100rot_ND[1,i]/(planes100rot_ND[2,i]+1)      
-                    proj100_ND[1,i] = -planes100rot_ND[0,i]/(planes100rot_ND[2,i]+1)
-                x_ND = proj100_ND[0,:]
-                y_ND = proj100_ND[1,:]
-
-                # for RD as normal in PF
-                for i in range(proj_nr_100):
-                    # flip direction if pointing south (negative y)
-                    if np.sign(planes100rot_RD[0,i]) != 0:
-                        planes100rot_RD[:,i] = np.sign(planes100rot_RD[0,i])*planes100rot_RD[:,i]
-                    proj100_RD[0,i] = planes100rot_RD[1,i]/(planes100rot_RD[0,i]+1)      
-                    proj100_RD[1,i] = planes100rot_RD[2,i]/(planes100rot_RD[0,i]+1)
-                x_RD = proj100_RD[0,:]
-                y_RD = proj100_RD[1,:]
-
-                # for TD as normal in PF
-                for i in range(proj_nr_100):
-                    # flip direction if pointing south (negative x)
-                    if np.sign(planes100rot_TD[1,i]) != 0:
-                        planes100rot_TD[:,i] = np.sign(planes100rot_TD[1,i])*planes100rot_TD[:,i]
-                    proj100_TD[0,i] = -planes100rot_TD[2,i]/(planes100rot_TD[1,i]+1)      
-                    proj100_TD[1,i] = -planes100rot_TD[0,i]/(planes100rot_TD[1,i]+1)
-
-                x_TD = proj100_TD[0,:]
-                y_TD = proj100_TD[1,:]
-
-                return x_ND, x_RD, x_TD, y_ND, y_RD, y_TD
-
-            elif crystal_structure == 'FCC_112':
-
-                planes112 = 1./np.sqrt(6.)*np.array([[ 1., 1., 2.],
-                                                    [ 1.,-1., 2.],
-                                                    [-1.,-1., 2.],
-                                                    [-1., 1., 2.],
-                                                    [-2.,-1., 1.],
-                                                    [-2., 1., 1.],
-                                                    [-1.,-2., 1.],
-                                                    [-1., 2., 1.],
-                                                    [ 1., 2., 1.],
-                                                    [ 2., 1., 1.],
-                                                    [ 2.,-1., 1.],
-                                                    [ 1.,-2., 1.],
-                                                    [-1.,-1.,-2.],
-                                                    [-1., 1.,-2.],
-                                                    [ 1., 1.,-2.],
-                                                    [ 1.,-1.,-2.],
-                                                    [ 2., 1.,-1.],
-                                                    [ 2.,-1.,-1.],
-                                                    [ 1., 2.,-1.],
-                                                    [ 1.,-2.,-1.],
-                                                    [-1.,-2.,-1.],
-                                                    [-2.,-1.,-1.],
-                                                    [-2., 1.,-1.],
-                                                    [-1., 2.,-1.],
-                                                     ])
-
-                planes112rot_ND = np.dot(self.Q.T, planes112.T)
-                planes112rot_RD = np.dot(self.Q.T, planes112.T)
-                planes112rot_TD = np.dot(self.Q.T, planes112.T)
-
-                proj_nr_112 = 24
-
-                # projection of axis vector to the circle plane to get stereographic projection
-                proj112_ND = np.zeros((2,proj_nr_112))
-                proj112_RD = np.zeros((2,proj_nr_112))
-                proj112_TD = np.zeros((2,proj_nr_112))
-
-                # for ND as normal in PF
-                for i in range(proj_nr_112):
-                    # flip direction if pointing south (negative z)
-                    if np.sign(planes112rot_ND[2,i]) != 0:
-                        planes112rot_ND[:,i] = np.sign(planes112rot_ND[2,i])*planes112rot_ND[:,i]
-                    proj112_ND[0,i] = planes112rot_ND[1,i]/(planes112rot_ND[2,i]+1)      
-                    proj112_ND[1,i] = -planes112rot_ND[0,i]/(planes112rot_ND[2,i]+1)
-                x_ND = proj112_ND[0,:]
-                y_ND = proj112_ND[1,:]
-
-                # for RD as normal in PF
-                for i in range(proj_nr_112):
-                    # flip direction if pointing south (negative y)
-                    if np.sign(planes112rot_RD[0,i]) != 0:
-                        planes112rot_RD[:,i] = np.sign(planes112rot_RD[0,i])*planes112rot_RD[:,i]
-                    proj112_RD[0,i] = planes112rot_RD[1,i]/(planes112rot_RD[0,i]+1)      
-                    proj112_RD[1,i] = planes112rot_RD[2,i]/(planes112rot_RD[0,i]+1)
-                x_RD = proj112_RD[0,:]
-                y_RD = proj112_RD[1,:]
-
-                # for TD as normal in PF
-                for i in range(proj_nr_112):
-                    # flip direction if pointing south (negative x)
-                    if np.sign(planes112rot_TD[1,i]) != 0:
-                        planes112rot_TD[:,i] = np.sign(planes112rot_TD[1,i])*planes112rot_TD[:,i]
-                    proj112_TD[0,i] = -planes112rot_TD[2,i]/(planes112rot_TD[1,i]+1)      
-                    proj112_TD[1,i] = -planes112rot_TD[0,i]/(planes112rot_TD[1,i]+1)
-
-                x_TD = proj112_TD[0,:]
-                y_TD = proj112_TD[1,:]
-
-                return x_ND, x_RD, x_TD, y_ND, y_RD, y_TD
+            x, y = pole_figure_projection(self.Q, pole_figure_hkl(crystal_structure))
+            return x[0], x[1], x[2], y[0], y[1], y[2]
 
         # For Inverse Pole Figures                                        
         elif plot_type == 'IPF':
 
-            x3 = 1./np.sqrt(3.)/(1./np.sqrt(3.)+1.)
-            x2 = 1./np.sqrt(2.)/(1./np.sqrt(2.)+1.)
-
             if plot_what == 'trajectory':
                 try:
                     shp = self.results.euler_angles.shape
                     if shp[1] > 1:
                         noresults = False
-                        plot_data = np.zeros((2,shp[1]))
-                        for i in range(shp[1]):
-                            Q = ang2matrix(self.results.euler_angles[:,i])
-                            plot_data[:,i] = ori2IPF(Q, [0.,0.,1.], (x2, x3))
+                        plot_data = np.array(ori2IPF(ang2matrix(self.results.euler_angles.T)))
                         return plot_data
                     else:
                         noresults = True
@@ -1380,22 +1179,746 @@ class Grain:
                 if noresults:
                     # plot at least start and end orientation
                     plot_data = np.zeros((2,1))
-                    plot_data[:,0] = ori2IPF(self.Q0, [0.,0.,1.], (x2, x3))
+                    plot_data[:,0] = ori2IPF(self.Q0)
                     return plot_data
 
             elif plot_what == 'start':
                 # plot at least start and end orientation
                 plot_data = np.zeros((2,1))
-                plot_data[:,0] = ori2IPF(self.Q0, [0.,0.,1.], (x2, x3))
+                plot_data[:,0] = ori2IPF(self.Q0)
                 return plot_data
          
+# definition of the GrainArray class
+class GrainArray:
+    '''
+    Grains of a polycrystal stored as (N,...) numpy arrays instead of N Grain objects. Indexing and 
+    iterating give lightweight GrainView objects whose state (grain.Q, grain.crss, grain.hvars, ...) 
+    and results (grain.results) read and write rows of these arrays, so that the code written for 
+    Grain objects keeps working while large polycrystals (e.g. from EBSD) need no per-grain objects.
+    '''
+    # state variables kept in arrays and the shape of one row
+    state_vars = {'init_euler_angles'    : (3,),
+                  'Q0'                   : (3,3),
+                  'Q'                    : (3,3),
+                  'R'                    : (3,3),
+                  'stress_loc'           : (3,3),
+                  'stress_glob'          : (3,3),
+                  'sliprates'            : (24,),
+                  'relaxation_sliprates' : (2,),
+                  'total_sliprate'       : (),
+                  'total_slip'           : (),
+                  'crss'                 : (24,),
+                  'hvars'                : None}
+    
+    def __init__(self, euler_angles, hardening_law=None):
+        # the same defaults of the hardening law as for a Grain
+        if hardening_law is None:
+            hardening_law = {'model':'RIGID_PLASTIC',    
+                             'hardening_parameters':[10.],
+                             'relax_penalties': [0.,0.,0.]}
+        elif not 'hardening_parameters' in hardening_law.keys():
+            hardening_law['hardening_parameters'] = [10.]
+        elif not 'relax_penalties' in hardening_law.keys():
+            hardening_law['relax_penalties'] = [0., 0., 0.]
+        self.hardening_law   = hardening_law
+        self.relax_penalties = hardening_law['relax_penalties']
+        
+        euler_angles = np.reshape(np.asarray(euler_angles, dtype=float), (-1,3))
+        N = len(euler_angles)
+        hparams = self.hardening_law['hardening_parameters']
+        for var, shape in self.state_vars.items():
+            if var == 'hvars':
+                shape = (1,) if self.hardening_law['model'] == 'RIGID_PLASTIC' else (97,)
+            setattr(self, var, np.zeros((N,)+shape))
+        self.init_euler_angles[...] = euler_angles
+        self.Q0[...] = ang2matrix(euler_angles)
+        self.Q[...]  = self.Q0
+        self.R[...]  = np.eye(3)
+        self.hvars[:,0] = hparams[0]
+        if self.hardening_law['model'] == 'BAUSCHINGER':
+            self.hvars[:,73:] = hparams[0]     # initially crss equals tau0
+        self.crss[...] = hparams[0]
+        # indices of the active slip systems, unused entries are -1
+        self.activesID = np.full((N,24), -1, dtype=np.int64)
+        # grain results by name as (N,...) arrays (object arrays for lists)
+        self.results = PolycrystalResults()
+    
+    def __len__(self):
+        return len(self.Q)
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [GrainView(self, j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('grain index out of range')
+        return GrainView(self, i)
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield GrainView(self, i)
+    
+    def arrays(self):
+        '''Dict of the state arrays of the grains, including the active slip systems.'''
+        arrays = {var: getattr(self, var) for var in self.state_vars}
+        arrays['activesID'] = self.activesID
+        return arrays
+    
+    def init_results_output(self, result_vars, sink=None):
+        '''Allocate the grain results of all grains at once, with "sink" as memory-mapped files in that directory.'''
+        self.results.clear()
+        self.results.update(init_grain_results(len(self), result_vars, self.hardening_law, sink))
+    
+    def set_result(self, name, i, value):
+        '''Set the result "name" of grain i, the (N,...) array is allocated at the first use.'''
+        res = self.results.get(name)
+        if isinstance(res, dict) and isinstance(value, dict):
+            for key, val in value.items():
+                res[key][i] = val
+            return
+        if isinstance(value, np.ndarray) or np.isscalar(value):
+            value = np.asarray(value)
+            if res is None or res.dtype == object or res.shape[1:] != value.shape:
+                res = self.results[name] = np.zeros((len(self),)+value.shape)
+        elif res is None or isinstance(res, dict) or res.dtype != object:
+            res = self.results[name] = np.empty(len(self), dtype=object)
+        res[i] = value
+    
+    def yield_locus(self, number_of_points=None, plot_axes=None, exponent=20., chunk=1000):
+        '''
+        2D yield loci of all grains for the regularised Schmid law (see schmid_yield_locus), evaluated for 
+        "chunk" grains at a time. Returns YL (N,3,3,number_of_points*len(s0_list)) and the numbers of points 
+        that did not converge (N,).
+        '''
+        YL = np.zeros((len(self), 3, 3, number_of_points*(len(plot_axes[3]) if len(plot_axes) == 4 else 1)))
+        non_converg_stress = np.zeros(len(self), dtype=int)
+        for start in range(0, len(self), chunk):
+            stop = min(start+chunk, len(self))
+            YL[start:stop], non_converg_stress[start:stop] = schmid_yield_locus(self.Q[start:stop], self.crss[start:stop], 
+                                                                                number_of_points, plot_axes, exponent)
+        return YL, non_converg_stress
+    
+    def ipf_coordinates(self, plot_what='trajectory', direction=[0.,0.,1.]):
+        '''
+        Coordinates (x, y) in the inverse pole figure of "direction" of all grains, projected at once. These are 
+        (N,Nout) arrays along the stored "euler_angles" results for plot_what='trajectory' and (N,1) arrays of 
+        the initial orientations for 'start' or if no trajectories are stored.
+        '''
+        angles = self.results.get('euler_angles')
+        if plot_what == 'trajectory' and isinstance(angles, np.ndarray) and angles.ndim == 3 and angles.shape[2] > 1:
+            Q = ang2matrix(angles.transpose(0,2,1))
+        else:
+            Q = self.Q0[:,None]
+        return ori2IPF(Q, direction)
+
+# definition of the PolycrystalResults class
+class PolycrystalResults(dict):
+    '''
+    Grain results of a polycrystal by name, each one a single (grains, components, outputs) array 
+    ("statevar" is a dict of such arrays). Also accessible as attributes, e.g. results.stress_loc. 
+    The results of the single grains (grain.results) are views into these arrays.
+    '''
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+    
+    @classmethod
+    def open(cls, sink):
+        '''Results written to the directory "sink" during a run (see Polycrystal.load), opened lazily as memory maps.'''
+        results = cls()
+        for file in sorted(os.listdir(sink)):
+            name, ext = os.path.splitext(file)
+            if ext != '.npy':
+                continue
+            # the files are stored output step first
+            res = np.moveaxis(np.load(os.path.join(sink, file), mmap_mode='r'), 0, -1)
+            if name.startswith('statevar_'):
+                results.setdefault('statevar', {})[name[len('statevar_'):]] = res
+            else:
+                results[name] = res
+        return results
+    
+    def store(self, sink):
+        '''Write all results to memory-mapped files in the directory "sink" and keep those instead of the in-memory arrays.'''
+        for name, res in list(self.items()):
+            if isinstance(res, dict):
+                for key, val in res.items():
+                    res[key] = result_array('statevar_'+key, val.shape, sink)
+                    res[key][...] = val
+            elif res.dtype != object:
+                self[name] = result_array(name, res.shape, sink, res.dtype)
+                self[name][...] = res
+    
+    def flush(self):
+        '''Write the memory-mapped results to their files.'''
+        for res in self.values():
+            for val in (res.values() if isinstance(res, dict) else [res]):
+                if isinstance(val, np.memmap):
+                    val.flush()
+    
+    @classmethod
+    def from_fortran(cls, fort, suffixes, result_vars, hardening_law):
+        '''
+        Grain results read back from cpfort (see CpfortSession.call). The cpfort outputs are 
+        (components, grains, outputs) arrays for each grain of a cluster, given by "suffixes" 
+        (('g1',) for Taylor, ('g1','g2') for Alamel). Those are interleaved as grains g1, g2 of 
+        cluster 0, g1, g2 of cluster 1, ... For Taylor the arrays are transposed views of the 
+        read back buffers, otherwise the arrays are filled by one copy.
+        '''
+        def grains_first(get):
+            parts = [np.moveaxis(get(sfx), -2, 0) for sfx in suffixes]
+            if len(parts) == 1:
+                return parts[0]
+            res = np.empty((len(parts)*len(parts[0]),)+parts[0].shape[1:], dtype=parts[0].dtype)
+            for k, part in enumerate(parts):
+                res[k::len(parts)] = part
+            return res
+        
+        def voigt_dev(get):
+            # (5,grains,outputs) -> (grains,3,3,outputs)
+            def get_matrix(sfx):
+                x = get(sfx)
+                return voigt2m_dev(x.reshape(5,-1)).reshape((3,3)+x.shape[1:]).transpose(2,0,1,3)
+            parts = [get_matrix(sfx) for sfx in suffixes]
+            if len(parts) == 1:
+                return parts[0]
+            res = np.empty((len(parts)*len(parts[0]),)+parts[0].shape[1:])
+            for k, part in enumerate(parts):
+                res[k::len(parts)] = part
+            return res
+        
+        out = lambda var: (lambda sfx: getattr(fort, 'out_'+var+sfx))
+        results = cls()
+        grain_results = result_vars['grain_results']
+        if 'stress_loc' in grain_results:
+            results['stress_loc'] = voigt_dev(out('stress_loc'))
+        if 'stress_glob' in grain_results:
+            results['stress_glob'] = voigt_dev(out('stress_glob'))
+        if 'euler_angles' in grain_results:
+            results['euler_angles'] = grains_first(out('euler_angles'))
+        if 'crss' in grain_results:
+            results['crss'] = grains_first(out('crss'))
+        if 'sliprates' in grain_results:
+            results['sliprates'] = grains_first(out('sliprates'))
+        if 'total_sliprate' in grain_results:
+            results['total_sliprate'] = grains_first(lambda sfx: np.sum(out('sliprates')(sfx), axis=0))
+        if 'activesID' in grain_results:
+            results['activesID'] = grains_first(out('activesid'))
+        if 'num_actives' in grain_results:
+            results['num_actives'] = grains_first(out('num_actives'))
+        if 'statevar' in grain_results and hardening_law['model'] == 'BAUSCHINGER':
+            # the state variables are saved for the first grain of the clusters only, both grains get them
+            statevar = grains_first(lambda sfx: fort.out_statevarg1)
+            results['statevar'] = {'tauI': statevar[:,0],
+                                   'tauL': statevar[:,1:25],
+                                   'tauP': statevar[:,25:49],
+                                   'tauR': statevar[:,49:73]}
+        if 'relaxation' in grain_results and hasattr(fort, 'out_relaxsliprates'):
+            # the relaxation slip rates are saved once per cluster, both grains get them
+            results['relaxation_sliprates'] = grains_first(lambda sfx: fort.out_relaxsliprates)
+        return results
+
+def result_array(name, shape, sink=None, dtype=float):
+    '''
+    Zero array for the result "name" whose last axis is the output step. With "sink" (a directory) it is 
+    a memory-mapped file <sink>/<name>.npy, stored output step first so that the results of one output 
+    step are one contiguous block of the file, and pages of finished output steps can leave the memory.
+    '''
+    if sink is None:
+        return np.zeros(shape, dtype=dtype)
+    os.makedirs(sink, exist_ok=True)
+    res = np.lib.format.open_memmap(os.path.join(sink, name+'.npy'), mode='w+', dtype=dtype, 
+                                    shape=(shape[-1],)+tuple(shape[:-1]))
+    return np.moveaxis(res, 0, -1)
+
+def init_grain_results(N, result_vars, hardening_law, sink=None):
+    '''PolycrystalResults for N grains with the arrays of all the required grain results.'''
+    Nout = result_vars['number_of_outputs']
+    shapes = {'stress_loc'     : (N,3,3,Nout),
+              'stress_glob'    : (N,3,3,Nout),
+              'euler_angles'   : (N,3,Nout),
+              'crss'           : (N,24,Nout),
+              'sliprates'      : (N,24,Nout),
+              'total_sliprate' : (N,Nout),
+              'activesID'      : (N,24,Nout),
+              'num_actives'    : (N,Nout),
+              'relaxation'     : (N,2,Nout)}
+    results = PolycrystalResults()
+    for var in result_vars['grain_results']:
+        if var in shapes:
+            name = 'relaxation_sliprates' if var == 'relaxation' else var
+            results[name] = result_array(name, shapes[var], sink)
+        elif var in ('weights', 'stress_corners', 'slip_basis_solutions'):
+            # lists growing during the run are kept in memory
+            results[var] = np.empty(N, dtype=object)
+            for i in range(N):
+                results[var][i] = []
+        elif var == 'statevar' and hardening_law['model'] == 'BAUSCHINGER':
+            results['statevar'] = {'tauI' : result_array('statevar_tauI', (N,Nout), sink),
+                                   'tauL' : result_array('statevar_tauL', (N,24,Nout), sink),
+                                   'tauP' : result_array('statevar_tauP', (N,24,Nout), sink),
+                                   'tauR' : result_array('statevar_tauR', (N,24,Nout), sink)}
+    return results
+
+# definition of the GrainView class
+class GrainView(Grain):
+    '''Grain number "index" of a GrainArray, all its state variables are rows of the arrays of the GrainArray.'''
+    __slots__ = ('_array', '_index')
+    # the transient variables of a single crystal solution are plain attributes
+    Dp = Dp_vec = w = S_corners = slip_basis_solutions = None
+    
+    def __init__(self, array, index):
+        self._array = array
+        self._index = index
+    
+    @property
+    def hardening_law(self):
+        return self._array.hardening_law
+    
+    @property
+    def relax_penalties(self):
+        return self._array.relax_penalties
+    
+    @property
+    def activesID(self):
+        ids = self._array.activesID[self._index]
+        return ids[ids >= 0]
+    
+    @activesID.setter
+    def activesID(self, value):
+        ids = self._array.activesID[self._index]
+        ids[:] = -1
+        if value is not None:
+            ids[:len(value)] = value
+    
+    @property
+    def results(self):
+        return GrainResults(self._array, self._index)
+
+def _grain_array_property(var):
+    def getter(self):
+        return getattr(self._array, var)[self._index]
+    def setter(self, value):
+        getattr(self._array, var)[self._index] = value
+    return property(getter, setter)
+
+for _var in GrainArray.state_vars:
+    setattr(GrainView, _var, _grain_array_property(_var))
+
+# definition of the GrainResults class
+class GrainResults:
+    '''Results of grain number "index" of a GrainArray, the attributes are rows of the result arrays of the GrainArray.'''
+    __slots__ = ('_array', '_index')
+    
+    def __init__(self, array, index):
+        object.__setattr__(self, '_array', array)
+        object.__setattr__(self, '_index', index)
+    
+    def __getattr__(self, name):
+        if name in self._array.results:
+            res = self._array.results[name]
+            if isinstance(res, dict):
+                return {key: val[self._index] for key, val in res.items()}
+            return res[self._index]
+        elif name in Results().__dict__:
+            return None
+        raise AttributeError(name)
+    
+    def __setattr__(self, name, value):
+        self._array.set_result(name, self._index, value)
+
+
+# definition of the GrainStates class
+class GrainStates:
+    '''
+    Struct-of-arrays state of N grains used by the batched Taylor engine (Polycrystal.TaylorFC_batched). 
+    Orientations are stored as one (N,3,3) array, critical resolved shear stresses and slip rates 
+    as (N,24) arrays and the hardening variables as (N,nhvars) array. With orientation_store='quaternion' 
+    the orientations are also kept as (N,4) unit quaternions "q", which are updated and renormalised 
+    every step, the matrices Q are derived from them.
+    '''
+    # arrays describing the state of the grains, they are shared between processes in parallel runs
+    state_vars = ('Q0', 'Q', 'R', 'crss', 'hvars', 'total_slip', 'total_sliprate', 'sliprates', 'stress_loc', 'stress_glob')
+    
+    def __init__(self, grains, hardening_law, orientation_store='matrix'):
+        if orientation_store == 'quaternion':
+            self.state_vars = GrainStates.state_vars + ('q',)
+        elif orientation_store != 'matrix':
+            sys.exit('Unknown orientation_store option: {}'.format(orientation_store))
+        if isinstance(grains, GrainArray):
+            arrays = {var: getattr(grains, var).copy() for var in GrainStates.state_vars}
+            arrays['total_sliprate'] = np.zeros(len(grains))
+            arrays['sliprates']      = np.zeros((len(grains),24))
+            arrays['stress_loc']     = np.zeros((len(grains),3,3))
+            arrays['stress_glob']    = np.zeros((len(grains),3,3))
+            self.hardening_law = hardening_law
+            self.Ngrains       = len(grains)
+            self.results       = {}
+            if 'q' in self.state_vars:
+                arrays['q'] = matrix2quat(arrays['Q'])
+            self.assign(arrays)
+            return
+        self.hardening_law  = hardening_law
+        self.Ngrains        = len(grains)
+        self.Q0             = np.array([g.Q0 for g in grains])
+        self.Q              = np.array([g.Q for g in grains])
+        self.R              = np.array([g.R for g in grains])
+        self.crss           = np.array([g.crss for g in grains], dtype=float)
+        self.hvars          = np.array([np.atleast_1d(g.hvars) for g in grains], dtype=float)
+        self.total_slip     = np.array([g.total_slip for g in grains], dtype=float)
+        self.total_sliprate = np.zeros(self.Ngrains)
+        self.sliprates      = np.zeros((self.Ngrains,24))
+        self.stress_loc     = np.zeros((self.Ngrains,3,3))
+        self.stress_glob    = np.zeros((self.Ngrains,3,3))
+        self.results        = {}
+        if 'q' in self.state_vars:
+            self.q          = matrix2quat(self.Q)
+        
+    @classmethod
+    def from_arrays(cls, arrays, hardening_law):
+        '''Create the grain states directly from a dict of (N,...) arrays named as in "state_vars".'''
+        states = cls.__new__(cls)
+        states.hardening_law = hardening_law
+        states.Ngrains       = len(arrays['Q'])
+        states.results       = {}
+        if 'q' in arrays:
+            states.state_vars = cls.state_vars + ('q',)
+        states.assign(arrays)
+        return states
+    
+    def arrays(self):
+        '''Dict of the state arrays named as in "state_vars".'''
+        return {var: getattr(self, var) for var in self.state_vars}
+    
+    def assign(self, arrays):
+        '''Rebind the state variables to the given arrays (e.g. to shared memory).'''
+        for var in self.state_vars:
+            setattr(self, var, arrays[var])
+    
+    def store(self, arrays):
+        '''Copy the current state into the given arrays (e.g. to shared memory).'''
+        for var in self.state_vars:
+            arrays[var][...] = getattr(self, var)
+    
+    def to_grains(self, grains):
+        '''Hand over the current state and the results (as views) to the Grain objects.'''
+        if isinstance(grains, GrainArray):
+            for var in GrainStates.state_vars:
+                getattr(grains, var)[...] = getattr(self, var)
+            grains.activesID[...] = -1
+            for i in range(self.Ngrains):
+                ids = np.where(self.sliprates[i] > Dtol)[0]
+                grains.activesID[i,:len(ids)] = ids
+            grains.results.update(self.results)
+            return
+        for i, g in enumerate(grains):
+            g.Q              = self.Q[i]
+            g.R              = self.R[i]
+            g.crss           = self.crss[i]
+            g.total_slip     = self.total_slip[i]
+            g.total_sliprate = self.total_sliprate[i]
+            g.sliprates      = self.sliprates[i]
+            g.activesID      = np.where(self.sliprates[i] > Dtol)[0]
+            g.stress_loc     = self.stress_loc[i]
+            g.stress_glob    = self.stress_glob[i]
+            if self.hardening_law['model'] == 'BAUSCHINGER':
+                g.hvars = self.hvars[i]
+            for var, res in self.results.items():
+                if var == 'statevar':
+                    g.results.statevar = {key: val[i] for key, val in res.items()}
+                else:
+                    setattr(g.results, var, res[i])
+    
+    def hardening(self, dt):
+        '''Batched version of Grain.hardening for all grains at once.'''
+        if self.hardening_law['model'] == 'BAUSCHINGER':
+            tau0, th2, th3, th4, gm2, gm3, qP, qL, qR, qLR, gmP, gmL, gmR = self.hardening_law['hardening_parameters']
+            tauI, tauL, tauP, tauR = self.hvars[:,0:1], self.hvars[:,1:25], self.hvars[:,25:49], self.hvars[:,49:73]
+            actives  = self.sliprates > Dtol
+            # slip system i and i+12 (or i-12) are of opposite signs
+            reverse  = np.roll(actives, 12, axis=1)
+            passives = np.logical_not(actives | reverse)
+            
+            dGM = (self.total_sliprate*dt)[:,None]
+            
+            tauLsat = np.where(passives,  qL*tauI, 0.)
+            tauPsat = np.where(actives,   qP*tauI, 0.)
+            tauRsat = np.where(reverse,  -qR*tauI, 0.)
+            
+            if self.hardening_law['algorithm'] == 'explicit':
+                tauL = tauL + (tauLsat - tauL)/gmL*dGM   # latent hardening
+                tauP = tauP + (tauPsat - tauP)/gmP*dGM   # polarisation
+                tauR = tauR + (tauRsat - tauR)/gmR*dGM   # reverse hardening - BAUSCHINGER effect
+            elif self.hardening_law['algorithm'] == 'implicit':
+                tauL = (1./(gmL+dGM))*(tauLsat*dGM + tauL*gmL)
+                tauP = (1./(gmP+dGM))*(tauPsat*dGM + tauP*gmP)
+                tauR = (1./(gmR+dGM))*(tauRsat*dGM + tauR*gmR)
+            
+            # isotropic hardening (extended Voce law)
+            gm = self.total_slip
+            tauI = tau0 + th2*gm2*(1.-np.exp(-gm/gm2)) + th3*gm3*(1.-np.exp(-gm/gm3)) + th4*gm
+            
+            # update hardening variables
+            self.hvars[:,0]     = tauI
+            self.hvars[:,1:25]  = tauL
+            self.hvars[:,25:49] = tauP
+            self.hvars[:,49:73] = tauR
+            self.hvars[:,73:]   = tauI[:,None] + tauL + tauP + tauR
+            # total critical resolved shear stress as sum of all contributions
+            self.crss = self.hvars[:,73:]
+        else:
+            # here to define user hardening law
+            pass
+    
+    def init_results_output(self, result_vars, sink=None):
+        self.results = init_grain_results(self.Ngrains, result_vars, self.hardening_law, sink)
+    
+    def save_results(self, outIND):
+        res = self.results
+        if 'stress_loc' in res:
+            res['stress_loc'][...,outIND] = self.stress_loc
+        if 'stress_glob' in res:
+            res['stress_glob'][...,outIND] = self.stress_glob
+        if 'euler_angles' in res:
+            res['euler_angles'][...,outIND] = matrix2ang(self.Q)
+        if 'crss' in res:
+            res['crss'][...,outIND] = self.crss
+        if 'sliprates' in res:
+            res['sliprates'][...,outIND] = self.sliprates
+        if 'total_sliprate' in res:
+            res['total_sliprate'][:,outIND] = self.total_sliprate
+        actives = self.sliprates > Dtol
+        if 'activesID' in res:
+            # indices of the active slip systems first, the rest filled by zeros
+            ids = np.argsort(np.logical_not(actives), axis=1, kind='stable')
+            res['activesID'][...,outIND] = np.where(np.sort(np.logical_not(actives), axis=1), 0, ids)
+        if 'num_actives' in res:
+            res['num_actives'][:,outIND] = np.sum(actives, axis=1)
+        if 'statevar' in res:
+            res['statevar']['tauI'][:,outIND]   = self.hvars[:,0]
+            res['statevar']['tauL'][...,outIND] = self.hvars[:,1:25]
+            res['statevar']['tauP'][...,outIND] = self.hvars[:,25:49]
+            res['statevar']['tauR'][...,outIND] = self.hvars[:,49:73]
+
+
+# definition of the SharedArrays class
+class SharedArrays:
+    '''
+    Named numpy arrays placed in one block of shared memory. The owner creates the block from a dict 
+    of arrays, the worker processes attach to it by "spec", which is small and cheap to pickle.
+    '''
+    def __init__(self, arrays=None, spec=None):
+        if spec is None:
+            layout = {}
+            size   = 0
+            for name, a in arrays.items():
+                a = np.asarray(a)
+                layout[name] = (size, a.shape, a.dtype.str)
+                # keep every array 64-byte aligned
+                size += -(-a.nbytes//64)*64
+            self.shm   = shared_memory.SharedMemory(create=True, size=max(size, 64))
+            self.spec  = (self.shm.name, layout)
+            self.owner = True
+        else:
+            self.shm   = shared_memory.SharedMemory(name=spec[0])
+            self.spec  = spec
+            self.owner = False
+        
+        self.arrays = {}
+        for name, (offset, shape, dtype) in self.spec[1].items():
+            self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+        if arrays is not None:
+            for name, a in arrays.items():
+                self.arrays[name][...] = a
+    
+    def __getitem__(self, name):
+        return self.arrays[name]
+    
+    def copy(self):
+        '''Dict with private copies of all the arrays, valid after the block is released.'''
+        return {name: a.copy() for name, a in self.arrays.items()}
+    
+    def close(self):
+        '''Release the block, it is also removed if this is the owner.'''
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# state of a worker process of the parallel runs, set by _parallel_init
+_parallel_worker = {}
+
+def _parallel_init(polycrystal, spec):
+    '''Initializer of the worker processes used by Polycrystal.load(parallel=...).'''
+    global crystal_properties
+    crystal_properties = get_crystallography(polycrystal.crystal_structure)
+    _parallel_worker['polycrystal'] = polycrystal
+    _parallel_worker['shared']      = SharedArrays(spec=spec)
+    
+def _parallel_taylor_step(args):
+    '''One increment of the full-constrained Taylor model for the grains start:stop in shared memory.'''
+    start, stop, Lp, dt = args
+    pc     = _parallel_worker['polycrystal']
+    shared = _parallel_worker['shared']
+    arrays = {var: a[start:stop] for var, a in shared.arrays.items()}
+    states = GrainStates.from_arrays(arrays, pc.hardening_law)
+    pc.taylor_step(states, Lp, dt)
+    states.store(arrays)
+    # partial sums for the polycrystal averages
+    return np.sum(states.stress_glob, axis=0), np.sum(states.sliprates), np.sum(states.crss)
+
+# state of the Alamel grains kept in shared memory, grains of cluster i have indices 2*i and 2*i+1
+_alamel_grain_vars = ('Q', 'R', 'crss', 'hvars', 'total_slip', 'total_sliprate', 'sliprates', 
+                      'relaxation_sliprates', 'stress_loc', 'stress_glob')
+
+def _alamel_arrays(clusters):
+    grains = [g for cl in clusters for g in (cl.g1, cl.g2)]
+    arrays = {'Q0'         : np.array([g.Q0 for g in grains]),
+              'gb_Q0'      : np.array([cl.gb.Q0 for cl in clusters]),
+              'gb_Q'       : np.array([cl.gb.Q for cl in clusters]),
+              'stress_loc' : np.zeros((len(grains),3,3)),
+              'stress_glob': np.zeros((len(grains),3,3)),
+              'activesID'  : np.full((len(grains),24), -1, dtype=np.int64)}
+    for var in _alamel_grain_vars:
+        if var not in arrays:
+            arrays[var] = np.array([np.atleast_1d(getattr(g, var)) if var == 'hvars' else getattr(g, var) 
+                                    for g in grains], dtype=float)
+    return arrays
+
+def alamel_checkpoint_arrays(arrays):
+    '''
+    The state of the Alamel grains and grain boundaries in "arrays" (as views) in the checkpoint layout shared by 
+    Alamel and Alamel_parallel, the initial orientations are part of the run signature.
+    '''
+    return dict({var: arrays[var] for var in _alamel_grain_vars}, gb_Q=arrays['gb_Q'])
+
+def _load_grain(g, shared, k):
+    for var in _alamel_grain_vars:
+        setattr(g, var, shared[var][k].copy())
+    g.activesID = shared['activesID'][k][shared['activesID'][k] >= 0]
+    
+def _store_grain(g, shared, k):
+    for var in _alamel_grain_vars:
+        shared[var][k] = getattr(g, var)
+    shared['activesID'][k] = -1
+    shared['activesID'][k,:len(g.activesID)] = g.activesID
+
+def _save_alamel_results(results, shared, outIND):
+    '''
+    Grain results of the output step outIND written at once for all Alamel grains from the state arrays in "shared" 
+    (as Grain.save_results does for one grain), the Grain objects are not needed.
+    '''
+    if 'stress_loc' in results:
+        results['stress_loc'][...,outIND] = shared['stress_loc']
+    if 'stress_glob' in results:
+        results['stress_glob'][...,outIND] = shared['stress_glob']
+    if 'euler_angles' in results:
+        results['euler_angles'][...,outIND] = matrix2ang(shared['Q'])
+    if 'crss' in results:
+        results['crss'][...,outIND] = shared['crss']
+    if 'sliprates' in results:
+        results['sliprates'][...,outIND] = shared['sliprates']
+    if 'total_sliprate' in results:
+        results['total_sliprate'][:,outIND] = np.sum(shared['sliprates'], axis=1)
+    ids = shared['activesID']
+    if 'activesID' in results:
+        # indices of the active slip systems first, the rest filled by zeros
+        results['activesID'][...,outIND] = np.maximum(ids, 0)
+    if 'num_actives' in results:
+        results['num_actives'][:,outIND] = np.sum(ids >= 0, axis=1)
+    if 'relaxation_sliprates' in results:
+        results['relaxation_sliprates'][...,outIND] = shared['relaxation_sliprates']
+    if 'statevar' in results:
+        results['statevar']['tauI'][:,outIND]   = shared['hvars'][:,0]
+        results['statevar']['tauL'][...,outIND] = shared['hvars'][:,1:25]
+        results['statevar']['tauP'][...,outIND] = shared['hvars'][:,25:49]
+        results['statevar']['tauR'][...,outIND] = shared['hvars'][:,49:73]
+    # the stress and slip corners are not part of the shared state, the lists get None for every grain
+    for var in ('weights', 'stress_corners', 'slip_basis_solutions'):
+        if var in results:
+            for res in results[var]:
+                res.append(None)
+
+def _parallel_alamel_step(args):
+    '''One increment of the Alamel model for the clusters start:stop in shared memory.'''
+    start, stop, Lp, Fp = args
+    pc     = _parallel_worker['polycrystal']
+    shared = _parallel_worker['shared']
+    if 'cluster' not in _parallel_worker:
+        _parallel_worker['cluster'] = Cluster(Grain([0.,0.,0.], pc.hardening_law), 
+                                              Grain([0.,0.,0.], pc.hardening_law), 
+                                              Grain_boundary([0.,0.,0.]))
+    cluster = _parallel_worker['cluster']
+    pc.Fp   = Fp
+    
+    stress_sum, slip_sum, crss_sum = np.zeros((3,3)), 0., np.zeros(24)
+    for i in range(start, stop):
+        for k, g in enumerate((cluster.g1, cluster.g2)):
+            g.Q0 = shared['Q0'][2*i+k]
+            _load_grain(g, shared, 2*i+k)
+        cluster.gb.Q0 = shared['gb_Q0'][i]
+        cluster.gb.Q  = shared['gb_Q'][i].copy()
+        
+        pc.alamel_cluster_step(cluster, Lp)
+        
+        for k, g in enumerate((cluster.g1, cluster.g2)):
+            _store_grain(g, shared, 2*i+k)
+            stress_sum += g.stress_glob
+            slip_sum   += np.sum(g.sliprates)
+            crss_sum   += g.crss
+        shared['gb_Q'][i] = cluster.gb.Q
+    # partial sums for the polycrystal averages
+    return stress_sum, slip_sum, crss_sum
+
+def _yield_locus_init(session):
+    '''Initializer of the worker processes used by Polycrystal.yield_locus and getRvalue_profile(parallel=...).'''
+    session = copy.copy(session)
+    session.settings = dict(session.settings)
+    session.mode     = 'serial'
+    session.executor = None
+    # the polycrystal is installed into cpfort once, every point only changes the boundary conditions
+    with _cpfort_lock:
+        _cpfort_install(session.token, session.state)
+    _parallel_worker['session'] = session
+
+def _yield_locus_worker(point):
+    '''One point of the yield locus (or one tensile test) solved by the session of the worker process.'''
+    return _yield_locus_solve(_parallel_worker['session'], *point)
+
+def _yield_locus_trace_worker(arc):
+    '''One arc of the yield locus traced by continuation by the session of the worker process.'''
+    return list(yield_locus_trace(_parallel_worker['session'], *arc))
+
+def _yield_locus_solve(session, bc, dguess, fallback=None, tol=None):
+    '''
+    Solve the mixed boundary conditions "bc" (cpfort.globals values) for one point of the yield locus. Without 
+    "fallback" the point is solved from the standard initial guess "dguess". With it "dguess" is a warm start, 
+    if its residuals exceed tol the point is solved again from the standard initial guess "fallback". 
+    Returns (Dsolved, Ssolved, info, resid, nfev_warm, nfev_cold), the function evaluations of the warm start 
+    and of the solution from the standard initial guess (0 if there was none), their sum is the total.
+    '''
+    session.set(**bc)
+    (Dsolved, Ssolved, info, resid, nfev), fort = session.call('solve_mixbc', dguess=dguess, n=5)
+    if fallback is None:
+        return Dsolved, Ssolved, info, resid, 0, nfev
+    nfev_cold = 0
+    if max(abs(resid)) >= tol:
+        (Dsolved, Ssolved, info, resid, nfev_cold), fort = session.call('solve_mixbc', dguess=fallback, n=5)
+    return Dsolved, Ssolved, info, resid, nfev, nfev_cold
+
+
 # definition of the Crystal class
 class Crystallography:
-    def __init__(self, crystal_structure):
-        self.calc_slipsystem_matrices(crystal_structure)
+    def __init__(self, crystal_structure, use_cache=True):
+        self.crystal_structure = crystal_structure
+        self.calc_slipsystem_matrices(crystal_structure, use_cache)
             
     # initialize cryllographic slip systems, Schmidt matrix
-    def calc_slipsystem_matrices(self, crystal_structure):
+    def calc_slipsystem_matrices(self, crystal_structure, use_cache=True):
 
         # FCC_111
         if crystal_structure == 1:
@@ -1453,40 +1976,12 @@ class Crystallography:
                 Omega[:,i] = [Omega24[1,2,i], Omega24[0,2,i], Omega24[0,1,i]]
                 P[:,i]     = [P24[0,0,i], P24[1,1,i], P24[1,2,i], P24[0,2,i], P24[0,1,i]]
 
-            # generate precalculated tables:
-            # 
-            # sslookup is dictionary with keys equal to 5ers of geometrically compatible slipsystems
-            #                        and item is a list, where first item is counting index following
-            #                        by the admissible signs of shears (obeying yield criterion)
-            comb5ers = itertools.combinations(range(24), 5)
-            self.sslookup = {}
-
-            # generation of lookup matrices Dcalc_lookup and Scalc_lookup 
-            # for all the 384 admissible combinations of 5 slip systems out of 12 slip systems
-            self.Dcalc_lookup = np.zeros((12288,25))
-            self.Scalc_lookup = np.zeros((12288,25))
-            i = 0
-            for ind in comb5ers:
-                A = np.zeros((5,5))
-                for j in range(5):
-                    A[:,j]  = np.array([ P[0,ind[j]], P[1,ind[j]], P[2,ind[j]], P[3,ind[j]], P[4,ind[j]] ]) 
-
-                if np.linalg.matrix_rank(A, tol=None) > 4:
-                    self.sslookup[ind] = i
-                    self.Dcalc_lookup[i,:] = np.reshape(A,-1)  # flattening the A matrix
-
-                    # generate Scalc_lookup matrix
-                    B = np.zeros((5,5))
-                    for j in range(5):
-                        B[j,:] = np.array([2.*P[0,ind[j]]+P[1,ind[j]], 
-                                           2.*P[1,ind[j]]+P[0,ind[j]],
-                                           2.*P[2,ind[j]], 
-                                           2.*P[3,ind[j]],
-                                           2.*P[4,ind[j]]])
-
-                    self.Scalc_lookup[i,:] = np.reshape(B,-1)  # flattening the B matrix                                     
-                    i += 1
-
+            # precalculated lookup tables are memory-mapped from the on-disk cache,
+            # they are generated (and saved to the cache) only if the cache is missing
+            if not (use_cache and self.load_lookup_tables()):
+                self.calc_lookup_tables(P)
+                if use_cache:
+                    self.save_lookup_tables()
 
             # generate matrix for projection of Cauchy stress into RSS
             # it is B-like matrix, just for all 12 slip systems
@@ -1505,11 +2000,140 @@ class Crystallography:
 
             self.symR1 = getsym(self.R1)
             self.symR2 = getsym(self.R2)
+            
+            # stress vertices of the single crystal yield surface for uniform CRSS (Bishop-Hill stress states)
+            self.calc_stress_vertices()
         
         else:
             pass
     
                     
+    def calc_lookup_tables(self, P):
+        """Generate the slip system lookup tables sslookup, Dcalc_lookup and Scalc_lookup from Schmid matrices P."""
+        # generate precalculated tables:
+        # 
+        # sslookup is dictionary with keys equal to 5ers of geometrically compatible slipsystems
+        #                        and item is a list, where first item is counting index following
+        #                        by the admissible signs of shears (obeying yield criterion)
+        comb5ers = itertools.combinations(range(24), 5)
+        self.sslookup = {}
+
+        # generation of lookup matrices Dcalc_lookup and Scalc_lookup 
+        # for all the 384 admissible combinations of 5 slip systems out of 12 slip systems
+        self.Dcalc_lookup = np.zeros((12288,25))
+        self.Scalc_lookup = np.zeros((12288,25))
+        i = 0
+        for ind in comb5ers:
+            A = np.zeros((5,5))
+            for j in range(5):
+                A[:,j]  = np.array([ P[0,ind[j]], P[1,ind[j]], P[2,ind[j]], P[3,ind[j]], P[4,ind[j]] ]) 
+
+            if np.linalg.matrix_rank(A, tol=None) > 4:
+                self.sslookup[ind] = i
+                self.Dcalc_lookup[i,:] = np.reshape(A,-1)  # flattening the A matrix
+
+                # generate Scalc_lookup matrix
+                B = np.zeros((5,5))
+                for j in range(5):
+                    B[j,:] = np.array([2.*P[0,ind[j]]+P[1,ind[j]], 
+                                       2.*P[1,ind[j]]+P[0,ind[j]],
+                                       2.*P[2,ind[j]], 
+                                       2.*P[3,ind[j]],
+                                       2.*P[4,ind[j]]])
+
+                self.Scalc_lookup[i,:] = np.reshape(B,-1)  # flattening the B matrix                                     
+                i += 1
+
+        # keys of sslookup ordered by their row in the lookup matrices (used for the on-disk cache)
+        self.sslookup_keys = np.array(sorted(self.sslookup, key=self.sslookup.get), dtype=np.int8)
+
+    def calc_stress_vertices(self):
+        '''
+        Generate all admissible stress vertices of the single crystal yield surface for a uniform CRSS equal to 1
+        (56 Bishop-Hill stress states for FCC_111). Every 5 linearly independent slip systems in "Scalc_lookup" 
+        define a stress state; it is a vertex if no resolved shear stress exceeds the CRSS.
+        
+        stress_vertices : (5,V) deviatoric stresses in voigt notation
+        vertex_work     : (5,V) matrix, Dp_vec @ vertex_work is the plastic work rate at all vertices
+        vertex_pinv     : (V,24,5) pseudo-inverses of the Schmid matrices of the active slip systems at each vertex,
+                          vertex_pinv[v] @ Dp_vec is the minimum-norm slip rate solution (as in "solveambSVD")
+        '''
+        B = np.asarray(self.Scalc_lookup).reshape(-1,5,5)
+        x = np.linalg.solve(B, np.ones((len(B),5)))
+        admissible = np.all(x @ self.S_proj.T <= 1. + Stol, axis=1)
+        vertices = np.unique(np.round(x[admissible], 12), axis=0)
+        
+        # S:D expressed in voigt notation of deviatoric tensors
+        M = np.diag([2., 2., 2., 2., 2.])
+        M[0,1], M[1,0] = 1., 1.
+        self.stress_vertices = vertices.T
+        self.vertex_work = M @ vertices.T
+        
+        actives = vertices @ self.S_proj.T >= 1. - Stol
+        self.vertex_pinv = np.zeros((len(vertices),24,5))
+        for v, act in enumerate(actives):
+            self.vertex_pinv[v,act,:] = np.linalg.pinv(self.P[:,act])
+    
+    def lookup_tables_path(self):
+        """Directory of the cached lookup tables for this crystal structure and cache version."""
+        return os.path.join(CRYSTALLOGRAPHY_CACHE_DIR, 
+                            'crystallography_{}_v{}'.format(self.crystal_structure, CRYSTALLOGRAPHY_CACHE_VERSION))
+
+    def load_lookup_tables(self):
+        """Memory-map the lookup tables from the on-disk cache. Returns False if the cache is not available."""
+        path = self.lookup_tables_path()
+        try:
+            keys = np.load(os.path.join(path, 'sslookup_keys.npy'), mmap_mode='r')
+            Dcalc_lookup = np.load(os.path.join(path, 'Dcalc_lookup.npy'), mmap_mode='r')
+            Scalc_lookup = np.load(os.path.join(path, 'Scalc_lookup.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return False
+        if keys.shape[1:] != (5,) or Dcalc_lookup.shape != (len(keys),25) or Scalc_lookup.shape != (len(keys),25):
+            print('Lookup table cache in {} is corrupted and will be regenerated.'.format(path))
+            return False
+        
+        self.sslookup_keys = keys
+        self.sslookup = dict(zip(map(tuple, keys.tolist()), range(len(keys))))
+        self.Dcalc_lookup = Dcalc_lookup
+        self.Scalc_lookup = Scalc_lookup
+        return True
+    
+    def save_lookup_tables(self):
+        """Save the lookup tables to the on-disk cache and memory-map them from there."""
+        path = self.lookup_tables_path()
+        try:
+            os.makedirs(CRYSTALLOGRAPHY_CACHE_DIR, exist_ok=True)
+            # write into a temporary directory first, so that concurrent processes never see partial tables
+            tmppath = tempfile.mkdtemp(dir=CRYSTALLOGRAPHY_CACHE_DIR)
+            os.chmod(tmppath, 0o755)
+            np.save(os.path.join(tmppath, 'sslookup_keys.npy'), self.sslookup_keys)
+            np.save(os.path.join(tmppath, 'Dcalc_lookup.npy'), self.Dcalc_lookup)
+            np.save(os.path.join(tmppath, 'Scalc_lookup.npy'), self.Scalc_lookup)
+        except OSError:
+            print('Cannot write lookup table cache to {}. Tables will be regenerated next time.'.format(CRYSTALLOGRAPHY_CACHE_DIR))
+            return
+        try:
+            os.rename(tmppath, path)
+        except OSError: 
+            # another process has already saved the tables
+            shutil.rmtree(tmppath, ignore_errors=True)
+        self.load_lookup_tables()
+
+
+# Crystallography instances already constructed in this process, one per crystal structure
+_crystallography_instances = {}
+
+def get_crystallography(crystal_structure):
+    '''
+    Returns the Crystallography of the given crystal structure. The instance is constructed only 
+    once per process and its lookup tables are memory-mapped from the on-disk cache, so that 
+    forked worker processes share the same pages.
+    '''
+    if crystal_structure not in _crystallography_instances:
+        _crystallography_instances[crystal_structure] = Crystallography(crystal_structure)
+    return _crystallography_instances[crystal_structure]
+
+
 # definition of the Polycrystal class
 class Polycrystal:
     
@@ -1551,7 +2175,7 @@ class Polycrystal:
             sys.exit('Grain interaction not recognized.')
         
         global crystal_properties 
-        crystal_properties = Crystallography(self.crystal_structure)     
+        crystal_properties = get_crystallography(self.crystal_structure)     
         
         # saving results
         self.average_stress = None
@@ -1574,9 +2198,22 @@ class Polycrystal:
                        'SCYL_exponent'      : 100,
                        'solve_Tayloramb'    : 'RD',
                        'gmdot0'             : 1.,
-                       'SRS'                : 0.01}):
+                       'SRS'                : 0.01,
+                       'engine'             : 'grainwise',
+                       'orientation_store'  : 'matrix',
+                       'solve_slips'        : 'simplex'},
+             parallel = None, sink = None, checkpoint = None):
         
         self.options = options
+        # periodic checkpoints of the python implementation, e.g. checkpoint={'file': 'run.npz', 'interval': 100},
+        # an existing checkpoint file of the same run is resumed unless 'resume' is False, it is removed when the run completes
+        self.checkpoint = checkpoint
+        if checkpoint is not None and dofortran and not ImportErrCpfort:
+            print('Checkpoints are written by the python implementation only (dofortran=False).')
+        # directory for the results written as memory-mapped .npy files while running (see PolycrystalResults.open)
+        self.sink = sink
+        # number of worker processes for the grain-parallel python implementation, e.g. parallel={'workers': 4}
+        workers = None if parallel is None else parallel.get('workers', os.cpu_count())
         # correct if more output steps than actual steps
         Nout = result_vars['number_of_outputs']
         Nout = min(Nout, Nsteps)   
@@ -1592,23 +2229,20 @@ class Polycrystal:
         
         if 'polycrystal_results' in result_vars.keys():
             if 'average_stress' in result_vars['polycrystal_results']:
-                self.average_stress = np.zeros((3,3,Nout))
+                self.average_stress = result_array('average_stress', (3,3,Nout), sink)
             if 'average_slip' in result_vars['polycrystal_results']:
-                self.average_slip   = np.zeros(Nout)     
+                self.average_slip   = result_array('average_slip', (Nout,), sink)
         elif 'grain_results' not in result_vars.keys():
             print('No result output is specified.\n \
                   The orientation matrices calculated in the last time step \
                   will be the only simulation result.')
         
         # if some grain results are required, do initialize those grain result variables
-        if result_vars['grain_results'] is not []:
-            if self.grain_interaction != 'FCTAYLOR':
-                for cluster in self.clusters:
-                    cluster.g1.init_results_output(result_vars)
-                    cluster.g2.init_results_output(result_vars)
-            else:
-                for grain in self.grains:
-                    grain.init_results_output(result_vars)
+        # (the fortran implementation and the batched and parallel Taylor engines keep their own result arrays)
+        fortran = dofortran and not ImportErrCpfort
+        batched = self.grain_interaction == 'FCTAYLOR' and (options.get('engine', 'grainwise') == 'batched' or workers)
+        if result_vars['grain_results'] is not [] and not batched and not fortran:
+            self.grain_array.init_results_output(result_vars, sink)
         
         ### load/deformation definition check
         # TODO remove Sabs from user interface, make it hidden
@@ -1654,6 +2288,13 @@ class Polycrystal:
         
         if not ( (all(np.diag(iL)) is True and all(np.diag(iS)) is False) or (all(np.diag(iL)) is False and all(np.diag(iS)) is True) ):
             sys.exit('All or None diagonal terms must be prescribed in L or deviatoric stress tensor.')
+        
+        # signature of the run (loading, options and initial state), a checkpoint is only resumed by the same run
+        if checkpoint is not None:
+            gb_Q = None if self.grain_interaction == 'FCTAYLOR' else np.array([c.gb.Q for c in self.clusters])
+            self.run_signature = content_hash(self.L, self.Sdir, self.Sabs, self.iL, self.iSdir, self.iSabs, self.Nsteps, self.dt, 
+                                              run_elasticity, options, result_vars, self.crystal_structure, self.grain_interaction, 
+                                              self.hardening_law, self.Fp, self.grain_array.arrays(), gb_Q)
                 
 
         ### run crystal plasticity
@@ -1661,40 +2302,42 @@ class Polycrystal:
             self.rotate_boundary = None
             if not run_elasticity:                                                      
                 if dofortran and not ImportErrCpfort:
-                    self.init_cpfort()
+                    session = self.init_cpfort()
                     # initializing the global variables
-                    cpfort.globals.dt                                      = self.dt
-                    cpfort.globals.nsteps                                  = self.Nsteps
-                    cpfort.globals.nout                                    = len(self.output_steps)
-                    cpfort.globals.output_steps                            = np.zeros(len(cpfort.globals.output_steps)) 
-                    cpfort.globals.output_steps[:len(self.output_steps)]   = self.output_steps
-                    outputvars                                             = self.result_vars['polycrystal_results'] + self.result_vars['grain_results']
-                    outputvarsfort                                         = [outputvars_dict[var] for var in outputvars_dict if var in outputvars]
-                    cpfort.globals.outputvars[:len(outputvarsfort)]        = outputvarsfort
-                    cpfort.globals.grain_interaction                       = grain_interaction_dict[self.grain_interaction]
-                    # boundary condictions
-                    cpfort.globals.ind_sdir                                = m2voigt_dev(self.iSdir)
-                    cpfort.globals.ind_sabs                                = m2voigt_dev(self.iSabs)
-                    cpfort.globals.ind_d                                   = m2voigt_dev(self.iDdir)
-                    cpfort.globals.sdir_prescribed                         = m2voigt_dev(self.Sdir)
-                    cpfort.globals.sabs_prescribed                         = m2voigt_dev(self.Sabs)
-                    cpfort.globals.d_prescribed                            = m2voigt_dev(self.Ddir) # total prescribed strain-rate
-                    cpfort.globals.w_prescribed                            = getskw(self.L) # total prescribed spin
-                    ndim                                                   = len(cpfort.globals.ind_d[cpfort.globals.ind_d == False])
-                    cpfort.globals.eps4jacobian                            = options['increment_jacobian']
-                    cpfort.scylglobals.scylon                              = options['use_SCYL']
-                    cpfort.scylglobals.scylexp                             = options['SCYL_exponent']
-
-                    dguess = make_good_guess(self.Sabs, self.iSabs, self.Sdir, self.iSdir, cpfort.globals.crss_mean)
-                    dguess = m2voigt_dev(dguess)
+                    outputvars     = self.result_vars['polycrystal_results'] + self.result_vars['grain_results']
+                    outputvarsfort = [outputvars_dict[var] for var in outputvars_dict if var in outputvars]
+                    session.set(dt                = self.dt,
+                                nsteps            = self.Nsteps,
+                                nout              = len(self.output_steps),
+                                output_steps      = functools.partial(_cpfort_prefix, 'output_steps', self.output_steps),
+                                outputvars        = functools.partial(_cpfort_prefix, 'outputvars', outputvarsfort),
+                                grain_interaction = grain_interaction_dict[self.grain_interaction],
+                                # boundary condictions
+                                ind_sdir          = m2voigt_dev(self.iSdir),
+                                ind_sabs          = m2voigt_dev(self.iSabs),
+                                ind_d             = m2voigt_dev(self.iDdir),
+                                sdir_prescribed   = m2voigt_dev(self.Sdir),
+                                sabs_prescribed   = m2voigt_dev(self.Sabs),
+                                d_prescribed      = m2voigt_dev(self.Ddir), # total prescribed strain-rate
+                                w_prescribed      = getskw(self.L), # total prescribed spin
+                                eps4jacobian      = options['increment_jacobian'])
+                    session.set('scylglobals', scylon=options['use_SCYL'], scylexp=options['SCYL_exponent'])
+                    ndim   = np.count_nonzero(m2voigt_dev(self.iDdir) == False)
+                    dguess = functools.partial(_cpfort_good_guess, self.Sabs, self.iSabs, self.Sdir, self.iSdir)
                     
-                    Dsolved, Ssolved, info, resid, nfev = cpfort.crystal_plasticity.taylor(dguess=dguess, ndim=ndim)
-                    self.save_results_taylorfort()
-                    cpfort.crystal_plasticity.dealloc_outputvars_taylor()
+                    (Dsolved, Ssolved, info, resid, nfev), fort = session.call('taylor', readback=cpfort_readback_taylor, 
+                                                                               finalize='dealloc_outputvars_taylor', 
+                                                                               dguess=dguess, ndim=ndim)
+                    self.save_results_taylorfort(fort)
                 else:
                     if np.all(iL):                                                          
                         # run the deformation-driven full-constrained RIGID plastic Taylor model
-                        self.TaylorFC()
+                        if workers:
+                            self.TaylorFC_parallel(workers)
+                        elif options.get('engine', 'grainwise') == 'batched':
+                            self.TaylorFC_batched()
+                        else:
+                            self.TaylorFC()
                     else:
                         # run the RIGID plastic Taylor model with mixed boundary conditions
                         sys.exit('Specify "dofortran=True" for mixed boundary conditions.')
@@ -1704,40 +2347,40 @@ class Polycrystal:
         elif self.grain_interaction in ['ALAMEL','ALAMEL3']:
             self.rotate_boundary = options['rotate_boundary']
             if dofortran and not ImportErrCpfort:
-                self.init_cpfort()
+                session = self.init_cpfort()
                 # initializing the global variables    
-                cpfort.globals.relax_penalties                         = self.hardening_law['relax_penalties']
-                cpfort.globals.dt                                      = self.dt
-                cpfort.globals.nsteps                                  = self.Nsteps
-                cpfort.globals.nout                                    = len(self.output_steps)
-                cpfort.globals.output_steps                            = np.zeros(len(cpfort.globals.output_steps)) 
-                cpfort.globals.output_steps[:len(self.output_steps)]   = self.output_steps
-                self.output_steps
-                outputvars                                             = self.result_vars['polycrystal_results'] + self.result_vars['grain_results']
-                outputvarsfort                                         = [outputvars_dict[var] for var in outputvars_dict if var in outputvars]
-                cpfort.globals.outputvars[:len(outputvarsfort)]        = outputvarsfort
-                cpfort.globals.grain_interaction                       = grain_interaction_dict[self.grain_interaction]
-                # boundary condictions
-                cpfort.globals.ind_sdir                                = m2voigt_dev(self.iSdir)
-                cpfort.globals.ind_sabs                                = m2voigt_dev(self.iSabs)
-                cpfort.globals.ind_d                                   = m2voigt_dev(self.iDdir)
-                cpfort.globals.sdir_prescribed                         = m2voigt_dev(self.Sdir)
-                cpfort.globals.sabs_prescribed                         = m2voigt_dev(self.Sabs)
-                cpfort.globals.d_prescribed                            = m2voigt_dev(self.Ddir) # total prescribed strain-rate
-                cpfort.globals.w_prescribed                            = getskw(self.L) # total prescribed spin
-                ndim                                                   = len(cpfort.globals.ind_d[cpfort.globals.ind_d == False])
-                cpfort.globals.eps4jacobian                            = options['increment_jacobian']
-                cpfort.globals.rotate_boundary                         = self.rotate_boundary
+                outputvars     = self.result_vars['polycrystal_results'] + self.result_vars['grain_results']
+                outputvarsfort = [outputvars_dict[var] for var in outputvars_dict if var in outputvars]
+                session.set(relax_penalties   = self.hardening_law['relax_penalties'],
+                            dt                = self.dt,
+                            nsteps            = self.Nsteps,
+                            nout              = len(self.output_steps),
+                            output_steps      = functools.partial(_cpfort_prefix, 'output_steps', self.output_steps),
+                            outputvars        = functools.partial(_cpfort_prefix, 'outputvars', outputvarsfort),
+                            grain_interaction = grain_interaction_dict[self.grain_interaction],
+                            # boundary condictions
+                            ind_sdir          = m2voigt_dev(self.iSdir),
+                            ind_sabs          = m2voigt_dev(self.iSabs),
+                            ind_d             = m2voigt_dev(self.iDdir),
+                            sdir_prescribed   = m2voigt_dev(self.Sdir),
+                            sabs_prescribed   = m2voigt_dev(self.Sabs),
+                            d_prescribed      = m2voigt_dev(self.Ddir), # total prescribed strain-rate
+                            w_prescribed      = getskw(self.L), # total prescribed spin
+                            eps4jacobian      = options['increment_jacobian'],
+                            rotate_boundary   = self.rotate_boundary)
+                ndim   = np.count_nonzero(m2voigt_dev(self.iDdir) == False)
+                dguess = functools.partial(_cpfort_good_guess, self.Sabs, self.iSabs, self.Sdir, self.iSdir)
                 
-                dguess = make_good_guess(self.Sabs, self.iSabs, self.Sdir, self.iSdir, cpfort.globals.crss_mean)
-                dguess = m2voigt_dev(dguess)
-                
-                Dsolved, Ssolved, info, resid, nfev = cpfort.crystal_plasticity.alamel(dguess=dguess, ndim=ndim)
-                self.save_results_alamelfort()
-                cpfort.crystal_plasticity.dealloc_outputvars_alamel()
+                (Dsolved, Ssolved, info, resid, nfev), fort = session.call('alamel', readback=cpfort_readback_alamel, 
+                                                                           finalize='dealloc_outputvars_alamel', 
+                                                                           dguess=dguess, ndim=ndim)
+                self.save_results_alamelfort(fort)
             else:
                 if np.all(iL):
-                    self.Alamel()
+                    if workers:
+                        self.Alamel_parallel(workers)
+                    else:
+                        self.Alamel()
                 else:
                     # run the RIGID plastic Alamel model in with mixed boundary conditions
                     sys.exit('Specify "dofortran=True" for mixed boundary conditions.')
@@ -1745,9 +2388,27 @@ class Polycrystal:
         else:
             print('Choose one of the defined analysis types: FC_TAYLOR, ALAMEL or ALAMEL3')
             sys.exit()
+        
+        if sink is not None:
+            # the fortran implementation returns the results in memory at the end, write those to the sink
+            if fortran:
+                self.results.store(sink)
+                for name in ('average_stress', 'average_slip'):
+                    res = getattr(self, name)
+                    if res is not None and not isinstance(res, np.memmap):
+                        setattr(self, name, result_array(name, np.shape(res), sink))
+                        getattr(self, name)[...] = res
+            self.results.flush()
+            for res in (self.average_stress, self.average_slip):
+                if isinstance(res, np.memmap):
+                    res.flush()
+        
+        # the run is complete, its checkpoint is not to be resumed by a later run
+        if checkpoint is not None and os.path.exists(checkpoint['file']):
+            os.remove(checkpoint['file'])
       
     def init_cpfort(self):
-        """Initialize definition of polycrystal for fortran implementation of ALAMEL""" 
+        """Pack the definition of polycrystal for fortran implementation into the cpfort session of the polycrystal""" 
         
         if self.grain_interaction == 'FCTAYLOR':
             Q_list = np.zeros((3,3,self.Ngrains))
@@ -1764,10 +2425,10 @@ class Polycrystal:
                 if self.hardening_law['model'] == 'BAUSCHINGER':
                     inithvar_list[:,i] = g.hvars
 
-            cpfort.crystal_plasticity.init_slipsystems(self.crystal_structure)
-            cpfort.crystal_plasticity.init_orientation_taylor(Q_list)
-            cpfort.crystal_plasticity.init_hardening_taylor(inithvar_list, self.hardening_law['hardening_parameters'], 
-                                                            hardening_model_dict[self.hardening_law['model']])
+            state = [('init_slipsystems',        (self.crystal_structure,)),
+                     ('init_orientation_taylor', (Q_list,)),
+                     ('init_hardening_taylor',   (inithvar_list, self.hardening_law['hardening_parameters'], 
+                                                  hardening_model_dict[self.hardening_law['model']]))]
             
             
         elif self.grain_interaction in ['ALAMEL','ALAMEL3']:
@@ -1792,108 +2453,54 @@ class Polycrystal:
                     inithvarG1_list[:,i] = c.g1.hvars
                     inithvarG2_list[:,i] = c.g2.hvars
 
-            cpfort.crystal_plasticity.init_slipsystems(self.crystal_structure)
-            cpfort.crystal_plasticity.init_orientation_alamel(Qg1_list, Qg2_list, Qb_list)
-            cpfort.crystal_plasticity.init_hardening_alamel(inithvarG1_list, inithvarG1_list, self.hardening_law['hardening_parameters'], 
-                                                            hardening_model_dict[self.hardening_law['model']])
+            state = [('init_slipsystems',        (self.crystal_structure,)),
+                     ('init_orientation_alamel', (Qg1_list, Qg2_list, Qb_list)),
+                     ('init_hardening_alamel',   (inithvarG1_list, inithvarG1_list, self.hardening_law['hardening_parameters'], 
+                                                  hardening_model_dict[self.hardening_law['model']]))]
+        
+        # the state is installed into cpfort by the session of this polycrystal at every call
+        if getattr(self, 'cpfort_session', None) is None:
+            self.cpfort_session = CpfortSession()
+        self.cpfort_session.pack(state)
+        return self.cpfort_session
         
-    def save_results_taylorfort(self):
-        self.crss_mean = cpfort.globals.crss_mean
+    def save_results_taylorfort(self, fort):
+        self.crss_mean = fort.crss_mean
         # hand over the current (updated) orientations from F2Py
-        for i, g in enumerate(self.grains):
-            g.Q = cpfort.globals.qg1_list[:,:,i]
-            if self.hardening_law['model'] == 'BAUSCHINGER':
-                g.hvars = cpfort.globals.hvarq1_list[:,i]
+        self.grains.Q[...] = fort.qg1_list.transpose(2,0,1)
+        if self.hardening_law['model'] == 'BAUSCHINGER':
+            self.grains.hvars[...] = fort.hvarq1_list.T
         
         # hand over the polycrystal results from F2Py 
         if 'average_stress' in self.result_vars['polycrystal_results']:
-            self.average_stress = voigt2m_dev(cpfort.globals.out_average_stress)
+            self.average_stress = voigt2m_dev(fort.out_average_stress)
         if 'average_slip' in self.result_vars['polycrystal_results']:
-            self.average_slip = cpfort.globals.out_average_slip
+            self.average_slip = fort.out_average_slip
         
-        # hand over the grain results from F2Py
+        # hand over the grain results from F2Py, the results of the grains are views
         if self.result_vars['grain_results'] is not []:
-            for i, g in enumerate(self.grains):
-                if 'stress_loc' in self.result_vars['grain_results']:
-                    g.results.stress_loc = voigt2m_dev(cpfort.globals.out_stress_locg1[:,i,:])
-                if 'stress_glob' in self.result_vars['grain_results']:
-                    g.results.stress_glob = voigt2m_dev(cpfort.globals.out_stress_globg1[:,i,:])
-                if 'euler_angles' in self.result_vars['grain_results']:  
-                    g.results.euler_angles = cpfort.globals.out_euler_anglesg1[:,i,:].copy()
-                if 'crss' in self.result_vars['grain_results']:
-                    g.results.crss = cpfort.globals.out_crssg1[:,i,:].copy()
-                if 'sliprates' in self.result_vars['grain_results']:
-                    g.results.sliprates = cpfort.globals.out_slipratesg1[:,i,:].copy()
-                if 'total_sliprate' in self.result_vars['grain_results']:
-                    g.results.total_sliprate = np.sum(cpfort.globals.out_slipratesg1[:,i,:], axis=0)
-                if 'activesID' in self.result_vars['grain_results']:
-                    g.results.activesID = cpfort.globals.out_activesidg1[:,i,:].copy()
-                if 'num_actives' in self.result_vars['grain_results']:
-                    c.g.results.num_actives = cpfort.globals.out_num_activesg1[i,:].copy()
-                if 'statevar' in self.result_vars['grain_results']:
-                    if self.hardening_law['model'] == 'BAUSCHINGER':
-                        g.results.statevar['tauI'] = cpfort.globals.out_statevarg1[0,i,:].copy()
-                        g.results.statevar['tauL'] = cpfort.globals.out_statevarg1[1:25,i,:].copy()
-                        g.results.statevar['tauP'] = cpfort.globals.out_statevarg1[25:49,i,:].copy()
-                        g.results.statevar['tauR'] = cpfort.globals.out_statevarg1[49:73,i,:].copy()
-        
-    def save_results_alamelfort(self):
-        self.crss_mean = cpfort.globals.crss_mean
-        # hand over the current (updated) orientations from F2Py
+            self.grains.results.update(PolycrystalResults.from_fortran(fort, ('g1',), self.result_vars, self.hardening_law))
+        
+    def save_results_alamelfort(self, fort):
+        self.crss_mean = fort.crss_mean
+        # hand over the current (updated) orientations from F2Py, grains of cluster i are 2*i and 2*i+1
+        self.grain_array.Q[0::2] = fort.qg1_list.transpose(2,0,1)
+        self.grain_array.Q[1::2] = fort.qg2_list.transpose(2,0,1)
         for i, c in enumerate(self.clusters):
-            c.g1.Q = cpfort.globals.qg1_list[:,:,i]
-            c.g2.Q = cpfort.globals.qg2_list[:,:,i]
-            c.gb.Q = cpfort.globals.qb_list[:,:,i]
-            if self.hardening_law['model'] == 'BAUSCHINGER':
-                c.g1.hvars = cpfort.globals.hvarq1_list[:,i]
-                c.g2.hvars = cpfort.globals.hvarq2_list[:,i]
+            c.gb.Q = fort.qb_list[:,:,i]
+        if self.hardening_law['model'] == 'BAUSCHINGER':
+            self.grain_array.hvars[0::2] = fort.hvarq1_list.T
+            self.grain_array.hvars[1::2] = fort.hvarq2_list.T
         
         # hand over the polycrystal results from F2Py 
         if 'average_stress' in self.result_vars['polycrystal_results']:
-            self.average_stress = voigt2m_dev(cpfort.globals.out_average_stress)
+            self.average_stress = voigt2m_dev(fort.out_average_stress)
         if 'average_slip' in self.result_vars['polycrystal_results']:
-            self.average_slip = cpfort.globals.out_average_slip
+            self.average_slip = fort.out_average_slip
         
-        # hand over the grain results from F2Py
+        # hand over the grain results from F2Py, the results of the grains are views
         if self.result_vars['grain_results'] is not []:
-            for i, c in enumerate(self.clusters):
-                if 'stress_loc' in self.result_vars['grain_results']:
-                    c.g1.results.stress_loc = voigt2m_dev(cpfort.globals.out_stress_locg1[:,i,:])
-                    c.g2.results.stress_loc = voigt2m_dev(cpfort.globals.out_stress_locg2[:,i,:])
-                if 'stress_glob' in self.result_vars['grain_results']:
-                    c.g1.results.stress_glob = voigt2m_dev(cpfort.globals.out_stress_globg1[:,i,:])
-                    c.g2.results.stress_glob = voigt2m_dev(cpfort.globals.out_stress_globg2[:,i,:])
-                if 'euler_angles' in self.result_vars['grain_results']:  
-                    c.g1.results.euler_angles = cpfort.globals.out_euler_anglesg1[:,i,:].copy()
-                    c.g2.results.euler_angles = cpfort.globals.out_euler_anglesg2[:,i,:].copy()
-                if 'crss' in self.result_vars['grain_results']:
-                    c.g1.results.crss = cpfort.globals.out_crssg1[:,i,:].copy()
-                    c.g2.results.crss = cpfort.globals.out_crssg2[:,i,:].copy()
-                if 'sliprates' in self.result_vars['grain_results']:
-                    c.g1.results.sliprates = cpfort.globals.out_slipratesg1[:,i,:].copy()
-                    c.g2.results.sliprates = cpfort.globals.out_slipratesg2[:,i,:].copy()
-                if 'total_sliprate' in self.result_vars['grain_results']:
-                    c.g1.results.total_sliprate = np.sum(cpfort.globals.out_slipratesg1[:,i,:], axis=0)
-                    c.g2.results.total_sliprate = np.sum(cpfort.globals.out_slipratesg2[:,i,:], axis=0)
-                if 'activesID' in self.result_vars['grain_results']:
-                    c.g1.results.activesID = cpfort.globals.out_activesidg1[:,i,:].copy()
-                    c.g2.results.activesID = cpfort.globals.out_activesidg2[:,i,:].copy()
-                if 'num_actives' in self.result_vars['grain_results']:
-                    c.g1.results.num_actives = cpfort.globals.out_num_activesg1[i,:].copy()
-                    c.g2.results.num_actives = cpfort.globals.out_num_activesg2[i,:].copy()
-                if 'statevar' in self.result_vars['grain_results']:
-                    if self.hardening_law['model'] == 'BAUSCHINGER':
-                        c.g1.results.statevar['tauI'] = cpfort.globals.out_statevarG1[0,i,:].copy()
-                        c.g2.results.statevar['tauI'] = cpfort.globals.out_statevarG1[0,i,:].copy()
-                        c.g1.results.statevar['tauL'] = cpfort.globals.out_statevarG1[1:25,i,:].copy()
-                        c.g2.results.statevar['tauL'] = cpfort.globals.out_statevarG1[1:25,i,:].copy()
-                        c.g1.results.statevar['tauP'] = cpfort.globals.out_statevarG1[25:49,i,:].copy()
-                        c.g2.results.statevar['tauP'] = cpfort.globals.out_statevarG1[25:49,i,:].copy()
-                        c.g1.results.statevar['tauR'] = cpfort.globals.out_statevarG1[49:73,i,:].copy()
-                        c.g2.results.statevar['tauR'] = cpfort.globals.out_statevarG1[49:73,i,:].copy()
-                if 'relaxation' in self.result_vars['grain_results']:
-                    c.g1.results.relaxation_sliprates = cpfort.globals.out_relaxsliprates[:,i,:].copy()
-                    c.g2.results.relaxation_sliprates = cpfort.globals.out_relaxsliprates[:,i,:].copy()
+            self.grain_array.results.update(PolycrystalResults.from_fortran(fort, ('g1','g2'), self.result_vars, self.hardening_law))
     
 
     
@@ -1903,10 +2510,10 @@ class Polycrystal:
         orientation='horizontal')
         display(wProg)
         
-        TIME   = 0.
-        INC    = 0
-        outIND = -1
         Lp = self.L
+        # continue from the checkpoint of an interrupted run (if any)
+        TIME, INC, outIND = self.restore_checkpoint(self.grain_array.arrays(), self.results)
+        wProg.value = INC
         
         while INC < self.Nsteps:
             # update time
@@ -1939,7 +2546,8 @@ class Polycrystal:
                 # run crystal plasticity for one grain (single crystal plasticity)
                 grain.solveSingleCrystal(self.result_vars, solve_Tayloramb=self.options['solve_Tayloramb'], 
                                                            SRS=self.options['SRS'], 
-                                                           gm0=self.options['gmdot0'])
+                                                           gm0=self.options['gmdot0'],
+                                                           solve_slips=self.options.get('solve_slips', 'simplex'))
                 
                 # update total slip for grain
                 grain.total_slip += grain.total_sliprate*self.dt
@@ -1963,7 +2571,7 @@ class Polycrystal:
 #                 grain.R = np.linalg.inv(np.eye(3) - W_lattice*self.dt/2.) @ (np.eye(3) + W_lattice*self.dt/2.) @ grain.R
 #                 grain.Q = grain.R.T @ grain.Q0
                 # update grain orientation (incremental scheme using matrix exponential)
-                grain.R = scipy.linalg.expm(W_lattice*self.dt)
+                grain.R = spin_exponential(W_lattice*self.dt)
                 grain.Q = grain.R.T @ grain.Q
                 
                 # calculate average crss for the whole polycrystal - used as a stress scale in convergence criterions
@@ -1978,19 +2586,329 @@ class Polycrystal:
                         self.average_slip[outIND] += np.sum(grain.sliprates)*self.dt/self.Ngrains
                     grain.save_results(self.result_vars, outIND)
             
+            # checkpoint of the whole state
+            if self.checkpoint_due(INC):
+                self.save_checkpoint(TIME, INC, outIND, self.grain_array.arrays(), self.results)
+            
         
     
     
+    def TaylorFC_batched(self):
+        '''
+        Full-constrained Taylor model advancing all grains at once. The grain state is kept in 
+        struct-of-arrays form (GrainStates) and the steps are carried out by array operations 
+        over all grains, including the linear programming of the slip rates (see solve_single_crystals); 
+        it gives the same results as TaylorFC.
+        '''
+        wProg = ipywidgets.IntProgress(min=0, max=self.Nsteps, description='Running:',
+        bar_style='', # 'success', 'info', 'warning', 'danger' or ''
+        orientation='horizontal')
+        display(wProg)
+        
+        states = GrainStates(self.grains, self.hardening_law, self.options.get('orientation_store', 'matrix'))
+        states.init_results_output(self.result_vars, self.sink)
+        
+        Lp = self.L
+        # continue from the checkpoint of an interrupted run (if any)
+        TIME, INC, outIND = self.restore_checkpoint(states.arrays(), states.results)
+        wProg.value = INC
+        
+        while INC < self.Nsteps:
+            # update time
+            TIME += self.dt
+            # update step counter
+            INC  += 1
+            # update deformation gradient
+            self.Fp = (np.eye(3) + Lp*self.dt) @ self.Fp
+            # update the progress bar
+            wProg.value += 1
+            # is this step an output step?
+            if INC in self.output_steps:
+                output_step = True
+                outIND += 1
+            else:
+                output_step = False
+            
+            self.taylor_step(states, Lp, self.dt)
+            
+            # calculate average crss for the whole polycrystal - used as a stress scale in convergence criterions
+            self.crss_mean = np.mean(states.crss)
+            
+            # saving the results
+            if output_step:
+                if 'average_stress' in self.result_vars['polycrystal_results']:
+                    self.average_stress[:,:,outIND] = np.mean(states.stress_glob, axis=0)
+                if 'average_slip' in self.result_vars['polycrystal_results']:
+                    self.average_slip[outIND] = np.sum(states.sliprates)*self.dt/self.Ngrains
+                states.save_results(outIND)
+            
+            # checkpoint of the whole state
+            if self.checkpoint_due(INC):
+                self.save_checkpoint(TIME, INC, outIND, states.arrays(), states.results)
+        
+        states.to_grains(self.grains)
+        
+    def TaylorFC_parallel(self, workers):
+        '''
+        Full-constrained Taylor model with the grains sharded over a pool of "workers" processes. 
+        Every process advances its shard by the batched engine (taylor_step), the grain states 
+        are kept in shared memory and only the per-step sums for the polycrystal averages are 
+        sent back to be reduced here. It gives the same results as TaylorFC_batched.
+        '''
+        wProg = ipywidgets.IntProgress(min=0, max=self.Nsteps, description='Running:',
+        bar_style='', # 'success', 'info', 'warning', 'danger' or ''
+        orientation='horizontal')
+        display(wProg)
+        
+        states = GrainStates(self.grains, self.hardening_law, self.options.get('orientation_store', 'matrix'))
+        states.init_results_output(self.result_vars, self.sink)
+        shared = SharedArrays(states.arrays())
+        states.assign(shared.arrays)
+        shards = [(s[0], s[-1]+1) for s in np.array_split(np.arange(self.Ngrains), workers) if len(s) > 0]
+        pool   = Pool(len(shards), initializer=_parallel_init, initargs=(self.parallel_template(), shared.spec))
+        
+        try:
+            Lp = self.L
+            # continue from the checkpoint of an interrupted run (if any)
+            TIME, INC, outIND = self.restore_checkpoint(shared.arrays, states.results)
+            wProg.value = INC
+            
+            while INC < self.Nsteps:
+                # update time
+                TIME += self.dt
+                # update step counter
+                INC  += 1
+                # update deformation gradient
+                self.Fp = (np.eye(3) + Lp*self.dt) @ self.Fp
+                # update the progress bar
+                wProg.value += 1
+                # is this step an output step?
+                if INC in self.output_steps:
+                    output_step = True
+                    outIND += 1
+                else:
+                    output_step = False
+                
+                sums = pool.map(_parallel_taylor_step, [(start, stop, Lp, self.dt) for start, stop in shards])
+                stress_sum = sum(ps[0] for ps in sums)
+                slip_sum   = sum(ps[1] for ps in sums)
+                
+                # calculate average crss for the whole polycrystal - used as a stress scale in convergence criterions
+                self.crss_mean = sum(ps[2] for ps in sums)/(24*self.Ngrains)
+                
+                # saving the results
+                if output_step:
+                    if 'average_stress' in self.result_vars['polycrystal_results']:
+                        self.average_stress[:,:,outIND] = stress_sum/self.Ngrains
+                    if 'average_slip' in self.result_vars['polycrystal_results']:
+                        self.average_slip[outIND] = slip_sum*self.dt/self.Ngrains
+                    states.save_results(outIND)
+                
+                # checkpoint of the whole state
+                if self.checkpoint_due(INC):
+                    self.save_checkpoint(TIME, INC, outIND, shared.arrays, states.results)
+        finally:
+            pool.close()
+            pool.join()
+            states.assign(shared.copy())
+            shared.close()
+        
+        states.to_grains(self.grains)
+        
+    def parallel_template(self):
+        '''
+        Copy of the polycrystal without grains, clusters, results and the cpfort session, sent once to every 
+        worker process. The workers get the grain states from shared memory and their shard by the task arguments.
+        '''
+        template = copy.copy(self)
+        for attr in ('grains', 'clusters', 'grain_array', 'results', 'orientations', 'average_stress', 'average_slip', 
+                     'cpfort_session'):
+            if hasattr(template, attr):
+                setattr(template, attr, None)
+        return template
+        
+    def checkpoint_due(self, INC):
+        '''Is a checkpoint to be written after step INC?'''
+        return self.checkpoint is not None and INC % self.checkpoint.get('interval', 100) == 0 and INC < self.Nsteps
+    
+    def save_checkpoint(self, TIME, INC, outIND, arrays, results):
+        '''
+        Write the state of the running load into the checkpoint file (uncompressed .npz, replaced atomically): 
+        the step counter, Fp, the polycrystal averages, the state "arrays" of the grains (and grain boundaries) 
+        and the partial grain "results".
+        '''
+        data = {'step'      : np.array([TIME, INC, outIND]),
+                'signature' : np.array(self.run_signature),
+                'Fp'        : self.Fp,
+                'crss_mean' : np.asarray(self.crss_mean)}
+        for name in ('average_stress', 'average_slip'):
+            if getattr(self, name) is not None:
+                data[name] = getattr(self, name)
+        for name, arr in arrays.items():
+            data['state/'+name] = arr
+        for name, res in results.items():
+            if isinstance(res, dict):
+                for key, val in res.items():
+                    data['results/'+name+'/'+key] = val
+            else:
+                data['results/'+name] = res
+        file = self.checkpoint['file']
+        tmp = file+'.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **data)
+        os.replace(tmp, file)
+        
+    def restore_checkpoint(self, arrays, results):
+        '''
+        Restore the state saved by save_checkpoint into the polycrystal, the state "arrays" and the "results" 
+        (in place) if the checkpoint file exists and was written by the same run (run_signature of load). 
+        Returns TIME, INC and outIND to continue from.
+        '''
+        if self.checkpoint is None or not self.checkpoint.get('resume', True) or not os.path.exists(self.checkpoint['file']):
+            return 0., 0, -1
+        data = np.load(self.checkpoint['file'], allow_pickle=True)
+        if 'signature' not in data or data['signature'][()] != self.run_signature:
+            sys.exit('Checkpoint {} belongs to a different run (loading, options or initial state), '
+                     'remove it or pass resume=False.'.format(self.checkpoint['file']))
+        TIME, INC, outIND = data['step']
+        self.Fp        = data['Fp'].copy()
+        self.crss_mean = data['crss_mean'][()]
+        for name in ('average_stress', 'average_slip'):
+            if name in data:
+                getattr(self, name)[...] = data[name]
+        for name, arr in arrays.items():
+            arr[...] = data['state/'+name]
+        for name, res in results.items():
+            if isinstance(res, dict):
+                for key, val in res.items():
+                    val[...] = data['results/'+name+'/'+key]
+            else:
+                res[...] = data['results/'+name]
+        print('Resuming from checkpoint {} at step {}.'.format(self.checkpoint['file'], int(INC)))
+        return TIME, int(INC), int(outIND)
+        
+    def taylor_step(self, states, Lp, dt):
+        '''Advance all grains in "states" by one increment of the full-constrained Taylor model.'''
+        Q  = states.Q
+        QT = Q.transpose(0,2,1)
+        # rotate Lp by Q matrices from global to local (crystal) coord systems
+        Lp_loc = Q @ Lp @ QT
+        # symmetric part of Lp - deformation rate tensors
+        Dp_vec = m2voigt_dev(0.5*(Lp_loc + Lp_loc.transpose(0,2,1)).transpose(1,2,0)).T
+        # skewsymmetric part of Lp - total spin tensors
+        Wp = 0.5*(Lp_loc - Lp_loc.transpose(0,2,1))
+        
+        # run crystal plasticity for all grains
+        states.sliprates, states.stress_loc = self.solve_single_crystals(Dp_vec, states.crss, states.stress_loc)
+        states.total_sliprate = np.sum(states.sliprates, axis=1)
+        
+        # update total slip of the grains
+        states.total_slip += states.total_sliprate*dt
+        
+        if self.hardening_law['model'] != 'RIGID_PLASTIC':
+            # update of the hardening state variables
+            states.hardening(dt)
+        
+        # transform Cauchy stresses to global coord sys
+        states.stress_glob = QT @ states.stress_loc @ Q
+        
+        # calculate spin tensors from slip activity
+        w = states.sliprates @ crystal_properties.Omega.T
+        W_slip = np.zeros((states.Ngrains,3,3))
+        W_slip[:,0,1], W_slip[:,0,2], W_slip[:,1,2] =  w[:,2],  w[:,1],  w[:,0]
+        W_slip[:,1,0], W_slip[:,2,0], W_slip[:,2,1] = -w[:,2], -w[:,1], -w[:,0]
+        
+        W_lattice = Wp - W_slip
+        
+        # update grain orientations (incremental scheme using matrix exponential)
+        if 'q' in states.state_vars:
+            # quaternion store, renormalised every step, the matrices are derived from it
+            dq = spin2quat(W_lattice*dt)
+            states.R = quat2matrix(dq)
+            # Q = R^T @ Q, i.e. the conjugate increment applied from the left
+            dq[:,1:] *= -1.
+            q  = quat_multiply(dq, states.q)
+            states.q = q/np.linalg.norm(q, axis=1, keepdims=True)
+            states.Q = quat2matrix(states.q)
+        else:
+            states.R = spin_exponential(W_lattice*dt)
+            states.Q = states.R.transpose(0,2,1) @ Q
+        
+    def solve_single_crystals(self, Dp_vec, crss, stress_prev=None):
+        '''
+        Solve the single crystal problems for an (N,5) array of plastic strain rates "Dp_vec" and an (N,24) 
+        array of CRSS for all grains at once. The slip rates are found by the batched linear programming 
+        (find_slips_batched), or with solve_slips='vertex' by picking the Bishop-Hill vertices first. The Taylor 
+        ambiguity 'SVD' and the rate-dependent option 'RD' are solved for all grains at once, 'RD' starting from 
+        the (N,3,3) stresses "stress_prev" of the previous step. Only the grains with less than 5 active slip 
+        systems (ambiguous stress) and the options 'QP' and 'average' need the stress or slip corners and are 
+        solved in a loop over the grains by a scratch Grain. Returns (N,24) slip rates and (N,3,3) local stresses.
+        '''
+        N = len(Dp_vec)
+        sliprates  = np.zeros((N,24))
+        stress_loc = np.zeros((N,3,3))
+        solve_slips = self.options.get('solve_slips', 'simplex')
+        solve_Tayloramb = self.options['solve_Tayloramb']
+        todo = np.arange(N)
+        
+        if solve_Tayloramb in ['SVD', 'RD']:
+            if solve_slips == 'vertex':
+                # Bishop-Hill vertices for all grains at once, the slip rates are the minimum-norm 
+                # solutions at the vertices (as in "solveambSVD") if those are non-negative
+                S_vertex, vertexID = find_stress_vertices(Dp_vec, crss)
+                found = np.where(vertexID >= 0)[0]
+                gm = np.einsum('nij,nj->ni', crystal_properties.vertex_pinv[vertexID[found]], Dp_vec[found])
+                negative = np.any(gm < -Dtol, axis=1)
+                if np.any(negative):
+                    gm[negative] = solveambSVD_batched(S_vertex[found[negative]], Dp_vec[found[negative]], crss[found[negative]])
+                sliprates[found]  = gm
+                stress_loc[found] = S_vertex[found]
+                todo = np.setdiff1d(todo, found)
+            
+            # linear programming for the remaining grains at once, the stress follows from the 5 active 
+            # slip systems of the solution (as in "getstress")
+            gm, basis, ok = find_slips_batched(Dp_vec[todo], crss[todo])
+            found, basis = todo[ok], basis[ok]
+            x = np.linalg.solve(crystal_properties.S_proj[basis], np.take_along_axis(crss[found], basis, axis=1)[...,None])[...,0]
+            stress_loc[found] = voigt2m_dev(x.T).transpose(2,0,1)
+            if solve_Tayloramb == 'SVD':
+                sliprates[found] = solveambSVD_batched(stress_loc[found], Dp_vec[found], crss[found])
+            else:
+                sliprates[found] = gm[ok]
+            todo = todo[~ok]
+        
+        # ambiguous stresses and the slip corners of 'QP' and 'average', solved by a reused scratch grain
+        scratch = Grain([0.,0.,0.], self.hardening_law)
+        for i in todo:
+            scratch.Dp_vec = Dp_vec[i]
+            scratch.crss   = crss[i]
+            scratch.solveSingleCrystal(self.result_vars, solve_Tayloramb=None if solve_Tayloramb == 'RD' else solve_Tayloramb, 
+                                                         SRS=self.options['SRS'], 
+                                                         gm0=self.options['gmdot0'],
+                                                         solve_slips=solve_slips)
+            sliprates[i]  = scratch.sliprates
+            stress_loc[i] = scratch.stress_loc
+        
+        if solve_Tayloramb == 'RD':
+            # the rate-independent solutions are the starting points and give the reference slip rates
+            sliprates, stress_loc = solveambRD_batched(stress_loc, Dp_vec, crss, self.options['SRS'], 
+                                                       np.mean(sliprates, axis=1), stress_prev)
+        return sliprates, stress_loc
+        
+
     def Alamel(self):
         wProg = ipywidgets.IntProgress(min=0, max=self.Nsteps, description='Running:',
         bar_style='', # 'success', 'info', 'warning', 'danger' or ''
         orientation='horizontal')
         display(wProg)
         
-        TIME   = 0.
-        INC    = 0
-        outIND = -1
         Lp = self.L
+        gb_Q = np.array([c.gb.Q for c in self.clusters])
+        # continue from the checkpoint of an interrupted run (if any)
+        TIME, INC, outIND = self.restore_checkpoint(alamel_checkpoint_arrays(dict(self.grain_array.arrays(), gb_Q=gb_Q)), self.results)
+        for c, Q in zip(self.clusters, gb_Q):
+            c.gb.Q = Q.copy()
+        wProg.value = INC
         
         while INC < self.Nsteps:
             # update time
@@ -2013,69 +2931,10 @@ class Polycrystal:
             for cID, cluster in enumerate(self.clusters):
                 g1 = cluster.g1
                 g2 = cluster.g2
-                gb = cluster.gb
-              
-                # rotate Lp into local (crystal) coord system for each grain
-                g1.Dp = getsym(g1.Q @ Lp @ g1.Q.T)
-                g2.Dp = getsym(g2.Q @ Lp @ g2.Q.T)
-
-                g1.Dp_vec = m2voigt_dev(g1.Dp)
-                g2.Dp_vec = m2voigt_dev(g2.Dp)
-                
-                # rotate Lp from global to local coord system given by orientation of the grain boundary between the grain pairs) 
-                Lp_gb = gb.Q @ Lp @ gb.Q.T
                 
-                # rotate Schmidt matrix from grain to grain boundary coord sys
-                g1.Qb = gb.Q @ g1.Q.T
-                g2.Qb = gb.Q @ g2.Q.T
-                
-                H = g1.Qb
-                # rotated symR1 into grain1 coord sys - Voigt notation
-                symR1g1 = np.array([ H[0,0]*H[2,0], H[0,1]*H[2,1], 0.5*(H[0,1]*H[2,2]+H[0,2]*H[2,1]), 0.5*(H[0,0]*H[2,2]+H[0,2]*H[2,0]), 0.5*(H[0,0]*H[2,1]+H[0,1]*H[2,0]) ])
-                symR2g1 = np.array([ H[1,0]*H[2,0], H[1,1]*H[2,1], 0.5*(H[1,1]*H[2,2]+H[1,2]*H[2,1]), 0.5*(H[1,0]*H[2,2]+H[1,2]*H[2,0]), 0.5*(H[1,0]*H[2,1]+H[1,1]*H[2,0]) ])
-                H = g2.Qb
-                # rotated symR1 into grain1 coord sys - Voigt notation
-                symR1g2 = np.array([ H[0,0]*H[2,0], H[0,1]*H[2,1], 0.5*(H[0,1]*H[2,2]+H[0,2]*H[2,1]), 0.5*(H[0,0]*H[2,2]+H[0,2]*H[2,0]), 0.5*(H[0,0]*H[2,1]+H[0,1]*H[2,0]) ])
-                symR2g2 = np.array([ H[1,0]*H[2,0], H[1,1]*H[2,1], 0.5*(H[1,1]*H[2,2]+H[1,2]*H[2,1]), 0.5*(H[1,0]*H[2,2]+H[1,2]*H[2,0]), 0.5*(H[1,0]*H[2,1]+H[1,1]*H[2,0]) ])
-
-                # find slips minimizing the total internal energy for the whole cluster including relaxations by simplex linear programming method
-                cluster.findslips_relaxed(symR1g1, symR2g1, symR1g2, symR2g2)
-                # caluclate stresses in the grains
-                cluster.getstress(symR1g1, symR2g1, symR1g2, symR2g2)
+                self.alamel_cluster_step(cluster, Lp)
                 # calculate average crss for the whole polycrystal - a kind of stress scale
                 self.crss_mean += (g1.crss + g2.crss)/self.Ngrains
-                
-                for i, g in enumerate((g1, g2)):
-                    # velocity gradients after relaxation for each grain  (expressed in grain boundary sys)
-                    Lp_gb_relaxed = Lp_gb - crystal_properties.R1*g.relaxation_sliprates[0] - crystal_properties.R2*g.relaxation_sliprates[1]
-                    Lp_g_relaxed = g.Qb.T @ Lp_gb_relaxed @ g.Qb   # into grain coord sys 
-                    g.Dp = getsym(Lp_g_relaxed)
-                    g.Dp_vec = m2voigt_dev(g.Dp)
-                    Wp = getskw(Lp_g_relaxed)
-
-                    # solve Taylor ambiguity by singular value decomposition method
-#                     g.solveambSVD()
-                    
-                    # update total slip for both grains in the cluster
-                    g.total_slip += g.total_sliprate*self.dt
-                    # update of the hardening state variables for both grains
-                    if self.hardening_law['model'] != 'RIGID_PLASTIC':
-                        g.hardening(self.dt)
-                    
-                    # calculate spin tensor from slip activity
-                    w = np.dot(crystal_properties.Omega, g.sliprates)
-                    W_slip = np.array([[ 0.  ,  w[2], w[1]],
-                                       [-w[2],  0.  , w[0]],
-                                       [-w[1], -w[0], 0.  ]])
-                    W_lattice = Wp - W_slip
-                    W_lattice = g.R @ W_lattice @ g.R.T
-                    g.R = np.dot(np.linalg.inv(np.eye(3)-W_lattice*self.dt/2.),np.dot((np.eye(3)+W_lattice*self.dt/2.), g.R))
-#                     g.R = scipy.linalg.expm(W_lattice*self.dt)   # give identical result as the second-order scheme above
-                    g.Q = g.R.T @ g.Q0
-
-                # rotate grain boundary
-                if self.rotate_boundary:
-                    gb.updateOrientation(self.Fp)
             
                 # saving the results
                 if output_step:
@@ -2085,8 +2944,143 @@ class Polycrystal:
                         if 'average_slip' in self.result_vars['polycrystal_results']:
                             self.average_slip[outIND] += np.sum(g.sliprates)*self.dt/self.Ngrains
                         g.save_results(self.result_vars, outIND)  
+            
+            # checkpoint of the whole state
+            if self.checkpoint_due(INC):
+                self.save_checkpoint(TIME, INC, outIND, alamel_checkpoint_arrays(dict(self.grain_array.arrays(), 
+                                                                                      gb_Q=np.array([c.gb.Q for c in self.clusters]))), self.results)
         
     
+    def Alamel_parallel(self, workers):
+        '''
+        Alamel model with the clusters sharded over a pool of "workers" processes. The states of 
+        the grains and grain boundaries are kept in shared memory and only the per-step sums for 
+        the polycrystal averages are sent back to be reduced here. The grain results are written from 
+        the shared arrays and the Grain objects are loaded once after the run. It gives the same results as Alamel.
+        '''
+        wProg = ipywidgets.IntProgress(min=0, max=self.Nsteps, description='Running:',
+        bar_style='', # 'success', 'info', 'warning', 'danger' or ''
+        orientation='horizontal')
+        display(wProg)
+        
+        shared = SharedArrays(_alamel_arrays(self.clusters))
+        shards = [(s[0], s[-1]+1) for s in np.array_split(np.arange(self.Nclusters), workers) if len(s) > 0]
+        pool   = Pool(len(shards), initializer=_parallel_init, initargs=(self.parallel_template(), shared.spec))
+        
+        try:
+            Lp = self.L
+            # continue from the checkpoint of an interrupted run (if any)
+            TIME, INC, outIND = self.restore_checkpoint(alamel_checkpoint_arrays(shared.arrays), self.results)
+            wProg.value = INC
+            
+            while INC < self.Nsteps:
+                # update time
+                TIME += self.dt
+                # update step counter
+                INC  += 1
+                # update deformation gradient
+                self.Fp = (np.eye(3) + Lp*self.dt) @ self.Fp
+                # update the progress bar
+                wProg.value += 1
+                # is this step an output step?
+                if INC in self.output_steps:
+                    output_step = True
+                    outIND += 1
+                else:
+                    output_step = False
+                
+                sums = pool.map(_parallel_alamel_step, [(start, stop, Lp, self.Fp) for start, stop in shards])
+                
+                # calculate average crss for the whole polycrystal - a kind of stress scale
+                self.crss_mean = sum(ps[2] for ps in sums)/self.Ngrains
+                
+                # saving the results
+                if output_step:
+                    if 'average_stress' in self.result_vars['polycrystal_results']:
+                        self.average_stress[:,:,outIND] += sum(ps[0] for ps in sums)/self.Ngrains
+                    if 'average_slip' in self.result_vars['polycrystal_results']:
+                        self.average_slip[outIND] += sum(ps[1] for ps in sums)*self.dt/self.Ngrains
+                    # written from the shared arrays, the grains are loaded once after the run
+                    _save_alamel_results(self.results, shared, outIND)
+                
+                # checkpoint of the whole state
+                if self.checkpoint_due(INC):
+                    self.save_checkpoint(TIME, INC, outIND, alamel_checkpoint_arrays(shared.arrays), self.results)
+        finally:
+            pool.close()
+            pool.join()
+            for cID, cluster in enumerate(self.clusters):
+                for k, g in enumerate((cluster.g1, cluster.g2)):
+                    _load_grain(g, shared, 2*cID+k)
+                cluster.gb.Q = shared['gb_Q'][cID].copy()
+            shared.close()
+    
+    def alamel_cluster_step(self, cluster, Lp):
+        '''Advance one grain cluster (two grains and their grain boundary) by one increment of the Alamel model.'''
+        g1 = cluster.g1
+        g2 = cluster.g2
+        gb = cluster.gb
+      
+        # rotate Lp into local (crystal) coord system for each grain
+        g1.Dp = getsym(g1.Q @ Lp @ g1.Q.T)
+        g2.Dp = getsym(g2.Q @ Lp @ g2.Q.T)
+
+        g1.Dp_vec = m2voigt_dev(g1.Dp)
+        g2.Dp_vec = m2voigt_dev(g2.Dp)
+        
+        # rotate Lp from global to local coord system given by orientation of the grain boundary between the grain pairs) 
+        Lp_gb = gb.Q @ Lp @ gb.Q.T
+        
+        # rotate Schmidt matrix from grain to grain boundary coord sys
+        g1.Qb = gb.Q @ g1.Q.T
+        g2.Qb = gb.Q @ g2.Q.T
+        
+        H = g1.Qb
+        # rotated symR1 into grain1 coord sys - Voigt notation
+        symR1g1 = np.array([ H[0,0]*H[2,0], H[0,1]*H[2,1], 0.5*(H[0,1]*H[2,2]+H[0,2]*H[2,1]), 0.5*(H[0,0]*H[2,2]+H[0,2]*H[2,0]), 0.5*(H[0,0]*H[2,1]+H[0,1]*H[2,0]) ])
+        symR2g1 = np.array([ H[1,0]*H[2,0], H[1,1]*H[2,1], 0.5*(H[1,1]*H[2,2]+H[1,2]*H[2,1]), 0.5*(H[1,0]*H[2,2]+H[1,2]*H[2,0]), 0.5*(H[1,0]*H[2,1]+H[1,1]*H[2,0]) ])
+        H = g2.Qb
+        # rotated symR1 into grain1 coord sys - Voigt notation
+        symR1g2 = np.array([ H[0,0]*H[2,0], H[0,1]*H[2,1], 0.5*(H[0,1]*H[2,2]+H[0,2]*H[2,1]), 0.5*(H[0,0]*H[2,2]+H[0,2]*H[2,0]), 0.5*(H[0,0]*H[2,1]+H[0,1]*H[2,0]) ])
+        symR2g2 = np.array([ H[1,0]*H[2,0], H[1,1]*H[2,1], 0.5*(H[1,1]*H[2,2]+H[1,2]*H[2,1]), 0.5*(H[1,0]*H[2,2]+H[1,2]*H[2,0]), 0.5*(H[1,0]*H[2,1]+H[1,1]*H[2,0]) ])
+
+        # find slips minimizing the total internal energy for the whole cluster including relaxations by simplex linear programming method
+        cluster.findslips_relaxed(symR1g1, symR2g1, symR1g2, symR2g2)
+        # caluclate stresses in the grains
+        cluster.getstress(symR1g1, symR2g1, symR1g2, symR2g2)
+        
+        for i, g in enumerate((g1, g2)):
+            # velocity gradients after relaxation for each grain  (expressed in grain boundary sys)
+            Lp_gb_relaxed = Lp_gb - crystal_properties.R1*g.relaxation_sliprates[0] - crystal_properties.R2*g.relaxation_sliprates[1]
+            Lp_g_relaxed = g.Qb.T @ Lp_gb_relaxed @ g.Qb   # into grain coord sys 
+            g.Dp = getsym(Lp_g_relaxed)
+            g.Dp_vec = m2voigt_dev(g.Dp)
+            Wp = getskw(Lp_g_relaxed)
+
+            # solve Taylor ambiguity by singular value decomposition method
+#                     g.solveambSVD()
+            
+            # update total slip for both grains in the cluster
+            g.total_slip += g.total_sliprate*self.dt
+            # update of the hardening state variables for both grains
+            if self.hardening_law['model'] != 'RIGID_PLASTIC':
+                g.hardening(self.dt)
+            
+            # calculate spin tensor from slip activity
+            w = np.dot(crystal_properties.Omega, g.sliprates)
+            W_slip = np.array([[ 0.  ,  w[2], w[1]],
+                               [-w[2],  0.  , w[0]],
+                               [-w[1], -w[0], 0.  ]])
+            W_lattice = Wp - W_slip
+            W_lattice = g.R @ W_lattice @ g.R.T
+            g.R = spin_cayley(W_lattice*self.dt) @ g.R
+#                     g.R = scipy.linalg.expm(W_lattice*self.dt)   # give identical result as the second-order scheme above
+            g.Q = g.R.T @ g.Q0
+
+        # rotate grain boundary
+        if self.rotate_boundary:
+            gb.updateOrientation(self.Fp)
+
     def read_input_orientations(self):
 
         if type(self.orientations) is dict: 
@@ -2104,11 +3098,12 @@ class Polycrystal:
         grain_ori = np.asarray(grain_ori)
         if len(grain_ori.shape) == 1:
             grain_ori = np.reshape(grain_ori,(1,len(grain_ori)))
-        tmp_grains = []
+        if self.grain_interaction in ('ALAMEL','ALAMEL3') and len(grain_ori) % 2 != 0:
+            grain_ori = grain_ori[:-1]
+            print('You specified odd number of grains for ALAMEL-type two-grain interaction model. The last orientation will therefore be ommitted.')
+        # all grains are kept in one array-backed container, the grains are its views
+        tmp_grains = GrainArray(grain_ori, self.hardening_law)
         tmp_grain_boundaries = []
-        for i, ori in enumerate(grain_ori):
-            grain = Grain(ori, self.hardening_law)
-            tmp_grains.append(grain)
         if gb_ori is not None:
             gb_ori = np.asarray(gb_ori)
             if len(gb_ori.shape) == 1:
@@ -2120,9 +3115,6 @@ class Polycrystal:
             tmp_grain_boundaries = []
         
         if self.grain_interaction in ('ALAMEL','ALAMEL3'):
-            if len(tmp_grains) % 2 != 0:
-                tmp_grains.pop()
-                print('You specified odd number of grains for ALAMEL-type two-grain interaction model. The last orientation will therefore be ommitted.')
             if  gb_ori is not None:
                 diff = len(tmp_grain_boundaries) - len(tmp_grains)//2 
                 if  diff < 0:
@@ -2151,6 +3143,9 @@ class Polycrystal:
         else:
             self.grains = tmp_grains
             self.Ngrains = len(self.grains)
+        # the grain results of the whole polycrystal
+        self.grain_array = tmp_grains
+        self.results     = tmp_grains.results
     
     def rotate(self, R):
         if self.grain_interaction == 'FCTAYLOR':
@@ -2165,7 +3160,7 @@ class Polycrystal:
                 
    
     # calculate r-values
-    def getRvalues(self, tensile_axis=[1,0,0], normal_axis=[0,0,1], options={'increment_jacobian': 1.e-3}):
+    def getRvalues(self, tensile_axis=[1,0,0], normal_axis=[0,0,1], options={'increment_jacobian': 1.e-3}, cache=True):
         R = np.zeros((3,3))
         tensile_axis = np.asarray(tensile_axis)/np.linalg.norm(tensile_axis)
         normal_axis = np.asarray(normal_axis)/np.linalg.norm(normal_axis)
@@ -2180,36 +3175,139 @@ class Polycrystal:
         self.rotate(R)
         
         sdir = [2./3., -1./3., 0., 0., 0.]
-        self.init_cpfort()
+        session = self.init_cpfort()
+        # the result is addressed by the (rotated) polycrystal state packed for cpfort and the options
+        key = None
+        if cache:
+            key = content_hash('getRvalues', session.state, self.grain_interaction, options)
+            cached = result_cache.get(key)
+            if cached is not None:
+                self.rotate(R.T)
+                return cached
         # boundary condictions
-        cpfort.globals.ind_sdir = [True, True, False, False, False]
-        cpfort.globals.ind_sabs = [False, False, True, True, True]
-        cpfort.globals.ind_d    = [False, False, False, False, False]
-        cpfort.globals.sdir_prescribed   = sdir
-        cpfort.globals.sabs_prescribed   = np.zeros(5)
-        cpfort.globals.d_prescribed      = np.zeros(5)
-        cpfort.globals.w_prescribed      = np.zeros((3,3))
-        cpfort.globals.eps4jacobian      = options['increment_jacobian']
-        cpfort.scylglobals.scylon        = options['use_SCYL']
-        cpfort.scylglobals.scylexp       = options['SCYL_exponent']
-        cpfort.globals.grain_interaction = grain_interaction_dict[self.grain_interaction]
-        Dsolved, Ssolved, info, resid, nfev = cpfort.crystal_plasticity.solve_mixbc(dguess=sdir, n=5)
+        session.set(ind_sdir          = [True, True, False, False, False],
+                    ind_sabs          = [False, False, True, True, True],
+                    ind_d             = [False, False, False, False, False],
+                    sdir_prescribed   = sdir,
+                    sabs_prescribed   = np.zeros(5),
+                    d_prescribed      = np.zeros(5),
+                    w_prescribed      = np.zeros((3,3)),
+                    eps4jacobian      = options['increment_jacobian'],
+                    grain_interaction = grain_interaction_dict[self.grain_interaction])
+        session.set('scylglobals', scylon=options['use_SCYL'], scylexp=options['SCYL_exponent'])
+        (Dsolved, Ssolved, info, resid, nfev), fort = session.call('solve_mixbc', dguess=sdir, n=5)
         self.rotate(R.T)
         
         rvalue = Dsolved[1,1]/Dsolved[2,2]
         yield_stress = Ssolved[0,0]-(Ssolved[1,1]+Ssolved[2,2])/2
+        if key is not None:
+            result_cache.put(key, (rvalue, yield_stress))
         
         return rvalue, yield_stress
     
+    # Lankford profile: r-values and yield stresses of tensile tests at several angles in the sheet plane
+    def getRvalue_profile(self, angles=np.arange(0., 91., 5.), normal_axis=[0,0,1], 
+                          options={'increment_jacobian': 1.e-3, 'use_SCYL':False, 'SCYL_exponent':100}, parallel=None, 
+                          cache=True):
+        '''
+        R-values and uniaxial yield stresses of tensile tests along the directions at "angles" [degrees] from the 
+        rolling direction, turned about normal_axis. The rolling direction is x (y if normal_axis is along x) projected 
+        onto the sheet plane. Unlike getRvalues the polycrystal is not rotated: it is packed for cpfort once and the 
+        uniaxial stress of every angle is prescribed in the sample frame. With parallel={'workers': 4} the angles are 
+        solved by a pool of processes. Returns the arrays r and yield_stress, the planar anisotropy 
+        delta_r = (r0 - 2 r45 + r90)/2 and the average r_mean = (r0 + 2 r45 + r90)/4 (r interpolated at 0, 45 
+        and 90 degrees, nan if the angles do not cover 0 to 90 degrees).
+        '''
+        angles = np.atleast_1d(np.asarray(angles, dtype=float))
+        normal_axis = np.asarray(normal_axis)/np.linalg.norm(normal_axis)
+        rolling_axis = [1.,0.,0.] if not np.isclose(abs(normal_axis[0]), 1.) else [0.,1.,0.]
+        rolling_axis = rolling_axis - np.dot(rolling_axis, normal_axis)*normal_axis
+        rolling_axis /= np.linalg.norm(rolling_axis)
+        transv_axis = np.cross(normal_axis, rolling_axis)
+        
+        session = self.init_cpfort()
+        key = None
+        if cache:
+            key = content_hash('getRvalue_profile', session.state, self.grain_interaction, angles, normal_axis, options)
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        # frames (tensile axis, transverse axis, normal axis) of the tests and the prescribed stress directions
+        frames = []
+        points = []
+        for ang in np.radians(angles):
+            R = np.zeros((3,3))
+            R[:,0] = np.cos(ang)*rolling_axis + np.sin(ang)*transv_axis
+            R[:,1] = np.cross(normal_axis, R[:,0])
+            R[:,2] = normal_axis
+            frames.append(R)
+            sdir = m2voigt_dev(deviator(np.outer(R[:,0], R[:,0])))
+            bc = {'ind_sdir'        : np.full(5, True, dtype=bool),
+                  'ind_sabs'        : np.full(5, False, dtype=bool),
+                  'ind_d'           : np.full(5, False, dtype=bool),
+                  'sdir_prescribed' : sdir,
+                  'sabs_prescribed' : np.zeros(5),
+                  'd_prescribed'    : np.zeros(5),
+                  'w_prescribed'    : np.zeros((3,3))}
+            points.append((bc, sdir))
+        
+        session.set(eps4jacobian      = options['increment_jacobian'],
+                    grain_interaction = grain_interaction_dict[self.grain_interaction])
+        session.set('scylglobals', scylon=options['use_SCYL'], scylexp=options['SCYL_exponent'])
+        if parallel is None:
+            solutions = [_yield_locus_solve(session, *point) for point in points]
+        else:
+            pool = Pool(parallel.get('workers', os.cpu_count()), initializer=_yield_locus_init, initargs=(session,))
+            try:
+                solutions = pool.map(_yield_locus_worker, points)
+            finally:
+                pool.close()
+                pool.join()
+        
+        rvalue = np.zeros(len(angles))
+        yield_stress = np.zeros(len(angles))
+        for k, (R, (Dsolved, Ssolved, info, resid, nfev_warm, nfev_cold)) in enumerate(zip(frames, solutions)):
+            # strain rate and stress in the frame of the test
+            D = R.T @ Dsolved @ R
+            S = R.T @ Ssolved @ R
+            rvalue[k] = D[1,1]/D[2,2]
+            yield_stress[k] = S[0,0]-(S[1,1]+S[2,2])/2
+        
+        if angles.min() <= 0. and angles.max() >= 90.:
+            order = np.argsort(angles)
+            r0, r45, r90 = np.interp([0., 45., 90.], angles[order], rvalue[order])
+            delta_r = (r0 - 2.*r45 + r90)/2.
+            r_mean  = (r0 + 2.*r45 + r90)/4.
+        else:
+            delta_r, r_mean = np.nan, np.nan
+        if key is not None:
+            result_cache.put(key, (rvalue, yield_stress, delta_r, r_mean))
+        
+        return rvalue, yield_stress, delta_r, r_mean
+    
     
         
         
     # generate yield locus
     def yield_locus(self, locus_type=None, user_input=None, input_type='strain', number_of_points=None, plot_axes=None, 
-                    options = {'increment_jacobian': 1.e-3, 'tol': 1., 'use_SCYL':False, 'SCYL_exponent':100}):
+                    options = {'increment_jacobian': 1.e-3, 'tol': 1., 'use_SCYL':False, 'SCYL_exponent':100}, parallel=None, 
+                    adaptive=None, continuation=False, cache=True):
         
         locus_type = locus_type.lower()
-        self.init_cpfort()
+        session = self.init_cpfort()
+        # the locus is addressed by the polycrystal state packed for cpfort (orientations, hardening variables, 
+        # crystal structure) and the arguments, repeated requests are served by result_cache. The packed state is 
+        # built from the python grains, for RIGID_PLASTIC it holds only the initial hardening parameter (constant 
+        # crss). So the key is only valid while the python grain state is in sync with the state cpfort computes 
+        # with, as after the hand-over of a fortran load (save_results_taylorfort/save_results_alamelfort).
+        key = None
+        if cache:
+            key = content_hash('yield_locus', session.state, self.grain_interaction, locus_type, user_input, input_type, 
+                               number_of_points, plot_axes, options, adaptive, continuation)
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
         
         if locus_type == '2d':
             normal_components = [(0,0),(1,1),(2,2)]
@@ -2243,132 +3341,73 @@ class Polycrystal:
             display(wProg)    
                 
             angles = np.linspace(0, 2.*np.pi, number_of_points)
-            YL = np.zeros((3,3,number_of_points*len(s0_list)))
-            R = np.zeros(number_of_points*len(s0_list))
             non_converg_stress = 0
             
-            for s0i, s0 in enumerate(s0_list):
-                for ind, ang in enumerate(angles):
-                    wProg.value += 1
-#                     print('')
-#                     print('{}: angle {}'.format(ind, np.rad2deg(ang)))
-#                     print('')
-                    Sdir = np.zeros((3,3))
-                    Sabs = np.zeros((3,3))
-                    ind_Sdir = np.full((3, 3), False, dtype=bool)
-                    ind_Sabs = np.full((3, 3), True, dtype=bool)
-                    
-                    if xij in shear_components: # xij is a shear component
-                        if yij in shear_components: # both are shear stress components
-                            Sdir[xi, xj], Sdir[xj, xi] = np.cos(ang), np.cos(ang)
-                            Sdir[yi, yj], Sdir[yj, yi] = np.sin(ang), np.sin(ang)
-                            ind_Sdir[xi, xj], ind_Sdir[xj, xi] = True, True
-                            ind_Sdir[yi, yj], ind_Sdir[yj, yi] = True, True
-                            ind_Sabs[xi, xj], ind_Sabs[xj, xi] = False, False
-                            ind_Sabs[yi, yj], ind_Sabs[yj, yi] = False, False
-                            if zij in normal_components:
-                                Sabs[zi,zj] = 2./3.*s0
-                                rest_normal = [normal for normal in normal_components if normal != zij]
-                                for rn in rest_normal:
-                                    Sabs[rn[0], rn[1]] = -1./3.*s0
-                            elif zij in shear_components:
-                                Sabs[zi,zj] = s0
-                                Sabs[zj,zi] = s0
-                            elif zij is not None:
-                                sys.exit('Yield surface plotting problem...')
-                            
-                        else: # yij is a normal component
-                            Sdir[xi, xj] = np.cos(ang)
-                            Sdir[xj, xi] = np.cos(ang)
-                            Sdir[yi, yj] = 2./3.*np.sin(ang)
-                            ind_Sdir[xi, xj], ind_Sdir[xj, xi] = True, True
-                            ind_Sdir[yi, yj] = True
-                            ind_Sabs[xi, xj], ind_Sabs[xj, xi] = False, False
-                            ind_Sdir[yi, yj] = False
-                            rest_normal = [normal for normal in normal_components if normal != yij]
-                            for rn in rest_normal:
-                                Sdir[rn[0], rn[1]] = -1./3.*np.sin(ang)
-                                ind_Sdir[rn[0], rn[1]] = True
-                                ind_Sabs[rn[0], rn[1]] = False
-                            if zij in normal_components:
-                                print('Out-of-plane stress component cannot be a normal component for this plot.')
-                            elif zij in shear_components:
-                                Sabs[zi, zj] = s0
-                                Sabs[zj, zi] = s0
-                            elif zij is not None:
-                                sys.exit('Yield surface plotting problem...')
-                                
-                    else: # xij is a normal component
-                        if yij in shear_components: # yij is a shear component
-                            Sdir[yi, yj] = np.sin(ang)
-                            Sdir[yj, yi] = np.sin(ang)
-                            Sdir[xi, xj] = 2./3.*np.cos(ang)
-                            ind_Sdir[yi, yj], ind_Sdir[yj, yi] = True, True
-                            ind_Sdir[xi, xj] = True
-                            ind_Sabs[yi, yj], ind_Sabs[yj, yi] = False, False
-                            ind_Sabs[xi, xj] = False
-                            rest_normal = [normal for normal in normal_components if normal != xij]
-                            for rn in rest_normal:
-                                Sdir[rn[0], rn[1]] = -1./3.*np.cos(ang)
-                                ind_Sdir[rn[0], rn[1]] = True
-                                ind_Sabs[rn[0], rn[1]] = False
-                            if zij in normal_components:
-                                print('Out-of-plane stress component cannot be a normal component for this plot.')
-                            elif zij in shear_components:
-                                Sabs[zi, zj] = s0
-                                Sabs[zj, zi] = s0
-                            elif zij is not None:
-                                sys.exit('Yield surface plotting problem...')
-                                
-                        else: # both are normal stress components
-                            rest_normal = [normal for normal in normal_components if normal not in [xij, yij]]
-                            rest_normal = rest_normal[0] # extract the only tuple from the list
-                            Sdir[xi, xj] = 2./3.*np.cos(ang) - 1./3.*np.sin(ang)
-                            Sdir[yi, yj] = 2./3.*np.sin(ang) - 1./3.*np.cos(ang)
-                            Sdir[rest_normal[0], rest_normal[1]] = -1./3.*np.cos(ang) - 1./3.*np.sin(ang)
-                            ind_Sdir[0, 0], ind_Sdir[1, 1], ind_Sdir[2, 2] = True, True, True
-                            ind_Sabs[0, 0], ind_Sabs[1, 1], ind_Sabs[2, 2] = False, False, False
-                            if zij in normal_components:
-                                print('Out-of-plane stress component cannot be a normal component for this plot.')
-                            elif zij in shear_components:
-                                Sabs[zi, zj] = s0
-                                Sabs[zj, zi] = s0
-                            elif zij is not None:
-                                sys.exit('Yield surface plotting problem...')
-                                
-
-                    # boundary condictions
-                    cpfort.globals.ind_sdir = m2voigt_dev(ind_Sdir)
-                    cpfort.globals.ind_sabs = m2voigt_dev(ind_Sabs)
-                    cpfort.globals.ind_d    = np.full(5, False, dtype=bool)
-                    cpfort.globals.sdir_prescribed = m2voigt_dev(Sdir)
-                    cpfort.globals.sabs_prescribed = m2voigt_dev(Sabs)
-                    cpfort.globals.d_prescribed    = np.zeros(5)
-                    cpfort.globals.w_prescribed    = np.zeros((3,3))
-                    cpfort.globals.eps4jacobian = options['increment_jacobian']
-                    cpfort.globals.grain_interaction = grain_interaction_dict[self.grain_interaction]
-                    cpfort.scylglobals.scylon   = options['use_SCYL']
-                    cpfort.scylglobals.scylexp  = options['SCYL_exponent']
-                    
-                    # initial guess for Dp
-                    if ind == 0:
-                        dguess = m2voigt_dev(Sdir)
+            session.set(eps4jacobian      = options['increment_jacobian'],
+                        grain_interaction = grain_interaction_dict[self.grain_interaction])
+            session.set('scylglobals', scylon=options['use_SCYL'], scylexp=options['SCYL_exponent'])
+            # the points are independent, with parallel={'workers': 4} they are solved by a pool of 
+            # processes with the polycrystal installed into cpfort once per process
+            if parallel is None:
+                workers, pool = 1, None
+            else:
+                workers = parallel.get('workers', os.cpu_count())
+                pool = Pool(workers, initializer=_yield_locus_init, initargs=(session,))
+            
+            try:
+                solutions = []
+                for s0 in s0_list:
+                    points = [yield_locus_point(xij, yij, zij, ang, s0, first=(ind == 0)) for ind, ang in enumerate(angles)]
+                    # with continuation the locus is traced in one arc per process, only the first point of an arc 
+                    # starts from the standard initial guess
+                    if continuation:
+                        arcs = [arc for arc in np.array_split(np.arange(len(points)), workers) if len(arc) > 0]
+                        s0_solutions = self.solve_yield_locus_points(session, pool, points, wProg, 
+                                                                     trace=(angles, options['tol'], len(arcs)))
                     else:
-                        dguess = make_good_guess(Sabs, ind_Sabs, Sdir, ind_Sdir, cpfort.globals.crss_mean)
-                        dguess = m2voigt_dev(dguess)
-                        
-                    Dsolved, Ssolved, info, resid, nfev = cpfort.crystal_plasticity.solve_mixbc(dguess=dguess, n=5)
-                    print('Info: {}'.format(info))
-                    print('Residuals: {}'.format(resid))
-#                     print('Nfev: {}'.format(nfev))
+                        s0_solutions = self.solve_yield_locus_points(session, pool, points, wProg)
+                    # insert points where the locus bends, e.g. adaptive={'tol': 1.e-3, 'max_points': 200}
+                    if adaptive is not None:
+                        _, s0_solutions = self.refine_yield_locus(session, pool, xij, yij, zij, s0, angles, s0_solutions, 
+                                                                  adaptive, options['tol'], continuation, wProg)
+                    solutions += s0_solutions
+            finally:
+                if pool is not None:
+                    pool.close()
+                    pool.join()
+            
+            # function evaluations of the points in the order of YL: of the warm starts, of the solutions from the 
+            # standard initial guess (see _yield_locus_solve) and in total
+            self.yield_locus_nfev_warm = np.array([solution[4] for solution in solutions])
+            self.yield_locus_nfev_cold = np.array([solution[5] for solution in solutions])
+            self.yield_locus_nfev = self.yield_locus_nfev_warm + self.yield_locus_nfev_cold
+            print('Function evaluations: {} for {} points ({:.1f} per point).'.format(np.sum(self.yield_locus_nfev), len(solutions), 
+                                                                                     np.mean(self.yield_locus_nfev)))
+            if continuation:
+                # the saving is taken against solving every point from the standard initial guess, with the mean 
+                # evaluations of the solutions from the initial guess in this run (first points of the arcs and 
+                # fallbacks) as the cold baseline per point. The fallbacks are the difficult points, so it is an 
+                # estimate; the measured saving is the difference of yield_locus_nfev to a run without continuation
+                warm = self.yield_locus_nfev_warm > 0
+                cold = self.yield_locus_nfev_cold > 0
+                self.yield_locus_fallbacks = int(np.sum(warm & cold))
+                baseline = np.mean(self.yield_locus_nfev_cold[cold]) if np.any(cold) else np.nan
+                print('Continuation: {} warm starts ({:.1f} evaluations per point), {} fell back to the initial guess.'.format(
+                      np.sum(warm), np.mean(self.yield_locus_nfev_warm[warm]) if np.any(warm) else 0., self.yield_locus_fallbacks))
+                print('Saved against the initial guess: {:.0f} evaluations (cold baseline {:.1f} per point from {} solutions).'.format(
+                      baseline*len(solutions) - np.sum(self.yield_locus_nfev), baseline, np.sum(cold)))
+            
+            YL = np.zeros((3,3,len(solutions)))
+            R = np.zeros(len(solutions))
+            for k, (Dsolved, Ssolved, info, resid, nfev_warm, nfev_cold) in enumerate(solutions):
+                # after iteration process, save the found homogenized stress "Ssolved" to YL
+                R[k] = max(abs(resid))
+                if max(abs(resid)) < options['tol']:
+                    YL[:,:,k] = Ssolved
+                else:
+                    YL[:,:,k] = np.full((3,3), np.nan)   
+                    non_converg_stress += 1
                     
-                    # after iteration process, save the found homogenized stress "Ssolved" to YL
-                    R[ind+number_of_points*s0i] = max(abs(resid))
-                    if max(abs(resid)) < options['tol']:
-                        YL[:,:,ind+number_of_points*s0i] = Ssolved
-                    else:
-                        YL[:,:,ind+number_of_points*s0i] = np.full((3,3), np.nan)   
-                        non_converg_stress += 1
             rij = normal_components.copy()
             if xij in rij:
                 rij.remove(xij)
@@ -2385,17 +3424,11 @@ class Polycrystal:
                 YL[2,2,:] -= tmp
 
         elif locus_type == 'full':
-            data = np.load('out5D.npy')
-            number_of_points = min(number_of_points, data.shape[0])
+            user_input = deviatoric_directions(number_of_points)
             YL = np.zeros((3,3,number_of_points))
             R = np.zeros(number_of_points)
-            np.random.randint(0,data.shape[0],number_of_points)
-            random_choice = np.arange(data.shape[0])
-            np.random.shuffle(random_choice)
-            random_choice = random_choice[:number_of_points]
-            user_input = data[random_choice,:]
-            cpfort.globals.grain_interaction = grain_interaction_dict[self.grain_interaction]
-            YL, NYLpoints = cpfort.crystal_plasticity.ylfull(user_input.T, input_type, number_of_points)
+            session.set(grain_interaction=grain_interaction_dict[self.grain_interaction])
+            (YL, NYLpoints), fort = session.call('ylfull', user_input.T, input_type, number_of_points)
             YL = YL[:,:NYLpoints]
             YL = voigt2m_dev(YL)
             non_converg_stress = number_of_points - NYLpoints
@@ -2404,17 +3437,79 @@ class Polycrystal:
             number_of_points = user_input.shape[0]
             YL = np.zeros((3,3,number_of_points))
             R = np.zeros(number_of_points)
-            cpfort.globals.grain_interaction = grain_interaction_dict[self.grain_interaction]
-            YL, NYLpoints = cpfort.crystal_plasticity.ylfull(user_input.T, input_type, number_of_points)
+            session.set(grain_interaction=grain_interaction_dict[self.grain_interaction])
+            (YL, NYLpoints), fort = session.call('ylfull', user_input.T, input_type, number_of_points)
             YL = YL[:,:NYLpoints]
             YL = voigt2m_dev(YL)
             non_converg_stress = number_of_points - NYLpoints
         else:
             sys.exit('locus_type not specified. Use "full", "user" or "2D".')
         
+        if key is not None:
+            result_cache.put(key, (YL, R, non_converg_stress))
+        
         return YL, R, non_converg_stress
 
-        
+    def solve_yield_locus_points(self, session, pool, points, wProg, trace=None):
+        '''
+        Solve the yield locus points [(boundary conditions, initial guess), ...] by the session or by the pool. 
+        With trace=(angles, tol, arcs) consecutive points are solved by continuation (yield_locus_trace) in 
+        "arcs" independent arcs of the locus, which are traced in parallel by the pool.
+        '''
+        if trace is None:
+            if pool is None:
+                solutions = (_yield_locus_solve(session, *point) for point in points)
+            else:
+                solutions = pool.imap(_yield_locus_worker, points)
+        else:
+            angles, tol, arcs = trace
+            arcs = [(points[arc[0]:arc[-1]+1], angles[arc[0]:arc[-1]+1], tol) 
+                    for arc in np.array_split(np.arange(len(points)), arcs) if len(arc) > 0]
+            if pool is None:
+                solutions = itertools.chain.from_iterable(yield_locus_trace(session, *arc) for arc in arcs)
+            else:
+                solutions = itertools.chain.from_iterable(pool.imap(_yield_locus_trace_worker, arcs))
+
+        results = []
+        for solution in solutions:
+            # no output per point, the residuals are returned in R and the evaluations are summarised by yield_locus
+            wProg.value += 1
+            results.append(solution)
+        return results
+
+    def refine_yield_locus(self, session, pool, xij, yij, zij, s0, angles, solutions, adaptive, tol, continuation, wProg):
+        '''
+        Bisect the angular intervals of a 2D yield locus whose chord deviates from the locus by more than 
+        adaptive['tol'] times the size of the locus (see yield_locus_deviation), until all intervals are resolved, 
+        the locus has adaptive['max_points'] points or the intervals get narrower than adaptive['min_angle'] [rad]. 
+        With continuation the new points start from the mean of the solutions of their neighbours. 
+        Returns the sorted angles and their solutions.
+        '''
+        deviation_tol = adaptive.get('tol', 1.e-3)
+        max_points = adaptive.get('max_points', 200)
+        min_angle  = adaptive.get('min_angle', 2.*np.pi/1000)
+        angles     = list(angles)
+
+        while len(angles) < max_points:
+            refine = [i for i in range(len(angles)-1) if angles[i+1] - angles[i] > 2.*min_angle and
+                      yield_locus_deviation(solutions[i], solutions[i+1], tol) > deviation_tol]
+            refine = refine[:max_points-len(angles)]
+            if len(refine) == 0:
+                break
+            new_angles = [0.5*(angles[i] + angles[i+1]) for i in refine]
+            points = [yield_locus_point(xij, yij, zij, ang, s0) for ang in new_angles]
+            if continuation:
+                points = [(bc, m2voigt_dev(0.5*(solutions[i][0] + solutions[i+1][0])), dguess, tol) 
+                          for i, (bc, dguess) in zip(refine, points)]
+            wProg.max += len(new_angles)
+            new_solutions = self.solve_yield_locus_points(session, pool, points, wProg)
+            # merge the new points into the locus
+            for i, ang, sol in reversed(list(zip(refine, new_angles, new_solutions))):
+                angles.insert(i+1, ang)
+                solutions.insert(i+1, sol)
+        return angles, solutions
+
+
     # texture visualization
     def plot_orientations(self, plot_type='IPF', marker='.', markersize='1', color='b', levelsODF=None):
         if plot_type.upper() == 'PF':
@@ -2447,7 +3542,11 @@ class Polycrystal:
             a1 = np.arange(0., 0.263, 0.001)
             plt.plot((1.+x2)*np.cos(a1)-1.,(1.+x2)*np.sin(a1),'k')
             
-            if self.grain_interaction != 'FCTAYLOR':
+            x_ipf, y_ipf = self.grain_array.ipf_coordinates('trajectory')
+            if x_ipf.shape[1] > 1:
+                # trajectories of all grains, one line per grain
+                plt.plot(x_ipf.T, y_ipf.T, color=color, marker=marker, markersize=markersize, ls='-', alpha=0.5)
+            elif self.grain_interaction != 'FCTAYLOR':
                 for cluster in self.clusters:
                     for grain in (cluster.g1, cluster.g2):
                         grain.plot_orientation('IPF', plot_border=False, marker=marker, markersize=markersize, color=color)
@@ -2458,14 +3557,11 @@ class Polycrystal:
             plt.gca().set_aspect('equal', adjustable='box')
             
         elif plot_type.upper() == 'ODF':
-            angs = np.zeros((int(self.Ngrains),3))
             if self.grain_interaction != 'FCTAYLOR':
-                for i, c in enumerate(self.clusters):
-                    angs[2*i,:] = matrix2ang(c.g1.Q)
-                    angs[2*i+1,:] = matrix2ang(c.g2.Q)
+                Q = np.array([g.Q for c in self.clusters for g in (c.g1, c.g2)])
             else:
-                for i, g in enumerate(self.grains):
-                    angs[i,:] = matrix2ang(g.Q)
+                Q = self.grain_array.Q
+            angs = matrix2ang(Q)
             ori = odflib.Orientations(angles=angs)
             odf = odflib.ODF(orientations=ori)
             odf.show(boundaries=levelsODF)
@@ -2502,54 +3598,38 @@ class Polycrystal:
         else:
             self.C = None
 
-    def plot_orientations_plotly(self, plot_type='IPF', crystal_structure = 'FCC_111', plot_what ='trajectory'):
+    def plot_orientations_plotly(self, plot_type='IPF', crystal_structure = 'FCC_111', plot_what ='trajectory', bins=64, sigma=1.):
     # This function generates the plotting data for pole figures, inverse pole figures or ODF which can be used in Plotly
-    # Input: Polycrystal grain orientations, Plot type (PF or IPF or ODF), Selected crystal structure and plane, Plot trajectory or start
+    # Input: Polycrystal grain orientations, Plot type (PF, PF_DENSITY, IPF or ODF), Selected crystal structure and plane, Plot trajectory or start,
+    #        Number of bins and smoothing of the density pole figures (see pole_figure_density)
     # Ouput: Plotting data for pole figures, inverse pole figures or ODF for the polycrystal
 
         # For Pole Figures
         if plot_type.upper() == 'PF':
             # Lists to store x and y values for plotting; for all normal directions (TD, RD and ND)
-            x_pf_nd = []
-            x_pf_td = []
-            x_pf_rd = []
-            y_pf_nd = []
-            y_pf_td = []
-            y_pf_rd = []
-            crys_struc = crystal_structure
-
-            for grain in self.grains:
-                result = grain.plot_orientation_plotly('PF', crystal_structure = crys_struc)
-                x_pf_nd.extend(result[0])
-                x_pf_td.extend(result[1])
-                x_pf_rd.extend(result[2])
-                y_pf_nd.extend(result[3])
-                y_pf_td.extend(result[4])
-                y_pf_rd.extend(result[5])
+            # all grains, equivalent planes and normals are projected at once, (Ngrains,3,Nplanes)
+            x, y = pole_figure_projection(self.grain_array.Q, pole_figure_hkl(crystal_structure))
+            x_pf_nd, x_pf_td, x_pf_rd = (x[:,i].ravel() for i in range(3))
+            y_pf_nd, y_pf_td, y_pf_rd = (y[:,i].ravel() for i in range(3))
             
             # Return x and y data for plotting
             return x_pf_nd, x_pf_td, x_pf_rd, y_pf_nd, y_pf_td, y_pf_rd
 
+        # For density Pole Figures, the size of the data does not depend on the number of grains
+        elif plot_type.upper() == 'PF_DENSITY':
+            # (3,bins,bins) densities in the same order as the 'PF' data
+            density, centres = pole_figure_density(self.grain_array.Q, pole_figure_hkl(crystal_structure), bins=bins, sigma=sigma)
+            return density[0], density[1], density[2], centres
+
         # For Inverse Pole Figures
         elif plot_type.upper() == 'IPF':
-            plot_what_input = plot_what
-            x_ipf = []
-            y_ipf = []
-            x_list = [0]
-            y_list = [0]
-            for grain in self.grains:
-                result = grain.plot_orientation_plotly('IPF', plot_what = plot_what_input)
-                x_list[0]=result[0]
-                y_list[0]=result[1]
-                x_ipf.extend(x_list)
-                y_ipf.extend(y_list)
-            return x_ipf, y_ipf
+            # all grains and output steps are projected at once, one row per grain
+            x_ipf, y_ipf = self.grain_array.ipf_coordinates(plot_what)
+            return list(x_ipf), list(y_ipf)
         
         # For ODF
         elif plot_type.upper() == 'ODF':
-            angs = np.zeros((int(self.Ngrains),3))
-            for i, g in enumerate(self.grains):
-                angs[i,:] = matrix2ang(g.Q)
+            angs = matrix2ang(self.grain_array.Q)
             return angs
 
 
@@ -2580,24 +3660,361 @@ def elast_stressinc(C, De):
     return voigt2m(np.dot(C, m2voigt(De, tensor='strain')), tensor='stress')
     
 
-def ori2IPF(Q, direction, points):
-    eps = 1.e-12
-    x2, x3 = points
-    vec = np.dot(Q, direction)
-    permuts = itertools.permutations(vec)
-    for p in permuts:
-        p = np.array(p)
-        # to have it on northern hemisphere on the correct quadrant
-        p = p*np.sign(np.array([p[0], -p[1], p[2]]))   
-        proj111x = p[0]/(p[2]+1.)
-        proj111y = p[1]/(p[2]+1.)
-        xcoord = -proj111y      
-        ycoord =  proj111x
-        if (xcoord <= x2+eps) and (ycoord <= xcoord+eps) and \
-           (np.sqrt((1.+xcoord)**2 + ycoord**2) <= (1.+x2)+eps):
-            return xcoord, ycoord
-            break
+# rows are the x and y axes and the normal of the pole figures with ND, RD and TD as normal
+pole_figure_frames = {'ND': [[ 0., 1., 0.], [-1., 0., 0.], [ 0., 0., 1.]],
+                      'RD': [[ 0., 1., 0.], [ 0., 0., 1.], [ 1., 0., 0.]],
+                      'TD': [[ 0., 0.,-1.], [-1., 0., 0.], [ 0., 1., 0.]]}
+
+
+def pole_figure_hkl(crystal_structure):
+    '''Miller indices of the planes of a pole figure named as crystal_structure, e.g. 'FCC_112' -> (1,1,2).'''
+    return tuple(int(i) for i in crystal_structure.split('_')[-1])
+
+
+@functools.lru_cache(maxsize=None)
+def equivalent_planes(hkl):
+    '''
+    Unit normals (M,3) of all planes {hkl} equivalent by cubic symmetry (both signs of every normal), 
+    generated once per {hkl} and cached, the returned array is read-only.
+    '''
+    variants = np.array([np.array(p)*s for p in itertools.permutations(hkl) 
+                                       for s in itertools.product((1.,-1.), repeat=3)]) + 0.
+    planes = np.unique(variants, axis=0)
+    planes = planes/np.linalg.norm(planes, axis=1, keepdims=True)
+    planes.setflags(write=False)
+    return planes
+
+
+def pole_figure_poles(Q, hkl, normals=('ND','RD','TD')):
+    '''
+    Unit normals of the planes {hkl} of rotation matrices Q (3,3) or stacked (...,3,3) in the frames of the pole 
+    figures with the sample "normals", flipped to the northern hemisphere. Returns (...,len(normals),M,3) arrays, 
+    M equivalent planes.
+    '''
+    planes = equivalent_planes(tuple(hkl))
+    frames = np.array([pole_figure_frames[n] for n in normals])
+    # plane normals in the sample coord system expressed in the pole figure frames
+    u = np.einsum('sij,...kj,mk->...smi', frames, np.asarray(Q, dtype=float), planes)
+    # flip the poles pointing to the south
+    return np.where(u[...,2:] < 0., -u, u)
+
+
+def pole_figure_projection(Q, hkl, normals=('ND','RD','TD')):
+    '''
+    Stereographic projections of the planes {hkl} of rotation matrices Q (3,3) or stacked (...,3,3) in the pole 
+    figures with the sample "normals". Returns x and y as (...,len(normals),M) arrays, M equivalent planes.
+    '''
+    u = pole_figure_poles(Q, hkl, normals)
+    return u[...,0]/(u[...,2]+1.), u[...,1]/(u[...,2]+1.)
+
+
+def pole_figure_density(Q, hkl, normals=('ND','RD','TD'), bins=64, sigma=1.):
+    '''
+    Pole densities of the planes {hkl} of rotation matrices Q (3,3) or stacked (...,3,3) in the pole figures with 
+    the sample "normals". The poles are binned on a bins x bins grid over the equal-area (Lambert) projection of 
+    the hemisphere onto the unit disc, so that all cells cover the same solid angle, and smoothed by a Gaussian 
+    of "sigma" cells (none for sigma 0 or None). Returns the densities (len(normals),bins,bins) indexed 
+    [normal,y,x] in multiples of a random distribution, nan outside the disc, and the bin centres (bins,).
+    '''
+    u = pole_figure_poles(Q, hkl, normals)
+    # equal-area projection, poles lie in the same directions as in the stereographic projection
+    x = u[...,0]/np.sqrt(1.+u[...,2])
+    y = u[...,1]/np.sqrt(1.+u[...,2])
+    edges   = np.linspace(-1., 1., bins+1)
+    centres = 0.5*(edges[1:] + edges[:-1])
+    inside  = centres[:,None]**2 + centres[None,:]**2 <= 1.
+    # fraction of every cell inside the disc (8x8 samples per cell), the cells at the rim are cut by the circle
+    sub  = (edges[:-1,None] + (np.arange(8)+0.5)*(2./bins)/8.).ravel()
+    area = (sub[:,None]**2 + sub[None,:]**2 <= 1.).reshape(bins,8,bins,8).mean(axis=(1,3))
+    if sigma:
+        # smoothing normalised by the smoothed disc, so that the density does not drop at the rim
+        area = scipy.ndimage.gaussian_filter(area, sigma, mode='constant')
+    # counts of a random distribution in a whole cell
+    random = x[...,0,:].size*(2./bins)**2/np.pi
+    density = np.full((len(normals),bins,bins), np.nan)
+    for k in range(len(normals)):
+        H = np.histogram2d(y[...,k,:].ravel(), x[...,k,:].ravel(), bins=(edges, edges))[0]
+        if sigma:
+            H = scipy.ndimage.gaussian_filter(H, sigma, mode='constant')
+        density[k][inside] = H[inside]/(area[inside]*random)
+    return density, centres
+
+
+def ori2IPF(Q, direction=[0.,0.,1.]):
+    '''
+    Coordinates (x, y) in the cubic standard triangle of the inverse pole figure of the sample "direction" 
+    for rotation matrices Q (3,3) or stacked (...,3,3), scalars or (...) arrays.
+    '''
+    vec = np.asarray(Q, dtype=float) @ np.asarray(direction, dtype=float)
+    # the symmetric equivalent in the standard triangle has |v1| <= |v2| <= |v3|
+    p = np.sort(np.abs(vec), axis=-1)
+    # stereographic projection from the south pole
+    xcoord = p[...,1]/(p[...,2]+1.)
+    ycoord = p[...,0]/(p[...,2]+1.)
+    return xcoord, ycoord
     
+def yield_locus_conditions(xij, yij, zij, ang, s0):
+    '''
+    Boundary conditions of the 2D yield locus point at angle "ang" in the plane of the stress components 
+    xij and yij, with the out-of-plane component zij (or None) prescribed to s0. Returns Sdir, Sabs, ind_Sdir, ind_Sabs.
+    '''
+    normal_components = [(0,0),(1,1),(2,2)]
+    shear_components  = [(1,2),(0,2),(0,1)]
+    xi, xj = xij
+    yi, yj = yij
+    if zij is not None:
+        zi, zj = zij
+        
+    Sdir = np.zeros((3,3))
+    Sabs = np.zeros((3,3))
+    ind_Sdir = np.full((3, 3), False, dtype=bool)
+    ind_Sabs = np.full((3, 3), True, dtype=bool)
+
+    if xij in shear_components: # xij is a shear component
+        if yij in shear_components: # both are shear stress components
+            Sdir[xi, xj], Sdir[xj, xi] = np.cos(ang), np.cos(ang)
+            Sdir[yi, yj], Sdir[yj, yi] = np.sin(ang), np.sin(ang)
+            ind_Sdir[xi, xj], ind_Sdir[xj, xi] = True, True
+            ind_Sdir[yi, yj], ind_Sdir[yj, yi] = True, True
+            ind_Sabs[xi, xj], ind_Sabs[xj, xi] = False, False
+            ind_Sabs[yi, yj], ind_Sabs[yj, yi] = False, False
+            if zij in normal_components:
+                Sabs[zi,zj] = 2./3.*s0
+                rest_normal = [normal for normal in normal_components if normal != zij]
+                for rn in rest_normal:
+                    Sabs[rn[0], rn[1]] = -1./3.*s0
+            elif zij in shear_components:
+                Sabs[zi,zj] = s0
+                Sabs[zj,zi] = s0
+            elif zij is not None:
+                sys.exit('Yield surface plotting problem...')
+
+        else: # yij is a normal component
+            Sdir[xi, xj] = np.cos(ang)
+            Sdir[xj, xi] = np.cos(ang)
+            Sdir[yi, yj] = 2./3.*np.sin(ang)
+            ind_Sdir[xi, xj], ind_Sdir[xj, xi] = True, True
+            ind_Sdir[yi, yj] = True
+            ind_Sabs[xi, xj], ind_Sabs[xj, xi] = False, False
+            ind_Sdir[yi, yj] = False
+            rest_normal = [normal for normal in normal_components if normal != yij]
+            for rn in rest_normal:
+                Sdir[rn[0], rn[1]] = -1./3.*np.sin(ang)
+                ind_Sdir[rn[0], rn[1]] = True
+                ind_Sabs[rn[0], rn[1]] = False
+            if zij in normal_components:
+                print('Out-of-plane stress component cannot be a normal component for this plot.')
+            elif zij in shear_components:
+                Sabs[zi, zj] = s0
+                Sabs[zj, zi] = s0
+            elif zij is not None:
+                sys.exit('Yield surface plotting problem...')
+
+    else: # xij is a normal component
+        if yij in shear_components: # yij is a shear component
+            Sdir[yi, yj] = np.sin(ang)
+            Sdir[yj, yi] = np.sin(ang)
+            Sdir[xi, xj] = 2./3.*np.cos(ang)
+            ind_Sdir[yi, yj], ind_Sdir[yj, yi] = True, True
+            ind_Sdir[xi, xj] = True
+            ind_Sabs[yi, yj], ind_Sabs[yj, yi] = False, False
+            ind_Sabs[xi, xj] = False
+            rest_normal = [normal for normal in normal_components if normal != xij]
+            for rn in rest_normal:
+                Sdir[rn[0], rn[1]] = -1./3.*np.cos(ang)
+                ind_Sdir[rn[0], rn[1]] = True
+                ind_Sabs[rn[0], rn[1]] = False
+            if zij in normal_components:
+                print('Out-of-plane stress component cannot be a normal component for this plot.')
+            elif zij in shear_components:
+                Sabs[zi, zj] = s0
+                Sabs[zj, zi] = s0
+            elif zij is not None:
+                sys.exit('Yield surface plotting problem...')
+
+        else: # both are normal stress components
+            rest_normal = [normal for normal in normal_components if normal not in [xij, yij]]
+            rest_normal = rest_normal[0] # extract the only tuple from the list
+            Sdir[xi, xj] = 2./3.*np.cos(ang) - 1./3.*np.sin(ang)
+            Sdir[yi, yj] = 2./3.*np.sin(ang) - 1./3.*np.cos(ang)
+            Sdir[rest_normal[0], rest_normal[1]] = -1./3.*np.cos(ang) - 1./3.*np.sin(ang)
+            ind_Sdir[0, 0], ind_Sdir[1, 1], ind_Sdir[2, 2] = True, True, True
+            ind_Sabs[0, 0], ind_Sabs[1, 1], ind_Sabs[2, 2] = False, False, False
+            if zij in normal_components:
+                print('Out-of-plane stress component cannot be a normal component for this plot.')
+            elif zij in shear_components:
+                Sabs[zi, zj] = s0
+                Sabs[zj, zi] = s0
+            elif zij is not None:
+                sys.exit('Yield surface plotting problem...')
+    return Sdir, Sabs, ind_Sdir, ind_Sabs
+
+def schmid_yield_locus(Q, crss, number_of_points, plot_axes, exponent=20., tol=1.e-10, maxiter=100):
+    '''
+    2D yield loci of grains with orientations Q (N,3,3) and critical resolved shear stresses crss (N,24) for the 
+    regularised Schmid law  f(S) = (sum_s max(0, S:P_s/crss_s)**exponent)**(1/exponent) = 1, with the points, plot 
+    axes and out-of-plane stresses s0 of plot_axes as for Grain.yield_locus. All grains and points are solved at once.
+    
+    f is homogeneous of degree one, so without out-of-plane stress the yield point along Sdir is Sdir/f(Sdir). 
+    Otherwise the stress k*Sdir + Sabs is found by Newton iterations on the convex function f(k*Sdir + Sabs) - 1, 
+    which converge monotonically from the upper bound k = (1 + f(-Sabs))/f(Sdir). 
+    Returns YL (N,3,3,number_of_points*len(s0_list)) and the numbers of points that did not converge (N,).
+    '''
+    normal_components = [(0,0),(1,1),(2,2)]
+    shear_components  = [(1,2),(0,2),(0,1)]
+
+    xij = [int(x)-1 for x in plot_axes[0]]
+    xij.sort()
+    xij = tuple(xij)
+    yij = [int(x)-1 for x in plot_axes[1]]
+    yij.sort()
+    yij = tuple(yij)
+    if len(plot_axes) == 4:
+        zij = [int(x)-1 for x in plot_axes[2]]
+        zij.sort()
+        zij = tuple(zij)
+        if zij in [xij, yij]:
+            sys.exit('Out-of-plane stress component must differ.')
+        elif zij not in normal_components + shear_components:
+            sys.exit('Out-of-plane stress component is NA.')
+        s0_list = plot_axes[3]
+    else:
+        zij = None
+        s0_list = [0.]
+
+    angles = np.linspace(0, 2.*np.pi, number_of_points)
+    conditions = [yield_locus_conditions(xij, yij, zij, ang, s0) for s0 in s0_list for ang in angles]
+    Sdir = np.array([c[0] for c in conditions])
+    Sabs = np.array([c[1] for c in conditions])
+
+    # slip systems in the sample frame, scaled by the crss: (N,24,9)
+    P = np.moveaxis(crystal_properties.P3d, -1, 0)
+    P = (np.swapaxes(Q, 1, 2)[:,None] @ P[None] @ Q[:,None]).reshape(len(Q), -1, 9)/crss[:,:,None]
+    # resolved shear stresses of k*Sdir + Sabs are k*a + b: (N,M,24)
+    a = np.swapaxes(P @ Sdir.reshape(-1, 9).T, 1, 2)
+    b = np.swapaxes(P @ Sabs.reshape(-1, 9).T, 1, 2)
+
+    def norm(t):
+        # regularised Schmid norm of the positive parts, scaled by the maximum to keep the powers finite
+        t = np.maximum(t, 0.)
+        tmax = np.max(t, axis=-1, keepdims=True)
+        tmax[tmax == 0.] = 1.
+        t = t/tmax
+        return tmax[...,0]*np.sum(t**exponent, axis=-1)**(1./exponent), t, tmax
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if np.all(Sabs == 0.):
+            # homogeneity: the locus radius is known in closed form
+            k = 1./norm(a)[0]
+        else:
+            k = (1. + norm(-b)[0])/norm(a)[0]
+            for _ in range(maxiter):
+                f, t, tmax = norm(k[...,None]*a + b)
+                # derivative of f along Sdir
+                df = np.sum((t*tmax/f[...,None])**(exponent-1.)*a, axis=-1)
+                step = (f - 1.)/df
+                k = k - step
+                if np.all(~(np.abs(step) > tol*np.abs(k))):
+                    break
+        f = norm(k[...,None]*a + b)[0]
+    converged = np.isfinite(k) & (np.abs(f - 1.) < 1.e-6)
+    k[~converged] = np.nan
+
+    YL = k[:,None,None,:]*np.moveaxis(Sdir, 0, -1) + np.moveaxis(Sabs, 0, -1)
+
+    rij = normal_components.copy()
+    if xij in rij:
+        rij.remove(xij)
+    if yij in rij:
+        rij.remove(yij)
+    if len(rij) == 1:
+        rij = 2*rij
+    if len(rij) == 3:
+        rij = None
+    if rij is not None:
+        tmp = 0.5*(YL[:,rij[0][0],rij[0][1],:] + YL[:,rij[1][0],rij[1][1],:])
+        YL[:,0,0,:] -= tmp
+        YL[:,1,1,:] -= tmp
+        YL[:,2,2,:] -= tmp
+
+    return YL, np.sum(~converged, axis=1)
+
+def yield_locus_point(xij, yij, zij, ang, s0, first=False):
+    '''
+    Boundary conditions (cpfort.globals values) and initial guess of Dp of one 2D yield locus point.
+    The first point of a locus starts from Sdir, the others from the scaled von Mises guess.
+    '''
+    Sdir, Sabs, ind_Sdir, ind_Sabs = yield_locus_conditions(xij, yij, zij, ang, s0)
+    bc = {'ind_sdir'        : m2voigt_dev(ind_Sdir),
+          'ind_sabs'        : m2voigt_dev(ind_Sabs),
+          'ind_d'           : np.full(5, False, dtype=bool),
+          'sdir_prescribed' : m2voigt_dev(Sdir),
+          'sabs_prescribed' : m2voigt_dev(Sabs),
+          'd_prescribed'    : np.zeros(5),
+          'w_prescribed'    : np.zeros((3,3))}
+
+    # initial guess for Dp
+    if first:
+        dguess = m2voigt_dev(Sdir)
+    else:
+        dguess = functools.partial(_cpfort_good_guess, Sabs, ind_Sabs, Sdir, ind_Sdir)
+    return bc, dguess
+
+def yield_locus_trace(session, points, angles, tol):
+    '''
+    Solve consecutive points [(boundary conditions, initial guess), ...] of a yield locus by continuation. The first 
+    point starts from its initial guess, every other point from the solution Dsolved of the previous point extrapolated 
+    along the locus (tangent predictor from the last two points). Where the predicted start does not converge (e.g. 
+    beyond a vertex) the point is solved again from its own initial guess. Yields the solutions one by one, 
+    with the function evaluations of the warm start and of the initial guess kept apart (see _yield_locus_solve).
+    '''
+    D = []
+    for k, ((bc, dguess), ang) in enumerate(zip(points, angles)):
+        if k == 0:
+            solution = _yield_locus_solve(session, bc, dguess)
+        else:
+            prediction = D[-1]
+            if k > 1:
+                prediction = D[-1] + (D[-1]-D[-2])*(ang-angles[k-1])/(angles[k-1]-angles[k-2])
+            solution = _yield_locus_solve(session, bc, prediction, fallback=dguess, tol=tol)
+        D.append(m2voigt_dev(solution[0]))
+        yield solution
+
+def yield_locus_deviation(sol1, sol2, tol):
+    '''
+    Estimated distance between the yield locus and the chord of two neighbouring solutions (Dsolved, Ssolved, info, 
+    resid, nfev_warm, nfev_cold), relative to the size of the locus. The locus is approximated by the circular arc turning between 
+    the normals Dsolved, so the estimate is large at vertices and vanishes on flat facets. Intervals with a point 
+    whose residuals exceed tol are not resolved any further (0 is returned).
+    '''
+    D1, S1, resid1 = sol1[0], sol1[1], sol1[3]
+    D2, S2, resid2 = sol2[0], sol2[1], sol2[3]
+    if max(abs(resid1)) >= tol or max(abs(resid2)) >= tol:
+        return 0.
+    cos_normal = np.sum(D1*D2)/(np.linalg.norm(D1)*np.linalg.norm(D2))
+    turn = np.arccos(np.clip(cos_normal, -1., 1.))
+    chord = np.linalg.norm(S2-S1)
+    return 0.5*chord*np.tan(turn/4.)/(0.5*(np.linalg.norm(S1)+np.linalg.norm(S2)))
+
+def deviatoric_directions(number_of_points, start=0):
+    '''
+    Quasi-uniform unit directions in the 5D space of deviatoric tensors, as (number_of_points,5) array of Voigt 
+    components (m2voigt_dev) for the user_input of yield_locus. Points start..start+number_of_points-1 of a Halton 
+    sequence in 5 dimensions are mapped to normal deviates and normalised, which distributes them uniformly over the 
+    unit sphere S^4 of the orthonormal (Lequeu) components. The sequence is deterministic, so consecutive chunks 
+    (start advanced by number_of_points) continue the same set of directions.
+    '''
+    # index 0 of the Halton sequence is the origin, which has no normal deviate
+    x = scipy.special.ndtri(odflib.halton(number_of_points, 5, start+1).reshape(-1,5)).T
+    x /= np.linalg.norm(x, axis=0)
+    # lequeu2m, written out for arrays of points
+    D = np.array([-(np.sqrt(3.)*x[0]+x[1])/np.sqrt(6.),
+                   (np.sqrt(3.)*x[0]-x[1])/np.sqrt(6.),
+                   x[2]/np.sqrt(2.),
+                   x[3]/np.sqrt(2.),
+                   x[4]/np.sqrt(2.)])
+    return D.T
+
 def make_good_guess(Sabs, iSabs, Sdir, iSdir, crssmean):
     Sdir = np.array(Sdir,copy=True)
     Sabs = np.array(Sabs,copy=True)
@@ -2630,63 +4047,136 @@ def make_good_guess(Sabs, iSabs, Sdir, iSdir, crssmean):
 
 
 def ang2matrix(angles_in_degrees):
+    '''
+    Rotation matrices of Bunge Euler angles (phi1, PHI, phi2) in degrees, (3,) -> (3,3) or stacked (...,3) -> (...,3,3).
+    '''
     # input angles in deg
-    phi1, PHI, phi2 = np.deg2rad(angles_in_degrees)
+    angles = np.deg2rad(np.asarray(angles_in_degrees, dtype=float))
+    phi1, PHI, phi2 = angles[...,0], angles[...,1], angles[...,2]
+    zero = np.zeros(phi1.shape)
+    one  = np.ones(phi1.shape)
     # partial rotation matrices
-    C = np.array([[ np.cos(phi1),  np.sin(phi1),    0.0],
-                  [-np.sin(phi1),  np.cos(phi1),    0.0],
-                  [      0.0    ,      0.0     ,    1.0]])
+    C = np.stack([np.stack([ np.cos(phi1),  np.sin(phi1),    zero       ], axis=-1),
+                  np.stack([-np.sin(phi1),  np.cos(phi1),    zero       ], axis=-1),
+                  np.stack([      zero   ,      zero    ,    one        ], axis=-1)], axis=-2)
          
-    B = np.array([[      1.0    ,      0.0     ,    0.0],
-                  [      0.0    ,  np.cos(PHI) , np.sin(PHI)],
-                  [      0.0    , -np.sin(PHI) , np.cos(PHI)]])
+    B = np.stack([np.stack([      one    ,      zero    ,    zero       ], axis=-1),
+                  np.stack([      zero   ,  np.cos(PHI) , np.sin(PHI)   ], axis=-1),
+                  np.stack([      zero   , -np.sin(PHI) , np.cos(PHI)   ], axis=-1)], axis=-2)
      
-    A = np.array([[ np.cos(phi2),  np.sin(phi2),    0.0],
-                  [-np.sin(phi2),  np.cos(phi2),    0.0],
-                  [      0.0    ,      0.0     ,    1.0]])
+    A = np.stack([np.stack([ np.cos(phi2),  np.sin(phi2),    zero       ], axis=-1),
+                  np.stack([-np.sin(phi2),  np.cos(phi2),    zero       ], axis=-1),
+                  np.stack([      zero   ,      zero    ,    one        ], axis=-1)], axis=-2)
     # rotation matrix
-    Q = np.dot(A,np.dot(B,C))
-
-    # C1 = np.cos(phi1)
-    # C2 = np.cos(PHI)
-    # C3 = np.cos(phi2)
-    # S1 = np.sin(phi1)
-    # S2 = np.sin(PHI)
-    # S3 = np.sin(phi2)
-
-    # ZXZ = np.array([[((C1*C3)-(C2*S1*S3)), (-C1*S3)-(C2*C3*S1), S1*S2],
-    #                [(C3*S1)+(C1*C2*S3), (C1*C2*C3)-(S1*S3), -C1*S2],
-    #                [S2*S3, C3*S2, C2]])
-    
+    Q = A @ (B @ C)
 
     return Q
 
 
-
-
-
 def matrix2ang(Q):
-    if np.abs(Q[2,2]) < 1.:
-        ANG2 = np.arccos(Q[2,2])
-        STH  = np.sin(ANG2)
-        ANG1 = np.arctan2(Q[2,0]/STH, -Q[2,1]/STH)
-        ANG3 = np.arctan2(Q[0,2]/STH, Q[1,2]/STH)
-    else:
-        ANG1 = np.arctan2(Q[0,1],Q[0,0])
-        ANG2 = 0.
-        ANG3 = 0.
+    '''
+    Bunge Euler angles in degrees of rotation matrices, (3,3) -> (3,) or stacked (...,3,3) -> (...,3). 
+    For PHI = 0 (gimbal lock) phi1 takes the whole rotation and phi2 = 0.
+    '''
+    Q = np.asarray(Q, dtype=float)
+    lock = np.abs(Q[...,2,2]) >= 1.
+    ANG2 = np.arccos(np.clip(Q[...,2,2], -1., 1.))
+    STH  = np.where(lock, 1., np.sin(ANG2))
+    ANG1 = np.where(lock, np.arctan2(Q[...,0,1], Q[...,0,0]), np.arctan2(Q[...,2,0]/STH, -Q[...,2,1]/STH))
+    ANG3 = np.where(lock, 0., np.arctan2(Q[...,0,2]/STH, Q[...,1,2]/STH))
+    ANG2 = np.where(lock, 0., ANG2)
     
     # output angles in deg
-    return np.rad2deg([ANG1, ANG2, ANG3])
+    return np.rad2deg(np.stack([ANG1, ANG2, ANG3], axis=-1))
 
 
 def axis_angle2matrix(axis, ang):
-    axis = np.asarray(axis)
-    r1, r2, r3 = axis/np.linalg.norm(axis)
+    '''
+    Rotation matrices of rotations by "ang" degrees about "axis", (3,) and scalar -> (3,3) or stacked (...,3) and 
+    (...) -> (...,3,3).
+    '''
+    axis = np.asarray(axis, dtype=float)
+    axis = axis/np.linalg.norm(axis, axis=-1, keepdims=True)
+    r1, r2, r3 = axis[...,0], axis[...,1], axis[...,2]
     ang = np.deg2rad(ang)
-    return np.array([[(1.-r1**2)*np.cos(ang)+r1**2,          r1*r2*(1.-np.cos(ang))+r3*np.sin(ang), r1*r3*(1.-np.cos(ang))-r2*np.sin(ang)],
-                     [r1*r2*(1.-np.cos(ang))-r3*np.sin(ang), (1.-r2**2)*np.cos(ang)+r2**2,          r2*r3*(1.-np.cos(ang))+r1*np.sin(ang)],
-                     [r1*r3*(1.-np.cos(ang))+r2*np.sin(ang), r2*r3*(1.-np.cos(ang))-r1*np.sin(ang), (1.-r3**2)*np.cos(ang)+r3**2]])
+    c, s = np.cos(ang), np.sin(ang)
+    return np.stack([np.stack([(1.-r1**2)*c+r1**2,   r1*r2*(1.-c)+r3*s,    r1*r3*(1.-c)-r2*s ], axis=-1),
+                     np.stack([r1*r2*(1.-c)-r3*s,    (1.-r2**2)*c+r2**2,   r2*r3*(1.-c)+r1*s ], axis=-1),
+                     np.stack([r1*r3*(1.-c)+r2*s,    r2*r3*(1.-c)-r1*s,    (1.-r3**2)*c+r3**2], axis=-1)], axis=-2)
+
+
+def spin_exponential(W):
+    '''
+    Rotation matrices exp(W) of skew tensors W (3,3) or stacked (...,3,3), closed form of the exponential map 
+    (Rodrigues formula) instead of scipy.linalg.expm.
+    '''
+    W  = np.asarray(W, dtype=float)
+    th = np.sqrt(0.5*np.sum(W**2, axis=(-2,-1)))[...,None,None]
+    # sin(th)/th and (1-cos(th))/th**2 without the singularity at th = 0
+    a  = np.sinc(th/np.pi)
+    b  = 0.5*np.sinc(th/(2.*np.pi))**2
+    return np.eye(3) + a*W + b*(W @ W)
+
+
+def spin_cayley(W):
+    '''
+    Rotation matrices inv(I - W/2) @ (I + W/2) (second-order scheme) of skew tensors W (3,3) or stacked (...,3,3), 
+    in closed form.
+    '''
+    A = 0.5*np.asarray(W, dtype=float)
+    alpha = 0.5*np.sum(A**2, axis=(-2,-1))[...,None,None]
+    return np.eye(3) + 2./(1.+alpha)*(A + A @ A)
+
+
+def spin2quat(W):
+    '''
+    Unit quaternions (w,x,y,z) of the rotations exp(W) of skew tensors W, (3,3) -> (4,) or stacked (...,3,3) -> (...,4).
+    '''
+    W = np.asarray(W, dtype=float)
+    # axial vector, W @ v = omega x v
+    omega = np.stack([W[...,2,1], W[...,0,2], W[...,1,0]], axis=-1)
+    th = np.linalg.norm(omega, axis=-1, keepdims=True)
+    return np.concatenate([np.cos(0.5*th), 0.5*np.sinc(th/(2.*np.pi))*omega], axis=-1)
+
+
+def quat2matrix(q):
+    '''
+    Rotation matrices of unit quaternions (w,x,y,z), (4,) -> (3,3) or stacked (...,4) -> (...,3,3).
+    '''
+    q = np.asarray(q, dtype=float)
+    w, x, y, z = q[...,0], q[...,1], q[...,2], q[...,3]
+    return np.stack([np.stack([1.-2.*(y*y+z*z),    2.*(x*y-w*z),    2.*(x*z+w*y)], axis=-1),
+                     np.stack([   2.*(x*y+w*z), 1.-2.*(x*x+z*z),    2.*(y*z-w*x)], axis=-1),
+                     np.stack([   2.*(x*z-w*y),    2.*(y*z+w*x), 1.-2.*(x*x+y*y)], axis=-1)], axis=-2)
+
+
+def matrix2quat(Q):
+    '''
+    Unit quaternions (w,x,y,z) with w >= 0 of rotation matrices, (3,3) -> (4,) or stacked (...,3,3) -> (...,4).
+    '''
+    Q  = np.asarray(Q, dtype=float)
+    tr = Q[...,0,0] + Q[...,1,1] + Q[...,2,2]
+    # four (unnormalised) candidates, the one with the largest leading component is taken
+    q  = np.stack([np.stack([1.+tr,                Q[...,2,1]-Q[...,1,2], Q[...,0,2]-Q[...,2,0], Q[...,1,0]-Q[...,0,1]], axis=-1),
+                   np.stack([Q[...,2,1]-Q[...,1,2], 1.+2.*Q[...,0,0]-tr,  Q[...,0,1]+Q[...,1,0], Q[...,0,2]+Q[...,2,0]], axis=-1),
+                   np.stack([Q[...,0,2]-Q[...,2,0], Q[...,0,1]+Q[...,1,0], 1.+2.*Q[...,1,1]-tr,  Q[...,1,2]+Q[...,2,1]], axis=-1),
+                   np.stack([Q[...,1,0]-Q[...,0,1], Q[...,0,2]+Q[...,2,0], Q[...,1,2]+Q[...,2,1], 1.+2.*Q[...,2,2]-tr ], axis=-1)], axis=-2)
+    k  = np.argmax(np.stack([tr, Q[...,0,0], Q[...,1,1], Q[...,2,2]], axis=-1), axis=-1)
+    q  = np.take_along_axis(q, k[...,None,None], axis=-2)[...,0,:]
+    q  = q/np.linalg.norm(q, axis=-1, keepdims=True)
+    return np.where(q[...,:1] < 0., -q, q)
+
+
+def quat_multiply(p, q):
+    '''
+    Hamilton products p*q of quaternions (w,x,y,z), quat2matrix(p*q) = quat2matrix(p) @ quat2matrix(q).
+    '''
+    p, q = np.asarray(p, dtype=float), np.asarray(q, dtype=float)
+    pw, pv = p[...,:1], p[...,1:]
+    qw, qv = q[...,:1], q[...,1:]
+    return np.concatenate([pw*qw - np.sum(pv*qv, axis=-1, keepdims=True), 
+                           pw*qv + qw*pv + np.cross(pv, qv)], axis=-1)
+
 
 def VonMises(A, meassure='strain', normalize=False):
 # von Mises norm of stress or strain
@@ -2835,13 +4325,191 @@ def getstress(activesID, crss):
     S = voigt2m_dev(x)
     return S
 
+def find_stress_vertices(Dp_vec, crss, tol=1.e-6):
+    '''
+    Batched Bishop-Hill solution of the rate-independent single crystal problem with uniform CRSS.
+    For every row of "Dp_vec" (N,5) the stress vertex with maximum plastic work is picked from the 
+    precalculated vertices by one (N,5)x(5,V) matrix product.
+    
+    Returns (N,3,3) stresses in the crystal coord systems and (N,) indices of the vertices. Grains without a 
+    unique solution (non-uniform CRSS, or the work of the two best vertices equal within "tol") get NaN stresses 
+    and index -1, those need to be solved by linear programming.
+    '''
+    Dp_vec = np.asarray(Dp_vec)
+    crss = np.asarray(crss)
+    work = Dp_vec @ crystal_properties.vertex_work
+    best = np.argmax(work, axis=1)
+    # work of the two best vertices
+    top2 = np.partition(work, -2, axis=1)[:,-2:]
+    unique = top2[:,1] - top2[:,0] > tol*np.abs(top2[:,1])
+    uniform = np.all(np.abs(crss - crss[:,:1]) <= Stol*crss[:,:1], axis=1)
+    found = unique & uniform
+    
+    stress_vec = crss[:,0,None]*crystal_properties.stress_vertices[:,best].T
+    stress_vec[~found] = np.nan
+    best[~found] = -1
+    return voigt2m_dev(stress_vec.T).transpose(2,0,1), best
+
+def find_slips_batched(Dp_vec, crss, maxiter=200):
+    '''
+    Batched version of Grain.findslips(method='simplex') for (N,5) strain rates and (N,24) CRSS: the slip rates 
+    minimizing the internal energy crss.gm subject to P @ gm = Dp_vec, gm >= 0. All grains are solved at once 
+    by the revised simplex method on 5x5 bases, started from artificial variables (big M) and pivoted by 
+    Bland's rule, so it terminates also at the degenerate Bishop-Hill vertices.
+    
+    Returns (N,24) slip rates, (N,5) indices of the basic slip systems and (N,) booleans "found". A grain is 
+    found if its basis holds 5 slip systems with slip rates above Dtol, the stress then follows from them 
+    (as in "getstress"); the others (less than 5 active slip systems, the stress is ambiguous) need the 
+    stress corners of a Grain.
+    '''
+    Dp_vec = np.asarray(Dp_vec, dtype=float)
+    crss = np.asarray(crss, dtype=float)
+    N = len(Dp_vec)
+    # columns 24-28 are the artificial variables, signed so that they start with non-negative values |Dp_vec|
+    sign = np.where(Dp_vec < 0., -1., 1.)
+    cost = np.concatenate((crss, np.tile(1.e3*np.max(crss, axis=1, keepdims=True), 5)), axis=1)
+    tol = 1.e-12*np.max(crss, axis=1)
+    basis = np.tile(np.arange(24, 29), (N,1))
+    
+    def basis_matrices(ind):
+        A = np.concatenate((np.broadcast_to(crystal_properties.P, (len(ind),5,24)), 
+                            sign[ind,:,None]*np.eye(5)), axis=2)
+        return np.take_along_axis(A, basis[ind,None,:], axis=2)
+    
+    todo = np.arange(N)
+    for it in range(maxiter):
+        B = basis_matrices(todo)
+        y = np.linalg.solve(B.transpose(0,2,1), np.take_along_axis(cost[todo], basis[todo], axis=1)[...,None])[...,0]
+        # reduced costs of the slip systems, the entering one is the first with a negative reduced cost
+        reduced = crss[todo] - y @ crystal_properties.P
+        basic = np.zeros((len(todo),25), dtype=bool)
+        np.put_along_axis(basic, np.minimum(basis[todo], 24), True, axis=1)
+        entering = (reduced < -tol[todo,None]) & ~basic[:,:24]
+        optimal = ~np.any(entering, axis=1)
+        todo, B, entering = todo[~optimal], B[~optimal], entering[~optimal]
+        if len(todo) == 0:
+            break
+        e = np.argmax(entering, axis=1)
+        z = np.linalg.solve(B, Dp_vec[todo,:,None])[...,0]
+        u = np.linalg.solve(B, crystal_properties.P[:,e].T[...,None])[...,0]
+        # ratio test, ties are broken by the smallest index of the basic variables
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(u > 1.e-12, np.maximum(z, 0.)/u, np.inf)
+        tmin = np.min(ratio, axis=1, keepdims=True)
+        ties = ratio <= tmin*(1.+1.e-12) + 1.e-15
+        leave = np.argmin(np.where(ties, basis[todo], 99), axis=1)
+        basis[todo, leave] = e
+    else:
+        print('Batched simplex did not converge for {} grains.'.format(len(todo)))
+    
+    z = np.linalg.solve(basis_matrices(np.arange(N)), Dp_vec[...,None])[...,0]
+    slips = basis < 24
+    sliprates = np.zeros((N,24))
+    sliprates[np.nonzero(slips)[0], basis[slips]] = np.maximum(z[slips], 0.)
+    found = np.all(slips & (z > Dtol), axis=1)
+    found[todo] = False
+    return sliprates, basis, found
+
+def solveambSVD_batched(stress_loc, Dp_vec, crss):
+    '''
+    Batched version of Grain.solveambSVD for (N,3,3) stresses, (N,5) strain rates and (N,24) CRSS. 
+    Sets of potentially active slip systems are handled as masks on the Schmid matrix, so the pseudo-inverses
+    of all grains are computed in one call; the most negative slip rate is removed from the set until all 
+    slip rates are non-negative. Returns (N,24) slip rates.
+    '''
+    stress_vec = m2voigt_dev(stress_loc.transpose(1,2,0)).T
+    potentactives = resolved_shear_stresses(stress_vec)/crss > (1.-Stol)
+    gm = np.zeros((len(Dp_vec),24))
+    todo = np.arange(len(Dp_vec))
+    while len(todo) > 0:
+        A = crystal_properties.P[None,:,:]*potentactives[todo,None,:]
+        gm[todo] = np.einsum('nij,nj->ni', np.linalg.pinv(A), Dp_vec[todo])
+        negative = np.any(gm[todo] < -Dtol, axis=1)
+        todo = todo[negative]
+        # remove the index of the most negative slip rate from the set of potentially active slip systems
+        most_negative = np.argmin(np.where(potentactives[todo], gm[todo], np.inf), axis=1)
+        potentactives[todo, most_negative] = False
+    return gm
+
+def solveambRD_batched(stress_loc, Dp_vec, crss, SRS, gm0, stress_prev=None, tol=1.e-6, maxiter=100):
+    '''
+    Rate-dependent solution of the Taylor ambiguity for (N,3,3) rate-independent stresses, (N,5) strain rates, 
+    (N,24) CRSS and (N,) reference slip rates gm0: the stresses for which the power law 
+    gm = gm0*(max(0,tau)/crss)**(1/SRS) reproduces the strain rates, P @ gm = Dp_vec. They minimise the convex 
+    potential  sum(gm0*crss/(n+1)*(max(0,tau)/crss)**(n+1)) - x.W.Dp_vec  (x the stress in voigt notation, 
+    tau = resolved_shear_stresses(x), n = 1/SRS), which is done by Newton iterations with analytic Hessians for all grains at once. 
+    The steps are limited to a change of 0.2 in tau/crss and damped by a backtracking line search, so the power 
+    law cannot overflow. Grains converge when the strain rates are reproduced to tol (relative to max|Dp_vec|) 
+    and are then masked out. Every grain starts from the rate-independent stress or 
+    from stress_prev (the stress of the previous step), whichever has the lower potential. 
+    Returns (N,24) slip rates and (N,3,3) stresses.
+    '''
+    n = 1./SRS
+    B = crystal_properties.S_proj
+    P = crystal_properties.P
+    # metric of the work rate in voigt notation, x.W.d = S:D
+    W = 2.*np.eye(5)
+    W[0,1], W[1,0] = 1., 1.
+    gm0 = np.broadcast_to(np.asarray(gm0, dtype=float), (len(Dp_vec),))
+    
+    def potential(x, crss, gm0, Dp_vec):
+        r = np.maximum(resolved_shear_stresses(x), 0.)/crss
+        return np.sum(gm0[:,None]*crss/(n+1.)*r**(n+1.), axis=1) - np.einsum('ni,ni->n', x @ W, Dp_vec)
+    
+    x = m2voigt_dev(stress_loc.transpose(1,2,0)).T
+    with np.errstate(over='ignore', invalid='ignore'):
+        if stress_prev is not None:
+            x_prev = m2voigt_dev(stress_prev.transpose(1,2,0)).T
+            lower = potential(x_prev, crss, gm0, Dp_vec) < potential(x, crss, gm0, Dp_vec)
+            x[lower] = x_prev[lower]
+        
+        todo = np.arange(len(x))
+        for it in range(maxiter):
+            xt, c, g0, d = x[todo], crss[todo], gm0[todo], Dp_vec[todo]
+            r = np.maximum(resolved_shear_stresses(xt), 0.)/c
+            res = (g0[:,None]*r**n) @ P.T - d
+            converged = np.max(np.abs(res), axis=1) <= tol*np.max(np.abs(d), axis=1)
+            todo, xt, c, g0, d, r, res = [v[~converged] for v in (todo, xt, c, g0, d, r, res)]
+            if len(todo) == 0:
+                break
+            # Newton step on the gradient W.res of the potential
+            grad = res @ W
+            H = np.einsum('si,ns,sj->nij', B, g0[:,None]*n*r**(n-1.)/c, B)
+            H += 1.e-12*np.trace(H, axis1=1, axis2=2)[:,None,None]*np.eye(5)
+            step = -np.linalg.solve(H, grad[...,None])[...,0]
+            dr = np.max(np.abs(step @ B.T)/c, axis=1)
+            alpha = np.minimum(1., 0.2/dr)
+            # backtracking (Armijo) line search
+            phi = potential(xt, c, g0, d)
+            slope = np.sum(grad*step, axis=1)
+            for _ in range(50):
+                fails = ~(potential(xt + alpha[:,None]*step, c, g0, d) <= phi + 1.e-4*alpha*slope)
+                if not np.any(fails):
+                    break
+                alpha[fails] *= 0.5
+            x[todo] = xt + alpha[:,None]*step
+        else:
+            print('RD solution of the Taylor ambiguity did not converge for {} grains.'.format(len(todo)))
+        
+        sliprates = gm0[:,None]*(np.maximum(resolved_shear_stresses(x), 0.)/crss)**n
+    return sliprates, voigt2m_dev(x.T).transpose(2,0,1)
+
+def resolved_shear_stresses(stress_vec, out=None):
+    '''
+    Resolved shear stresses on all slip systems of the deviatoric stresses "stress_vec" in voigt notation 
+    (m2voigt_dev), (N,5) -> (N,24) or (5,) -> (24,), both signs of slip. One matrix product with the projection 
+    crystal_properties.S_proj; float32 stresses are projected in single precision. The result is written into 
+    "out" if a preallocated array of the right shape and dtype is given.
+    '''
+    stress_vec = np.asarray(stress_vec)
+    S_proj = crystal_properties.S_proj
+    if stress_vec.dtype == np.float32:
+        S_proj = S_proj.astype(np.float32)
+    return np.matmul(stress_vec, S_proj.T, out=out)
+
 def getRSS(S, P):   
-    rss = np.zeros(24)
-    for i in range(24):
-        rss[i] = np.tensordot(S, P[:,:,i], axes=2)
-#     x = m2voigt_dev(S)
-#     rss = np.dot(crystal_properties.S_proj, x) # both positive and negative
-    return rss
+    '''Resolved shear stresses of the stress tensor S on the Schmid tensors P (3,3,Nslips).'''
+    return np.einsum('ij,ijs->s', S, P)
     
 def stress_average(stress_list):
     if type(stress_list) is list:
@@ -3058,9 +4726,7 @@ def generate_random_orientations(N, output='angles'):  # output 'angles' or 'mat
     angles[:,2] = 2.*np.pi*angles[:,2]
     
     if output == 'matrix':
-        Q0 = np.zeros((N,3,3))
-        for i in range(N):
-            Q0[i,:,:] = ang2matrix(np.rad2deg(angles[i,:]))     
+        Q0 = ang2matrix(np.rad2deg(angles))
         return Q0 
     else: 
         return np.rad2deg(angles)
@@ -1,3 +1,4 @@
+import os
 import numpy as np
 import crystal_plasticity_module as cp
 import odflib
@@ -9,6 +10,14 @@ import dill
 # Path where the uploaded files will be stored
 UPLOAD_DIRECTORY = "/Users/kimbi/Documents/Specialization Project/CP_Files/uploads/"
 
+# The points of the yield loci are solved by a pool of processes on multi-core machines. Every request of the
+# dashboard starts its own pool, so the workers are capped (CP_YL_WORKERS, at most 4 by default, 1 solves serially)
+YL_WORKERS = int(os.environ.get('CP_YL_WORKERS', min(4, os.cpu_count() or 1)))
+YL_PARALLEL = {'workers': YL_WORKERS} if YL_WORKERS > 1 else None
+
+# Above this number of grains the pole figures are shown as densities instead of points (pf_style 'auto')
+PF_DENSITY_GRAINS = 5000
+
 # Funtion that triggers the creation of the initial polycvrystal data and returns flag if initial polycrystal data is generated
 def create_initial_polycrystal(selected_grain_ori_state, random_num,
                         euler_phi1, euler_theta, euler_phi2, uploaded_filename, threshold):
@@ -203,9 +212,27 @@ def create_loaded_polycrystal(initial_data, selected_loading_state,
             return 1
 
 # Function that generates data and figures for initial and loaded pole figures
-def generate_pf(loaded_data, pf_cl_value, planes_input, pf_normal_value, selected_grain_ori_state):
+def pf_traces(polycrystal, planes_input, color, marker_size, pf_style):
+    """
+    Input: Polycrystal, Pole figure plane, Color, Marker size, Pole figure style ('points', 'density' or 'auto')
+    Output: Pole figure traces for ND, TD and RD as normal
+    """
+    if pf_style == 'auto':
+        pf_style = 'density' if polycrystal.Ngrains > PF_DENSITY_GRAINS else 'points'
+
+    if pf_style == 'density':
+        # contour lines of the binned poles (equal-area grid), their size does not depend on the number of grains
+        polefigure = polycrystal.plot_orientations_plotly(plot_type='PF_DENSITY', crystal_structure = planes_input)
+        return [go.Contour(x = polefigure[3], y = polefigure[3], z = polefigure[i], contours_coloring='lines', colorscale=[[0, color], [1, color]],
+                           line_width=2, showscale=False, hoverinfo='skip') for i in range(3)]
+
+    polefigure = polycrystal.plot_orientations_plotly(plot_type='PF', crystal_structure = planes_input)
+    return [go.Scatter(x = polefigure[i], y = polefigure[i+3], mode='markers', marker=dict(color = color,size=marker_size), showlegend=False) for i in range(3)]
+
+def generate_pf(loaded_data, pf_cl_value, planes_input, pf_normal_value, selected_grain_ori_state, pf_style='auto'):
     """
-    Input: Loaded polycrystal data, Pole figure to show checkbox value, Pole figure plane, Pole figure normal value, Grain orientation selected
+    Input: Loaded polycrystal data, Pole figure to show checkbox value, Pole figure plane, Pole figure normal value, Grain orientation selected,
+           Pole figure style ('points', 'density' or 'auto' for densities above PF_DENSITY_GRAINS grains)
     Output: Pole figure
     """
     if loaded_data is None:
@@ -214,19 +241,12 @@ def generate_pf(loaded_data, pf_cl_value, planes_input, pf_normal_value, selecte
             polycrystal_initial = dill.load(f)
         
 
-        polefigure_initial = polycrystal_initial.plot_orientations_plotly(plot_type='PF', crystal_structure = planes_input)
-
-        
         if selected_grain_ori_state == "Specify Euler Angles (Bunge's notation in degrees)":
             marker_size = 5
         else:
             marker_size = 3
 
-        fig_pf_initial_nd = go.Scatter(x = polefigure_initial[0], y = polefigure_initial[3], mode='markers', marker=dict(color = '#78abde',size=marker_size), showlegend=False)
-
-        fig_pf_initial_td = go.Scatter(x = polefigure_initial[1], y = polefigure_initial[4], mode='markers', marker=dict(color = '#78abde',size=marker_size), showlegend=False)
-
-        fig_pf_initial_rd = go.Scatter(x = polefigure_initial[2], y = polefigure_initial[5], mode='markers', marker=dict(color = '#78abde',size=marker_size), showlegend=False)
+        fig_pf_initial_nd, fig_pf_initial_td, fig_pf_initial_rd = pf_traces(polycrystal_initial, planes_input, '#78abde', marker_size, pf_style)
 
         pf_figure = go.Figure(
             data=[go.Scatter(x = [], y = [], mode='markers', showlegend=False)],
@@ -273,9 +293,6 @@ def generate_pf(loaded_data, pf_cl_value, planes_input, pf_normal_value, selecte
         with open('polycrystal_initial.pkl', 'rb') as f:
             polycrystal_initial = dill.load(f)
 
-        polefigure_initial = polycrystal_initial.plot_orientations_plotly(plot_type='PF', crystal_structure = planes_input)
-
-
         with open('polycrystal_loaded.pkl', 'rb') as f:
             polycrystal_loaded = dill.load(f)
         
@@ -284,16 +301,8 @@ def generate_pf(loaded_data, pf_cl_value, planes_input, pf_normal_value, selecte
         else:
             marker_size = 3
 
-        polefigure_loaded = polycrystal_loaded.plot_orientations_plotly(plot_type='PF', crystal_structure = planes_input)
-
-        fig_pf_initial_nd = go.Scatter(x = polefigure_initial[0], y = polefigure_initial[3], mode='markers', marker=dict(color = '#78abde',size=marker_size), showlegend=False)
-        fig_pf_loaded_nd = go.Scatter(x = polefigure_loaded[0], y = polefigure_loaded[3], mode='markers', marker=dict(color = '#00256e',size=marker_size), showlegend=False)
-
-        fig_pf_initial_td = go.Scatter(x = polefigure_initial[1], y = polefigure_initial[4], mode='markers', marker=dict(color = '#78abde',size=marker_size), showlegend=False)
-        fig_pf_loaded_td = go.Scatter(x = polefigure_loaded[1], y = polefigure_loaded[4], mode='markers', marker=dict(color = '#00256e',size=marker_size), showlegend=False)
-
-        fig_pf_initial_rd = go.Scatter(x = polefigure_initial[2], y = polefigure_initial[5], mode='markers', marker=dict(color = '#78abde',size=marker_size), showlegend=False)
-        fig_pf_loaded_rd = go.Scatter(x = polefigure_loaded[2], y = polefigure_loaded[5], mode='markers', marker=dict(color = '#00256e',size=marker_size), showlegend=False)
+        fig_pf_initial_nd, fig_pf_initial_td, fig_pf_initial_rd = pf_traces(polycrystal_initial, planes_input, '#78abde', marker_size, pf_style)
+        fig_pf_loaded_nd, fig_pf_loaded_td, fig_pf_loaded_rd = pf_traces(polycrystal_loaded, planes_input, '#00256e', marker_size, pf_style)
 
         pf_figure = go.Figure(
             data=[go.Scatter(x = [], y = [], mode='markers', showlegend=False)],
@@ -503,7 +512,7 @@ def generate_ys(plot_axes, loaded_data):
         with open('polycrystal_initial.pkl', 'rb') as f:
             polycrystal_initial = dill.load(f)
 
-        YL_initial, r_initial, num_initial = polycrystal_initial.yield_locus(locus_type='2D', number_of_points=50, plot_axes=plot_axes)
+        YL_initial, r_initial, num_initial = polycrystal_initial.yield_locus(locus_type='2D', number_of_points=50, plot_axes=plot_axes, parallel=YL_PARALLEL)
         ys_xvalues_initial = YL_initial[xi,xj,:]
         ys_yvalues_initial = YL_initial[yi,yj,:]
 
@@ -518,11 +527,11 @@ def generate_ys(plot_axes, loaded_data):
         with open('polycrystal_loaded.pkl', 'rb') as f:
             polycrystal_loaded = dill.load(f)
 
-        YL_initial, r_initial, num_initial = polycrystal_initial.yield_locus(locus_type='2D', number_of_points=50, plot_axes=plot_axes)
+        YL_initial, r_initial, num_initial = polycrystal_initial.yield_locus(locus_type='2D', number_of_points=50, plot_axes=plot_axes, parallel=YL_PARALLEL)
         ys_xvalues_initial = YL_initial[xi,xj,:]
         ys_yvalues_initial = YL_initial[yi,yj,:]
 
-        YL_loaded, r_loaded, num_loaded = polycrystal_loaded.yield_locus(locus_type='2D', number_of_points=50, plot_axes=plot_axes)       
+        YL_loaded, r_loaded, num_loaded = polycrystal_loaded.yield_locus(locus_type='2D', number_of_points=50, plot_axes=plot_axes, parallel=YL_PARALLEL)       
         ys_xvalues_loaded = YL_loaded[xi,xj,:]
         ys_yvalues_loaded = YL_loaded[yi,yj,:]
     
@@ -68,6 +68,19 @@ content = html.Div([
                                             value=[1,2],
                                             id="pf-checklist"),
                                     ], width=1),
+                                    # Radio buttons for showing the poles as points or as densities (automatic for large numbers of grains)
+                                    dbc.Col([
+                                        dbc.Label("Style:"),
+                                        dbc.RadioItems(
+                                            options=[
+                                                {'label':'Auto', 'value':'auto'},
+                                                {'label':'Points', 'value':'points'},
+                                                {'label':'Density', 'value':'density'}
+                                            ],
+                                            value = 'auto',
+                                            id = 'pf-style-radiobuttons',
+                                        )
+                                    ], width=1),
                                 ]),
                                 # Loading icon shown when the data is still being generated in the background
                                 dbc.Row([
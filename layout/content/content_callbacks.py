@@ -108,13 +108,14 @@ def get_callbacks_content(app):
         Input('pf-plane-input','value'),
         Input('pf-normal-radiobuttons','value'),
         Input('input-grain-ori-state','value'),
+        Input('pf-style-radiobuttons','value'),
     prevent_initial_call=True)
-    def gen_initial_pf(initial_data, loaded_data, pf_cl_value, planes_input, pf_normal_value, selected_grain_ori_state):
+    def gen_initial_pf(initial_data, loaded_data, pf_cl_value, planes_input, pf_normal_value, selected_grain_ori_state, pf_style):
         """This function the generates and shows the Pole Figure
-        Input: Initial polycrystal data, Loaded polycrystal data, pole figure checkbox value, pole figure plane value, pole figure normal value, grain orientation value
+        Input: Initial polycrystal data, Loaded polycrystal data, pole figure checkbox value, pole figure plane value, pole figure normal value, grain orientation value, pole figure style value
         Output: Pole figure"""
         if initial_data is not None:
-            pf_figure = generate_pf(loaded_data, pf_cl_value, planes_input, pf_normal_value, selected_grain_ori_state)
+            pf_figure = generate_pf(loaded_data, pf_cl_value, planes_input, pf_normal_value, selected_grain_ori_state, pf_style)
             return dcc.Graph(figure = pf_figure)
 
     # Callback to show or hide UI elements in the Pole Figure tab
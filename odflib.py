@@ -827,40 +827,44 @@ class ODF(object):
 #    return data
 #
 #
-#def get_primes_to(n):
-#    """Return all primes up to *n*."""
-#    numbers = set(range(n, 1, -1))
-#    primes = []
-#    while numbers:
-#        p = numbers.pop()
-#        primes.append(p)
-#        numbers.difference_update(set(range(p*2, n+1, p)))
-#    return np.array(primes)
-#
-#def get_first_primes(n, base=100000):
-#    """Returns the *n* first primes."""
-#    initbase = base
-#    while True:
-#        primes = get_primes_to(base)
-#        if len(primes) >= n:
-#            return primes[:n]
-#        base += initbase
-#
-#def halton_number(index, base):
-#    """Returns the Halton number index *index* of base *base*."""
-#    result = 0
-#    f = 1./base
-#    i = index
-#    while i > 0:
-#        result += f * (i % base)
-#        i = np.floor(i / base)
-#        f /= base
-#    return result
-#
-#def halton(npoints, ndim=1):
-#    """Returns *npoints* Halton numbers in *ndim* dimensions."""
-#    bases = get_first_primes(ndim)
-#    return np.array([[halton_number(i, b) for b in bases]
-#                     for i in range(npoints)]).squeeze()
+def get_primes_to(n):
+    """Return all primes up to *n*."""
+    numbers = set(range(n, 1, -1))
+    primes = []
+    while numbers:
+        p = min(numbers)
+        numbers.remove(p)
+        primes.append(p)
+        numbers.difference_update(set(range(p*2, n+1, p)))
+    return np.array(primes)
+
+def get_first_primes(n, base=100):
+    """Returns the *n* first primes."""
+    initbase = base
+    while True:
+        primes = get_primes_to(base)
+        if len(primes) >= n:
+            return primes[:n]
+        base += initbase
+
+def halton_number(index, base):
+    """Returns the Halton numbers of the indices *index* (int or array) of
+    base *base*."""
+    i = np.array(index, dtype=np.int64)
+    result = np.zeros(i.shape)
+    f = 1./base
+    while np.any(i > 0):
+        result += f * (i % base)
+        i //= base
+        f /= base
+    return result
+
+def halton(npoints, ndim=1, start=0):
+    """Returns *npoints* Halton numbers in *ndim* dimensions, starting at
+    index *start* of the sequence. Consecutive calls with *start* advanced
+    by *npoints* continue the same sequence."""
+    bases = get_first_primes(ndim)
+    index = np.arange(start, start + npoints)
+    return np.array([halton_number(index, b) for b in bases]).T.squeeze()
     
-    
\ No newline at end of file
+    
\ No newline at end of file
@@ -0,0 +1,54 @@
+import io
+import os
+import sys
+import contextlib
+import numpy as np
+import pytest
+
+# the toolbox is a set of flat modules without installation, the tests import them from the working tree
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crystal_plasticity_module as cp
+
+# plane strain compression with some shear
+L = np.array([[1.0, 0.3,  0.0],
+              [0.0, 0.0,  0.0],
+              [0.0, 0.0, -1.0]])
+
+options = {'increment_jacobian' : 1.e-3,
+           'rotate_boundary'    : True,
+           'use_SCYL'           : False,
+           'SCYL_exponent'      : 100,
+           'solve_Tayloramb'    : 'SVD',
+           'gmdot0'             : 1.,
+           'SRS'                : 0.01,
+           'engine'             : 'grainwise',
+           'solve_slips'        : 'simplex'}
+
+
+@pytest.fixture
+def polycrystal():
+    '''Factory of polycrystals of N random grains, always the same for a given seed.'''
+    def make(N, grain_interaction='FCTAYLOR', seed=0):
+        np.random.seed(seed)
+        orientations = cp.generate_random_orientations(N)
+        hardening_law = {'model'                : 'RIGID_PLASTIC',
+                         'hardening_parameters' : [10.],
+                         'relax_penalties'      : [0., 0., 0.]}
+        with contextlib.redirect_stdout(io.StringIO()):
+            return cp.Polycrystal('FCC_111', orientations, None, hardening_law, grain_interaction)
+    return make
+
+
+@pytest.fixture
+def load():
+    '''Deforms a polycrystal by Nsteps steps of 0.01 von Mises strain by the python implementation.'''
+    def run(pc, Nsteps=2, **opts):
+        result_vars = {'grain_results'       : ['euler_angles','sliprates','stress_loc'],
+                       'polycrystal_results' : ['average_stress','average_slip'],
+                       'number_of_outputs'   : Nsteps}
+        with contextlib.redirect_stdout(io.StringIO()):
+            pc.load(L, None, None, True, False, False, Nsteps, 0.01, False, result_vars, False, 
+                    options=dict(options, **opts))
+        return pc
+    return run
@@ -0,0 +1,30 @@
+import numpy as np
+import crystal_plasticity_module as cp
+
+
+def cayley_inverse(W):
+    '''Second-order orientation update with the explicit inverse, the reference for spin_cayley.'''
+    return np.linalg.inv(np.eye(3) - 0.5*W) @ (np.eye(3) + 0.5*W)
+
+
+def test_spin_cayley():
+    rng = np.random.default_rng(0)
+    A = rng.normal(size=(1000,3,3))
+    W = A - A.transpose(0,2,1)
+    assert np.max(np.abs(cp.spin_cayley(W) - cayley_inverse(W))) < 1.e-12
+    assert np.max(np.abs(cp.spin_cayley(W[0]) - cayley_inverse(W[0]))) < 1.e-12
+
+
+def test_alamel_rotation_update(polycrystal, load, monkeypatch):
+    closed = load(polycrystal(200, 'ALAMEL'), Nsteps=10)
+    monkeypatch.setattr(cp, 'spin_cayley', cayley_inverse)
+    inverse = load(polycrystal(200, 'ALAMEL'), Nsteps=10)
+    
+    # the round-off differences of the two updates are amplified by the degenerate relaxed slip solutions 
+    # of the linear programming, single grains end up several degrees apart. Over the seeds 0-4 the averaged 
+    # stress drifted by 0.7-2.8e-3 (relative to its largest component) and the {111} pole figure densities 
+    # by 0.03-0.08 mrd, the tolerances leave a factor of about 3 above that
+    stress = inverse.average_stress[:,:,-1]
+    assert np.max(np.abs(closed.average_stress[:,:,-1] - stress)) < 1.e-2*np.max(np.abs(stress))
+    density = [cp.pole_figure_density(pc.grain_array.Q, (1,1,1), bins=32, sigma=2.)[0] for pc in (closed, inverse)]
+    assert np.nanmax(np.abs(density[0] - density[1])) < 0.25
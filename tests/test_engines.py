@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('solve_Tayloramb', ['SVD', 'RD'])
+@pytest.mark.parametrize('solve_slips', ['simplex', 'vertex'])
+def test_grainwise_batched(polycrystal, load, solve_Tayloramb, solve_slips):
+    # the engines solve the same problems in a different order of operations, so they agree to round-off; 
+    # RD warm starts the Newton iterations from the stresses of the previous step in both engines
+    grainwise = load(polycrystal(100), Nsteps=5, engine='grainwise', solve_Tayloramb=solve_Tayloramb, solve_slips=solve_slips)
+    batched   = load(polycrystal(100), Nsteps=5, engine='batched', solve_Tayloramb=solve_Tayloramb, solve_slips=solve_slips)
+    stress = batched.grain_array.stress_loc
+    assert np.max(np.abs(grainwise.grain_array.stress_loc - stress)) < 1.e-9*np.max(np.abs(stress))
+    assert np.max(np.abs(grainwise.grain_array.Q - batched.grain_array.Q)) < 1.e-9
+
+
+def test_simplex_vertex(polycrystal, load):
+    # for uniform CRSS the maximum-work vertex is the stress of the linear programming solution
+    simplex = load(polycrystal(100), Nsteps=5, engine='batched', solve_slips='simplex')
+    vertex  = load(polycrystal(100), Nsteps=5, engine='batched', solve_slips='vertex')
+    stress = simplex.grain_array.stress_loc
+    assert np.max(np.abs(vertex.grain_array.stress_loc - stress)) < 1.e-9*np.max(np.abs(stress))
@@ -0,0 +1,167 @@
+import json
+import numpy as np
+import scipy.optimize
+
+#__all__ = ['Yld2004']
+
+
+# coefficient names of the linear transformations of Yld2004-18p
+coefficient_names = ('c12', 'c13', 'c21', 'c23', 'c31', 'c32', 'c44', 'c55', 'c66')
+
+
+def transformation(c):
+    """Returns the 9x9 matrix mapping the flattened stress tensor to the
+    transformed deviator C.T.sigma of Yld2004-18p for the 9 coefficients *c*."""
+    c12, c13, c21, c23, c31, c32, c44, c55, c66 = c
+    # deviatoric part
+    T = np.eye(9)
+    for i in (0, 4, 8):
+        for j in (0, 4, 8):
+            T[i,j] -= 1./3.
+    # linear transformation of the deviator
+    C = np.zeros((9,9))
+    C[0,4], C[0,8] = -c12, -c13
+    C[4,0], C[4,8] = -c21, -c23
+    C[8,0], C[8,4] = -c31, -c32
+    C[5,5], C[7,7] = c44, c44    # yz
+    C[2,2], C[6,6] = c55, c55    # zx
+    C[1,1], C[3,3] = c66, c66    # xy
+    return C @ T
+
+
+class Yld2004(object):
+    """Yld2004-18p anisotropic yield function (Barlat et al., Int. J.
+    Plasticity 21, 2005) with the equivalent stress
+
+        4*seq**a = sum_ij |S'_i - S''_j|**a
+
+    where S'_i and S''_j are the principal values of the two linear
+    transformations C'.T.sigma and C''.T.sigma of the stress deviator.
+    With all coefficients 1 it is the isotropic Hershey-Hosford function.
+
+    Arguments
+    ---------
+    c1, c2: sequences of 9 floats
+        Coefficients c12, c13, c21, c23, c31, c32, c44, c55, c66 of the
+        transformations C' and C''.
+    a: float
+        Exponent, 8 for FCC and 6 for BCC materials.
+    yield_stress: float
+        The material yields at equivalent_stress(sigma) = yield_stress.
+    """
+    def __init__(self, c1=None, c2=None, a=8., yield_stress=1.):
+        self.c1 = np.ones(9) if c1 is None else np.array(c1, dtype=float)
+        self.c2 = np.ones(9) if c2 is None else np.array(c2, dtype=float)
+        if self.c1.shape != (9,) or self.c2.shape != (9,):
+            raise TypeError('*c1* and *c2* must have 9 coefficients')
+        self.a = float(a)
+        self.yield_stress = float(yield_stress)
+        self.fit_error = None
+        self._L1 = transformation(self.c1)
+        self._L2 = transformation(self.c2)
+
+    def _evaluate(self, stress, gradient):
+        stress = np.asarray(stress, dtype=float)
+        if stress.shape[-2:] != (3, 3):
+            raise TypeError('*stress* must have shape (..., 3, 3)')
+        shape = stress.shape[:-2]
+        s = stress.reshape(-1, 9)
+        w1, v1 = np.linalg.eigh((s @ self._L1.T).reshape(-1, 3, 3))
+        w2, v2 = np.linalg.eigh((s @ self._L2.T).reshape(-1, 3, 3))
+        d = w1[:,:,None] - w2[:,None,:]
+        # scaled by the largest difference, so that the powers stay finite
+        m = np.max(np.abs(d), axis=(1,2))
+        m[m == 0.] = 1.
+        x = np.abs(d)/m[:,None,None]
+        phi = np.sum(x**self.a, axis=(1,2))
+        seq = m*(phi/4.)**(1./self.a)
+        if not gradient:
+            return seq.reshape(shape)
+
+        # derivatives with respect to the principal values
+        t = x**(self.a-1.)*np.sign(d)*(seq/(m*phi))[:,None,None]
+        g1 = np.sum(t, axis=2)
+        g2 = -np.sum(t, axis=1)
+        # with respect to the transformed deviators and to the stress
+        G1 = np.einsum('nij,nj,nkj->nik', v1, g1, v1).reshape(-1, 9)
+        G2 = np.einsum('nij,nj,nkj->nik', v2, g2, v2).reshape(-1, 9)
+        grad = G1 @ self._L1 + G2 @ self._L2
+        return seq.reshape(shape), grad.reshape(shape + (3, 3))
+
+    def equivalent_stress(self, stress):
+        """Equivalent stress of the stress tensors *stress* (..., 3, 3)."""
+        return self._evaluate(stress, False)
+
+    def gradient(self, stress):
+        """Equivalent stress and its gradient d(seq)/d(sigma) (the normal of
+        the yield surface) of the stress tensors *stress* (..., 3, 3)."""
+        return self._evaluate(stress, True)
+
+    def __call__(self, stress):
+        """Yield function equivalent_stress(sigma) - yield_stress."""
+        return self.equivalent_stress(stress) - self.yield_stress
+
+    @classmethod
+    def fit(cls, YL, a=8.):
+        """Fits the 18 coefficients to the points of a yield locus.
+
+        Arguments
+        ---------
+        YL: 3x3xN array_like
+            Stresses on the yield locus, e.g. returned by
+            Polycrystal.yield_locus('full') or ('user'). Points that did not
+            converge (nan) are ignored.
+        a: float
+            Exponent, 8 for FCC and 6 for BCC materials.
+
+        The yield stress of the fitted function is the uniaxial yield
+        stress along x. The root mean square of the relative deviations of
+        the points from the fitted surface is stored in *fit_error*.
+        """
+        points = np.moveaxis(np.asarray(YL, dtype=float), -1, 0)
+        points = points[np.all(np.isfinite(points), axis=(1,2))]
+        if len(points) < 18:
+            raise ValueError('at least 18 points are needed to fit Yld2004-18p')
+        # fit to the unit surface of the scaled points
+        scale = np.median(np.sqrt(1.5*np.sum(points**2, axis=(1,2))))
+        points = points/scale
+
+        def residuals(c):
+            return cls(c[:9], c[9:], a).equivalent_stress(points) - 1.
+
+        sol = scipy.optimize.least_squares(residuals, np.ones(18))
+        unit = cls(sol.x[:9], sol.x[9:], a)
+        # the equivalent stress is homogeneous of first order in the coefficients,
+        # rescale it to the uniaxial yield stress along x
+        k = unit.equivalent_stress(np.diag([1., 0., 0.]))
+        fitted = cls(sol.x[:9]/k, sol.x[9:]/k, a, yield_stress=scale/k)
+        fitted.fit_error = np.sqrt(np.mean(sol.fun**2))
+        return fitted
+
+    def parameters(self):
+        """Returns the parameters as a dict (see from_parameters)."""
+        return {'model'        : 'Yld2004-18p',
+                'a'            : self.a,
+                'yield_stress' : self.yield_stress,
+                'c1'           : dict(zip(coefficient_names, self.c1.tolist())),
+                'c2'           : dict(zip(coefficient_names, self.c2.tolist()))}
+
+    @classmethod
+    def from_parameters(cls, parameters):
+        """Creates the yield function from the dict of parameters()."""
+        if parameters.get('model') != 'Yld2004-18p':
+            raise ValueError('not a Yld2004-18p parameter set')
+        return cls([parameters['c1'][name] for name in coefficient_names],
+                   [parameters['c2'][name] for name in coefficient_names],
+                   parameters['a'], parameters['yield_stress'])
+
+    def save(self, fname):
+        """Writes the parameters to a json file."""
+        with open(fname, 'w') as f:
+            json.dump(self.parameters(), f, indent=4)
+
+    @classmethod
+    def load(cls, fname):
+        """Reads the parameters from a json file written by save()."""
+        with open(fname, 'r') as f:
+            return cls.from_parameters(json.load(f))